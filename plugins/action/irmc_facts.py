@@ -0,0 +1,15 @@
+"""Action plugin for module irmc_facts
+
+Command 'get' runs inside the controller, see plugins/plugin_utils/irmc_action.py.
+"""
+
+from __future__ import annotations
+
+from ansible_collections.fujitsu.primergy.plugins.plugin_utils.irmc_action import IrmcActionBase
+
+
+class ActionModule(IrmcActionBase):  # noqa: D101
+    module_name = 'irmc_facts'
+
+    def is_read_only(self, args: dict) -> bool:  # noqa: D102
+        return args.get('command', 'get') == 'get'
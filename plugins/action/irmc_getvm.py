@@ -0,0 +1,12 @@
+"""Action plugin for module irmc_getvm
+
+The module runs inside the controller, see plugins/plugin_utils/irmc_action.py.
+"""
+
+from __future__ import annotations
+
+from ansible_collections.fujitsu.primergy.plugins.plugin_utils.irmc_action import IrmcActionBase
+
+
+class ActionModule(IrmcActionBase):  # noqa: D101
+    module_name = 'irmc_getvm'
@@ -0,0 +1,45 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+
+class ModuleDocFragment(object):
+
+    # option 'retry' of the modules, see irmc_retry_argument_spec of module_utils/irmc.py
+    DOCUMENTATION = r'''
+options:
+    retry:
+        description: Retry policy for the requests to the iRMC. Connection errors are retried for all methods,
+                     read errors and responses with a status in 'statuses' only for the methods in 'methods'.
+                     If set, the retries are returned in 'retries' with their count per status or exception.
+        required:    false
+        type:        dict
+        suboptions:
+            attempts:
+                description: Maximum number of retries of a request, '0' disables retries.
+                type:        int
+                default:     5
+            backoff_factor:
+                description: Time between retries is 'backoff_factor * 2 ** (retry - 1)' seconds.
+                type:        float
+                default:     0.1
+            backoff_max:
+                description: Maximum time between retries in seconds. Responses with status 429 and 503 are
+                             retried after their 'Retry-After' time instead, at most 60 seconds.
+                type:        float
+                default:     30.0
+            jitter:
+                description: Maximum random time in seconds added to the time between retries.
+                type:        float
+                default:     0.0
+            statuses:
+                description: Response status codes which are retried.
+                type:        list
+                elements:    int
+                default:     [429, 503]
+            methods:
+                description: HTTP methods which are retried after read errors and for 'statuses'.
+                             POST and PATCH are not idempotent and only retried if set here.
+                type:        list
+                elements:    str
+                default:     ['DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT']
+'''
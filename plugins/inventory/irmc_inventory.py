@@ -0,0 +1,213 @@
+"""Inventory plugin to discover iRMCs in host lists and networks
+
+Addresses are checked concurrently, see plugins/module_utils/irmc_discovery.py,
+and the result of each address is kept in the inventory cache for `cache_timeout` seconds.
+"""
+
+from __future__ import annotations
+
+import os
+import warnings
+
+from ansible.errors import AnsibleError
+from ansible.inventory.group import to_safe_group_name
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_discovery import IrmcDiscovery, expand_targets
+
+DOCUMENTATION = r'''
+name: irmc_inventory
+short_description: Discover iRMCs in host lists and networks
+version_added: 2.1.0
+author: Fsas Technologies Inc.
+description:
+  - Checks the configured host names and the addresses of the configured networks concurrently for iRMCs
+    and adds the iRMCs found to the inventory, grouped by server model and firmware versions.
+  - Each address is checked with a TCP connect to port 443 first. Open ports are requested for the Redfish
+    service root and for server model, serial number, BIOS and iRMC firmware versions.
+  - With `cache` enabled, the result of each address is kept in the inventory cache. Repeated runs only check
+    the addresses whose cache entry is older than `cache_timeout` seconds, or older than `negative_cache_timeout`
+    seconds if no iRMC was found. The default cache plugin `memory` does not keep the results between runs,
+    cache plugin `ansible.builtin.jsonfile` with a directory in `cache_connection` does.
+  - The configuration file name needs to end with `irmc.yml` or `irmc.yaml`.
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description: Name of the plugin.
+    required: true
+    choices: ['fujitsu.primergy.irmc_inventory']
+  hosts:
+    description: Host names or IP addresses of iRMCs.
+    type: list
+    elements: str
+    default: []
+  networks:
+    description: Networks in CIDR notation whose addresses are checked for iRMCs.
+    type: list
+    elements: str
+    default: []
+  exclude:
+    description: Addresses or networks in CIDR notation which are not checked.
+    type: list
+    elements: str
+    default: []
+  irmc_username:
+    description: iRMC user for basic authentication.
+    type: str
+    required: true
+    env:
+      - name: IRMC_USER
+  irmc_password:
+    description: Password for iRMC user for basic authentication.
+    type: str
+    required: true
+    env:
+      - name: IRMC_PASSWORD
+  validate_certs:
+    description: Evaluate SSL certificate (set to false for self-signed certificate).
+    type: bool
+    default: true
+  group:
+    description: Group of all iRMCs found. iRMCs which answer, but whose data could not be read,
+      are added to group `<group>_failed` with the error in `irmc_discovery_msg`.
+    type: str
+    default: iRMC_group
+  group_by:
+    description: Data by which the iRMCs are grouped, the groups are named like `irmc_model_PRIMERGY_RX1330_M6S`.
+    type: list
+    elements: str
+    choices: ['model', 'bios_version', 'fw_version']
+    default: ['model', 'bios_version', 'fw_version']
+  connect_timeout:
+    description: Time in seconds to wait for the TCP connection to port 443.
+    type: float
+    default: 1.0
+  request_timeout:
+    description: Time in seconds to wait for the answer of a Redfish request, e.g. of a host with open port 443
+      which is no iRMC and does not answer.
+    type: float
+    default: 10.0
+  scan_limit:
+    description: Maximum number of concurrent TCP connection checks.
+    type: int
+    default: 256
+  limit:
+    description: Maximum number of concurrent Redfish requests.
+    type: int
+    default: 32
+  negative_cache_timeout:
+    description: Time in seconds after which an address without iRMC found is checked again,
+      at most `cache_timeout`.
+    type: int
+    default: 300
+'''
+
+EXAMPLES = r'''
+# inventory.irmc.yml
+plugin: fujitsu.primergy.irmc_inventory
+networks:
+  - 192.0.2.0/24
+hosts:
+  - irmc1.example.com
+irmc_username: admin
+irmc_password: "{{ lookup('env', 'IRMC_PASSWORD') }}"
+validate_certs: false
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/irmc_inventory
+keyed_groups:
+  - key: irmc_power_state
+    prefix: power
+'''
+
+group_keys = {
+    'model': ('system', 'model'),
+    'bios_version': ('system', 'bios_version'),
+    'fw_version': ('irmc', 'fw_version'),
+}
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):  # noqa: D101
+    NAME = 'fujitsu.primergy.irmc_inventory'
+
+    def verify_file(self, path: str) -> bool:  # noqa: D102
+        return super().verify_file(path) and os.path.basename(path).endswith(('irmc.yml', 'irmc.yaml'))
+
+    def parse(self, inventory, loader, path: str, cache: bool = True) -> None:  # noqa: ANN001, D102
+        super().parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        try:
+            targets = expand_targets(self.get_option('hosts'), self.get_option('networks'), self.get_option('exclude'))
+        except ValueError as e:
+            msg = f"Invalid network in '{path}': {e}"
+            raise AnsibleError(msg) from e
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache')
+        cached = {}
+        if use_cache and cache:
+            try:
+                cached = self._cache[cache_key]['hosts']
+            except KeyError:
+                pass
+
+        password = self.get_option('irmc_password')
+        if self.templar.is_template(password):
+            password = self.templar.template(password)
+        discovery = IrmcDiscovery(
+            self.get_option('irmc_username'),
+            password,
+            validate_certs=self.get_option('validate_certs'),
+            connect_timeout=self.get_option('connect_timeout'),
+            request_timeout=self.get_option('request_timeout'),
+            scan_limit=self.get_option('scan_limit'),
+            limit=self.get_option('limit'),
+            cache_ttl=self.get_option('cache_timeout') if use_cache else 0,
+            negative_cache_ttl=self.get_option('negative_cache_timeout'),
+        )
+        with warnings.catch_warnings():
+            # one warning per iRMC for validate_certs=false
+            warnings.filterwarnings('ignore', message='Unverified HTTPS request')
+            entries = discovery.run(targets, cached)
+        self.display.vvv(f"irmc_inventory: {discovery.stats}")
+        if use_cache:
+            self._cache[cache_key] = {'hosts': entries}
+
+        group = self.inventory.add_group(self.get_option('group'))
+        failed_group = None
+        strict = self.get_option('strict')
+        for name, entry in entries.items():
+            if entry.get('found'):
+                self.add_irmc_host(name, entry, group, strict)
+            elif entry.get('redfish'):
+                failed_group = failed_group or self.inventory.add_group(f"{group}_failed")
+                self.inventory.add_host(name, group=failed_group)
+                self.inventory.set_variable(name, 'irmc_discovery_msg', entry.get('msg'))
+
+    def add_irmc_host(self, name: str, entry: dict, group: str, strict: bool) -> None:
+        """Add an iRMC with its data as host variables and to its groups."""
+        self.inventory.add_host(name, group=group)
+        hostvars = {
+            'irmc_manufacturer': entry['system'].get('manufacturer'),
+            'irmc_model': entry['system'].get('model'),
+            'irmc_serial_number': entry['system'].get('serial_number'),
+            'irmc_power_state': entry['system'].get('power_state'),
+            'irmc_bios_version': entry['system'].get('bios_version'),
+            'irmc_fw_version': entry['irmc'].get('fw_version'),
+            'irmc_sdrr_version': entry['irmc'].get('sdrr_version'),
+        }
+        for key, value in hostvars.items():
+            self.inventory.set_variable(name, key, value)
+
+        for key in self.get_option('group_by'):
+            value = entry[group_keys[key][0]].get(group_keys[key][1])
+            if value and 'does not exist' not in str(value):
+                child = self.inventory.add_group(to_safe_group_name(f"irmc_{key}_{value}", force=True, silent=True))
+                self.inventory.add_child(group, child)
+                self.inventory.add_host(name, group=child)
+
+        self._set_composite_vars(self.get_option('compose'), hostvars, name, strict=strict)
+        self._add_host_to_composed_groups(self.get_option('groups'), hostvars, name, strict=strict)
+        self._add_host_to_keyed_groups(self.get_option('keyed_groups'), hostvars, name, strict=strict)
@@ -0,0 +1,151 @@
+"""Lookup plugin to query the local iRMC eventlog index
+
+The index is written by the `fujitsu.primergy.irmc_eventlog` module with command `collect`,
+so fleet questions can be answered without requesting every iRMC.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from typing import Any
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_eventlog_index import (
+    get_index_timestamp,
+    open_eventlog_index_readonly,
+    query_eventlog_index,
+)
+
+DOCUMENTATION = r'''
+name: irmc_eventlog_query
+short_description: Query the local iRMC eventlog index
+version_added: 2.1.0
+author: Fsas Technologies Inc.
+description:
+  - Queries the local SQLite index written by the `fujitsu.primergy.irmc_eventlog` module with command `collect`.
+  - The iRMCs themselves are not requested.
+options:
+  _terms:
+    description:
+      - iRMCs (value of `irmc_url` used for collection) to restrict the query to. All iRMCs if omitted.
+    required: false
+  index_file:
+    description:
+      - Local SQLite database written by `fujitsu.primergy.irmc_eventlog`. It is opened read-only.
+    type: path
+    required: true
+  eventlog_type:
+    description:
+      - Only return entries of these eventlog types.
+    type: list
+    elements: str
+  min_severity:
+    description:
+      - Only return entries with at least this severity.
+    type: str
+    choices: ['OK', 'Warning', 'Critical']
+  alert_group:
+    description:
+      - Only return entries of these alert groups (e.g. 'Memory').
+    type: list
+    elements: str
+  entry_type:
+    description:
+      - Only return entries of these entry types (e.g. 'SEL').
+    type: list
+    elements: str
+  since:
+    description:
+      - Only return entries created at or after this time.
+      - Either ISO 8601 time or age relative to now, e.g. '90s', '30m', '1h', '2d', '1w'.
+    type: str
+  until:
+    description:
+      - Only return entries created before this time, same format as O(since).
+    type: str
+  limit:
+    description:
+      - Maximum number of returned entries. '0' returns all entries.
+    type: int
+    default: 0
+  hosts_only:
+    description:
+      - Return one summary per iRMC (host, count, last_created) instead of the individual entries.
+    type: bool
+    default: false
+'''
+
+EXAMPLES = r'''
+- name: Show hosts which logged a critical memory event in the last hour
+  ansible.builtin.debug:
+    msg: "{{ lookup('fujitsu.primergy.irmc_eventlog_query', index_file='/var/lib/irmc/eventlog_index.db',
+             min_severity='Critical', alert_group='Memory', since='1h', hosts_only=true) }}"
+
+- name: Show the latest 10 warnings of two iRMCs
+  ansible.builtin.debug:
+    msg: "{{ query('fujitsu.primergy.irmc_eventlog_query', 'irmc1.example.com', 'irmc2.example.com',
+             index_file='/var/lib/irmc/eventlog_index.db', min_severity='Warning', limit=10) }}"
+'''
+
+RETURN = r'''
+_list:
+  description:
+    - Eventlog entries as returned by `fujitsu.primergy.irmc_eventlog`, newest first,
+      with the additional keys `host` and `eventlog_type`.
+    - With O(hosts_only=true), one dictionary per iRMC with `host`, `count` and `last_created`.
+  type: list
+  elements: dict
+'''
+
+severity_order = ['OK', 'Warning', 'Critical']
+age_units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def get_query_timestamp(value: str | None, option: str) -> int | None:
+    """Convert an ISO 8601 time or an age like '1h' to a UNIX timestamp."""
+    if value is None:
+        return None
+    if (match := re.fullmatch(r'\s*(\d+)\s*([smhdw])\s*', value)) is not None:
+        return int(time.time()) - int(match.group(1)) * age_units[match.group(2)]
+    if (timestamp := get_index_timestamp(value)) is None:
+        msg = f"Option '{option}' is neither an ISO 8601 time nor an age: '{value}'"
+        raise AnsibleError(msg)
+    return timestamp
+
+
+class LookupModule(LookupBase):  # noqa: D101
+    def run(self, terms: list, variables: dict | None = None, **kwargs: Any) -> list[dict]:  # noqa: D102, ANN401
+        self.set_options(var_options=variables, direct=kwargs)
+
+        severities = None
+        if (min_severity := self.get_option('min_severity')) is not None:
+            severities = severity_order[severity_order.index(min_severity):]
+
+        index_file = os.path.expanduser(self.get_option('index_file'))
+        if not os.path.isfile(index_file):
+            msg = f"Eventlog index '{index_file}' does not exist, " \
+                  "it is written by 'fujitsu.primergy.irmc_eventlog' with command 'collect'"
+            raise AnsibleError(msg)
+        try:
+            index = open_eventlog_index_readonly(index_file)
+        except Exception as e:
+            msg = f"Could not open eventlog index at '{self.get_option('index_file')}': {e}"
+            raise AnsibleError(msg) from e
+        try:
+            return query_eventlog_index(
+                index,
+                hosts=terms or None,
+                eventlog_types=self.get_option('eventlog_type'),
+                severities=severities,
+                alert_groups=self.get_option('alert_group'),
+                entry_types=self.get_option('entry_type'),
+                since_ts=get_query_timestamp(self.get_option('since'), 'since'),
+                until_ts=get_query_timestamp(self.get_option('until'), 'until'),
+                limit=self.get_option('limit'),
+                hosts_only=self.get_option('hosts_only'),
+            )
+        finally:
+            index.close()
@@ -3,22 +3,113 @@
 from __future__ import (absolute_import, division)
 __metaclass__ = type
 
+import threading
 import time
 import traceback
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 try:
     import requests
     from requests.auth import HTTPBasicAuth
     from requests.adapters import HTTPAdapter
     import urllib3
-    from urllib3.util.retry import Retry
     from urllib3.exceptions import InsecureRequestWarning
     urllib3.disable_warnings(InsecureRequestWarning)
     HAS_REQUESTS = True
 except:
     HAS_REQUESTS = False
 
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_connection import get_irmc_daemon_session
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_limits import IrmcRetryPolicy, \
+    get_irmc_limited_session, idempotent_methods
+
+# module option 'retry', see IrmcRetryPolicy in irmc_limits.py, documented in doc_fragments/irmc_retry.py
+irmc_retry_argument_spec = dict(
+    attempts=dict(required=False, type='int', default=5),
+    backoff_factor=dict(required=False, type='float', default=0.1),
+    backoff_max=dict(required=False, type='float', default=30.0),
+    jitter=dict(required=False, type='float', default=0.0),
+    statuses=dict(required=False, type='list', elements='int', default=[429, 503]),
+    methods=dict(required=False, type='list', elements='str', default=list(idempotent_methods)),
+)
+irmc_retry_policy_lock = threading.Lock()
+
+
+def new_irmc_session(pool_maxsize=10, retry_policy=None):
+    session = requests.Session()
+    # 429 and 503 are retried with longer backoff or after 'Retry-After', the last response is returned
+    retries = (retry_policy or IrmcRetryPolicy()).get_retry()
+    session.mount('http://', HTTPAdapter(max_retries=retries, pool_maxsize=pool_maxsize))
+    session.mount('https://', HTTPAdapter(max_retries=retries, pool_maxsize=pool_maxsize))
+    return session
+
+
+def get_irmc_keepalive_session(module):
+    # only set by irmc_redfish_keepalive(), works with any object providing 'params'
+    return getattr(module, '__dict__', {}).get('irmc_session')
+
+
+def get_irmc_retry_policy(module):
+    # Policy of the module option 'retry', None if not set. Its retries are returned as 'retries'
+    # by exit_json() and fail_json() of the module. Objects without these functions (IrmcHost) can share
+    # the policy of a module in 'irmc_retry_policy'.
+    policy = getattr(module, '__dict__', {}).get('irmc_retry_policy')
+    retry = getattr(module, 'params', {}).get('retry')
+    if policy is not None or not isinstance(retry, dict):
+        return policy
+    with irmc_retry_policy_lock:
+        policy = getattr(module, '__dict__', {}).get('irmc_retry_policy')
+        if policy is None:
+            policy = IrmcRetryPolicy.from_params(retry)
+            module.irmc_retry_policy = policy
+            for name in ('exit_json', 'fail_json'):
+                if hasattr(module, name):
+                    setattr(module, name, add_irmc_retries(getattr(module, name), policy))
+    return policy
+
+
+def add_irmc_retries(function, policy):
+    def call(*args, **kwargs):
+        kwargs.setdefault('retries', policy.get_result())
+        return function(*args, **kwargs)
+    return call
+
+
+def get_irmc_retry(module):
+    return (get_irmc_retry_policy(module) or IrmcRetryPolicy()).get_retry()
+
+
+def get_irmc_session(module):
+    session = get_irmc_keepalive_session(module)
+    policy = get_irmc_retry_policy(module)
+    if session is None and policy is None:
+        # pooled connections of the local connection daemon (module irmc_connection), if running,
+        # the daemon retries with the default policy
+        session = get_irmc_daemon_session(new_irmc_session)
+    if session is None:
+        session = new_irmc_session(retry_policy=policy)
+    # limits per iRMC shared by all forks, if set in the environment (see irmc_limits.py)
+    return get_irmc_limited_session(module, session)
+
+
+@contextmanager
+def irmc_redfish_keepalive(module):
+    # All irmc_redfish_*() calls for 'module' inside the context share one session,
+    # so a sequence of requests uses one TLS connection to the iRMC instead of one per request.
+    # A session set by the caller (e.g. a pooled session of the action plugins) is used as is.
+    session = get_irmc_keepalive_session(module)
+    if session is not None:
+        yield session
+        return
+    module.irmc_session = new_irmc_session(retry_policy=get_irmc_retry_policy(module))
+    try:
+        yield module.irmc_session
+    finally:
+        module.irmc_session.close()
+        module.irmc_session = None
+
 
 def irmc_redfish_get(module, uri):
     if not HAS_REQUESTS:
@@ -30,16 +121,14 @@ def irmc_redfish_get(module, uri):
     }
     url = "https://{0}/{1}".format(module.params['irmc_url'], uri)
 
-    session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_session(module)
 
     msg = "OK"
     try:
         data = session.get(url, headers=headers, verify=module.params['validate_certs'],
                            auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']))
-        data.connection.close()
+        if get_irmc_keepalive_session(module) is None:
+            data.connection.close()
 
         status = data.status_code
         if status != 200:
@@ -82,16 +171,14 @@ def irmc_redfish_patch(module, uri, body, etag):
     }
     url = "https://{0}/{1}".format(module.params['irmc_url'], uri)
 
-    session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_session(module)
 
     msg = "OK"
     try:
         data = session.patch(url, headers=headers, data=body, verify=module.params['validate_certs'],
                              auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']))
-        data.connection.close()
+        if get_irmc_keepalive_session(module) is None:
+            data.connection.close()
 
         status = data.status_code
         if status != 200:
@@ -127,16 +214,14 @@ def irmc_redfish_post(module, uri, body):
     }
     url = "https://{0}/{1}".format(module.params['irmc_url'], uri)
 
-    session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_session(module)
 
     msg = "OK"
     try:
         data = session.post(url, headers=headers, data=body, verify=module.params['validate_certs'],
                             auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']))
-        data.connection.close()
+        if get_irmc_keepalive_session(module) is None:
+            data.connection.close()
 
         status = data.status_code
         if status not in (200, 202, 204):
@@ -171,16 +256,14 @@ def irmc_redfish_put(module, uri, body):
     }
     url = "https://{0}/{1}".format(module.params['irmc_url'], uri)
 
-    session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_session(module)
 
     msg = "OK"
     try:
         data = session.put(url, headers=headers, data=body, verify=module.params['validate_certs'],
                            auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']))
-        data.connection.close()
+        if get_irmc_keepalive_session(module) is None:
+            data.connection.close()
 
         status = data.status_code
         if status not in (200, 202, 204):
@@ -207,16 +290,14 @@ def irmc_redfish_delete(module, uri):
     }
     url = "https://{0}/{1}".format(module.params['irmc_url'], uri)
 
-    session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_session(module)
 
     msg = "OK"
     try:
         data = session.delete(url, headers=headers, verify=module.params['validate_certs'],
                               auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']))
-        data.connection.close()
+        if get_irmc_keepalive_session(module) is None:
+            data.connection.close()
 
         status = data.status_code
         if status != 200:
@@ -233,6 +314,27 @@ def irmc_redfish_delete(module, uri):
     return status, data, msg
 
 
+def irmc_redfish_get_parallel(module, uris, max_workers=8):
+    return irmc_redfish_parallel(module, irmc_redfish_get, uris, max_workers)
+
+
+def irmc_redfish_delete_parallel(module, uris, max_workers=8):
+    return irmc_redfish_parallel(module, irmc_redfish_delete, uris, max_workers)
+
+
+def irmc_redfish_parallel(module, request, uris, max_workers=8):
+    # Each irmc_redfish_*() call uses its own session, so requests can run in a bounded thread pool.
+    # Results are returned in the order of 'uris' as list of (status, data, msg) tuples.
+    uris = list(uris)
+    if len(uris) == 0:
+        return []
+    workers = max(1, min(int(max_workers), len(uris)))
+    if workers == 1:
+        return [request(module, uri) for uri in uris]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda uri: request(module, uri), uris))
+
+
 def get_irmc_json(jsondata, keys):
     if isinstance(keys, list):
         jsonkey = " ".join(keys)
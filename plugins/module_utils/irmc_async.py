@@ -0,0 +1,140 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
+    HAS_REQUESTS,
+    irmc_redfish_delete,
+    irmc_redfish_get,
+    irmc_redfish_patch,
+    irmc_redfish_post,
+    irmc_redfish_put,
+    new_irmc_session,
+)
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_connection import SessionMethods
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_scci_utils import irmc_scci_post
+
+# asyncio variants of irmc_redfish_*() and irmc_scci_post() for engines requesting many iRMCs at once.
+# The requests are sent by the synchronous helpers in a thread pool, so they return the same
+# (status, data, msg) tuples with the same status codes (90, 97, 98, 99).
+# All requests to one iRMC share one pooled session. The number of requests in flight is limited
+# per iRMC ('limit_per_host') and in total ('limit'); further requests wait in the event loop.
+# With 'timeout', a request which gets no answer fails after 'timeout' seconds per attempt
+# instead of blocking a thread of the pool.
+#
+# 'module' may be any object providing 'params' with irmc_url, irmc_username, irmc_password
+# and validate_certs, e.g. the AnsibleModule or one object per iRMC of a fleet.
+
+
+class IrmcAsyncHost(object):
+    # passed to the synchronous helpers instead of 'module', 'irmc_session' is used as keepalive session
+    def __init__(self, params, session):
+        self.params = params
+        self.irmc_session = session
+
+
+class IrmcTimeoutSession(SessionMethods):
+    # the helpers do not pass a timeout, so the session sets it
+    def __init__(self, session, timeout):
+        self.session = session
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return getattr(self.session, method.lower())(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class IrmcAsyncTransport(object):
+    def __init__(self, limit=32, limit_per_host=4, timeout=None, retry_policy=None):
+        self.limit = max(1, int(limit))
+        self.limit_per_host = max(1, int(limit_per_host))
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.executor = ThreadPoolExecutor(max_workers=self.limit)
+        self.lock = threading.Lock()
+        self.hosts = {}
+        self.semaphores = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            for host in self.hosts.values():
+                if host.irmc_session is not None:
+                    host.irmc_session.close()
+            self.hosts = {}
+
+    def get_host(self, module):
+        key = (module.params['irmc_url'], module.params['irmc_username'], module.params['validate_certs'])
+        with self.lock:
+            host = self.hosts.get(key)
+            if host is None:
+                session = None
+                if HAS_REQUESTS:
+                    session = new_irmc_session(pool_maxsize=self.limit_per_host, retry_policy=self.retry_policy)
+                    if self.timeout is not None:
+                        session = IrmcTimeoutSession(session, self.timeout)
+                host = self.hosts[key] = IrmcAsyncHost(module.params, session)
+        return host
+
+    def get_semaphore(self, key, value):
+        # created on first use, so they belong to the running event loop
+        semaphore = self.semaphores.get(key)
+        if semaphore is None:
+            semaphore = self.semaphores[key] = asyncio.Semaphore(value)
+        return semaphore
+
+    async def request(self, function, module, *args):
+        host = self.get_host(module)
+        # the iRMC limit is acquired first, so requests to a busy iRMC do not block the others
+        async with self.get_semaphore(('host', host.params['irmc_url']), self.limit_per_host):
+            async with self.get_semaphore('global', self.limit):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, function, host, *args)
+
+    async def redfish_get(self, module, uri):
+        return await self.request(irmc_redfish_get, module, uri)
+
+    async def redfish_post(self, module, uri, body):
+        return await self.request(irmc_redfish_post, module, uri, body)
+
+    async def redfish_patch(self, module, uri, body, etag):
+        return await self.request(irmc_redfish_patch, module, uri, body, etag)
+
+    async def redfish_put(self, module, uri, body):
+        return await self.request(irmc_redfish_put, module, uri, body)
+
+    async def redfish_delete(self, module, uri):
+        return await self.request(irmc_redfish_delete, module, uri)
+
+    async def scci_post(self, module, body):
+        return await self.request(irmc_scci_post, module, body)
+
+
+def irmc_run_async(main, limit=32, limit_per_host=4):
+    # synchronous entry point: run coroutine function 'main(transport)' and return its result
+    async def run():
+        async with IrmcAsyncTransport(limit, limit_per_host) as transport:
+            return await main(transport)
+    return asyncio.run(run())
+
+
+def irmc_redfish_get_many(calls, limit=32, limit_per_host=4):
+    # GET each (module, uri) of 'calls', results in the same order as (status, data, msg) tuples
+    async def main(transport):
+        return await asyncio.gather(*[transport.redfish_get(module, uri) for module, uri in calls])
+    return irmc_run_async(main, limit, limit_per_host)
@@ -0,0 +1,456 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+
+try:
+    import requests
+    from requests.auth import HTTPBasicAuth
+    from requests.structures import CaseInsensitiveDict
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+# Optional local connection daemon. Every module runs in its own process and would open a new
+# TCP/TLS connection for each request. The daemon listens on a Unix socket on the controller and
+# keeps one pooled requests session per iRMC, user and certificate check, so requests of all tasks
+# reuse the same connections. Sessions not used for 'session_idle_timeout' seconds are closed.
+# module_utils/irmc.py sends its requests through the daemon if its socket exists
+# and falls back to direct requests if the daemon does not accept the connection.
+# Once a request has been sent to the daemon, the daemon may have sent it to the iRMC,
+# so only GET requests are repeated directly if the daemon does not reply.
+#
+# Protocol: one JSON object per line and connection in each direction.
+#   request:  {"method", "url", "headers", "body", "verify", "username", "password", "timeout", "cache_ttl"}
+#             or {"command": "status"|"stop"}
+#   response: {"status_code", "reason", "headers", "encoding", "content" (base64)}
+#             or {"error": "..."} if the request raised an exception
+
+IRMC_CONNECTION_SOCKET_ENV = 'IRMC_CONNECTION_SOCKET'
+IRMC_CONNECTION_SOCKET_DEFAULT = '~/.ansible/irmc_connection.sock'
+
+# seconds to wait for the reply of the daemon in addition to the timeout of the request,
+# or in total if the request has no timeout
+daemon_reply_margin = 60
+daemon_reply_timeout = 600
+
+
+def get_connection_socket_path(path=None):
+    return os.path.abspath(os.path.expanduser(
+        path or os.environ.get(IRMC_CONNECTION_SOCKET_ENV) or IRMC_CONNECTION_SOCKET_DEFAULT))
+
+
+class IrmcDaemonNotRunning(IOError):
+    # the daemon did not accept the connection, the request has not been sent
+    pass
+
+
+def send_daemon_request(path, request, timeout=None):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except (IOError, OSError) as e:
+            raise IrmcDaemonNotRunning(str(e))
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        reply = b''
+        while not reply.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    finally:
+        sock.close()
+    if not reply:
+        raise IOError('No reply from iRMC connection daemon')
+    return json.loads(reply.decode('utf-8'))
+
+
+class IrmcResponseCache(object):
+    """Thread-safe cache of GET responses keyed by irmc_url.
+
+    Any other request to an iRMC drops all cached responses of this iRMC.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, host, key, ttl):
+        with self.lock:
+            entry = self.entries.get(host, {}).get(key)
+        if entry is None or time.time() - entry[0] > ttl:
+            return None
+        return entry[1]
+
+    def put(self, host, key, value):
+        with self.lock:
+            self.entries.setdefault(host, {})[key] = (time.time(), value)
+
+    def invalidate(self, host):
+        with self.lock:
+            self.entries.pop(host, None)
+
+    def expire(self, max_age):
+        now = time.time()
+        with self.lock:
+            for host, entries in list(self.entries.items()):
+                for key, entry in list(entries.items()):
+                    if now - entry[0] > max_age:
+                        del entries[key]
+                if not entries:
+                    del self.entries[host]
+
+
+def get_cache_key(url, username, password):
+    # the password is part of the key, so a wrong password does not get a cached response
+    secret = hashlib.sha256('{0}:{1}'.format(username, password).encode('utf-8')).hexdigest()
+    return secret, url
+
+
+class SessionMethods(object):
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def get_daemon_reply_timeout(timeout):
+    if timeout is None:
+        return daemon_reply_timeout
+    if isinstance(timeout, (tuple, list)):
+        timeout = sum(value for value in timeout if value is not None)
+    return timeout + daemon_reply_margin
+
+
+class DaemonConnection(object):
+    # returned as 'connection' of the responses, closing is done by the daemon
+    def close(self):
+        pass
+
+
+class IrmcDaemonSession(SessionMethods):
+    """Replacement for requests.Session which sends the requests through the connection daemon."""
+
+    def __init__(self, path, fallback, cache_ttl=0):
+        self.path = path
+        self.fallback = fallback
+        self.cache_ttl = cache_ttl
+
+    def request(self, method, url, headers=None, data=None, verify=True, auth=None, timeout=None, **kwargs):
+        if kwargs or (auth is not None and not isinstance(auth, HTTPBasicAuth)) or \
+           (data is not None and not isinstance(data, (str, bytes))):
+            return self.fallback().request(method, url, headers=headers, data=data, verify=verify, auth=auth,
+                                           timeout=timeout, **kwargs)
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        request = {
+            'method': method,
+            'url': url,
+            'headers': dict(headers or {}),
+            'body': data,
+            'verify': verify,
+            'username': auth.username if auth is not None else None,
+            'password': auth.password if auth is not None else None,
+            'timeout': timeout,
+            'cache_ttl': self.cache_ttl,
+        }
+        try:
+            reply = send_daemon_request(self.path, request, timeout=get_daemon_reply_timeout(timeout))
+        except IrmcDaemonNotRunning:
+            # daemon is not running (any more), the request has not been sent
+            return self.fallback().request(method, url, headers=headers, data=data, verify=verify, auth=auth,
+                                           timeout=timeout)
+        except (IOError, OSError, ValueError) as e:
+            # the daemon may have sent the request to the iRMC already
+            if method != 'GET':
+                raise requests.exceptions.ConnectionError(
+                    'iRMC connection daemon did not reply to {0} {1}: {2}'.format(method, url, str(e)))
+            return self.fallback().request(method, url, headers=headers, data=data, verify=verify, auth=auth,
+                                           timeout=timeout)
+        if 'error' in reply:
+            raise requests.exceptions.RequestException(reply['error'])
+
+        response = requests.models.Response()
+        response.status_code = reply['status_code']
+        response.reason = reply['reason']
+        response.headers = CaseInsensitiveDict(reply['headers'])
+        response.encoding = reply['encoding']
+        response.url = url
+        response._content = base64.b64decode(reply['content'])
+        response.connection = DaemonConnection()
+        return response
+
+    def close(self):
+        pass
+
+
+def get_irmc_daemon_session(fallback, cache_ttl=0):
+    """Return a session using the connection daemon if its socket exists, otherwise None."""
+    if not HAS_REQUESTS:
+        return None
+    path = get_connection_socket_path()
+    if not os.path.exists(path):
+        return None
+    return IrmcDaemonSession(path, fallback, cache_ttl)
+
+
+class IrmcCachingSession(SessionMethods):
+    """Session wrapper which answers repeated GET requests within 'cache_ttl' seconds from 'cache'."""
+
+    def __init__(self, session, cache, cache_ttl=0):
+        self.session = session
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+
+    def request(self, method, url, auth=None, **kwargs):
+        host = requests.utils.urlparse(url).netloc
+        if method != 'GET':
+            self.cache.invalidate(host)
+            return self.session.request(method, url, auth=auth, **kwargs)
+
+        key = get_cache_key(url, getattr(auth, 'username', None), getattr(auth, 'password', None))
+        if self.cache_ttl > 0:
+            response = self.cache.get(host, key, self.cache_ttl)
+            if response is not None:
+                return response
+        response = self.session.request(method, url, auth=auth, **kwargs)
+        if self.cache_ttl > 0 and response.status_code == 200:
+            self.cache.put(host, key, response)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class IrmcSessionPool(object):
+    """Process-wide and thread-safe pool of sessions per iRMC, user and certificate check.
+
+    The sessions share one response cache. If the connection daemon is running,
+    the pooled sessions send their requests through it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.cache = IrmcResponseCache()
+
+    def get_session(self, params, session_factory, cache_ttl=0):
+        key = (params['irmc_url'], params['irmc_username'], params['validate_certs'])
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                base = get_irmc_daemon_session(session_factory, cache_ttl) or session_factory()
+                session = self.sessions[key] = IrmcCachingSession(base, self.cache)
+        session.cache_ttl = cache_ttl
+        if isinstance(session.session, IrmcDaemonSession):
+            session.session.cache_ttl = cache_ttl
+        return session
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+irmc_session_pool = IrmcSessionPool()
+
+
+class IrmcConnectionServer(object):
+    # seconds to wait for running requests when the daemon stops
+    drain_timeout = 300
+
+    def __init__(self, path, session_factory, session_idle_timeout=300):
+        self.path = get_connection_socket_path(path)
+        self.session_factory = session_factory
+        self.session_idle_timeout = session_idle_timeout
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.cache = IrmcResponseCache()
+        self.last_activity = time.time()
+        self.threads = set()
+        self.stats = {
+            'started': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'requests': 0,
+            'cached': 0,
+            'errors': 0,
+            'sessions_opened': 0,
+            'sessions_evicted': 0,
+        }
+        statedir = os.path.dirname(self.path)
+        if not os.path.isdir(statedir):
+            os.makedirs(statedir)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # the requests contain credentials, only the owner may connect
+        umask = os.umask(0o177)
+        try:
+            self.socket.bind(self.path)
+        finally:
+            os.umask(umask)
+        # a daemon started while this one is stopping may have replaced the socket file
+        self.inode = os.stat(self.path).st_ino
+        self.socket.listen(64)
+
+    def serve_forever(self, idle_timeout=None):
+        self.socket.settimeout(1)
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    conn = self.socket.accept()[0]
+                except socket.timeout:
+                    self.evict_sessions()
+                    if idle_timeout and time.time() - self.last_activity > idle_timeout:
+                        break
+                    continue
+                self.last_activity = time.time()
+                thread = threading.Thread(target=self.handle_connection, args=(conn,))
+                thread.daemon = True
+                with self.lock:
+                    self.threads = set(thread for thread in self.threads if thread.is_alive())
+                    self.threads.add(thread)
+                thread.start()
+        finally:
+            # new connections are refused, so the clients send their requests directly
+            self.socket.close()
+            self.drain()
+            self.close()
+
+    def drain(self):
+        # the requests in flight are finished, as the daemon process exits after serve_forever
+        deadline = time.time() + self.drain_timeout
+        with self.lock:
+            threads = list(self.threads)
+        for thread in threads:
+            thread.join(max(0, deadline - time.time()))
+
+    def shutdown(self):
+        self.stop_event.set()
+
+    def close(self):
+        self.stop_event.set()
+        self.socket.close()
+        try:
+            if os.stat(self.path).st_ino == self.inode:
+                os.unlink(self.path)
+        except OSError:
+            pass
+        with self.lock:
+            for entry in self.sessions.values():
+                entry['session'].close()
+            self.sessions = {}
+
+    def evict_sessions(self):
+        now = time.time()
+        with self.lock:
+            for key, entry in list(self.sessions.items()):
+                if entry['active'] == 0 and now - entry['last_used'] > self.session_idle_timeout:
+                    entry['session'].close()
+                    del self.sessions[key]
+                    self.stats['sessions_evicted'] += 1
+        self.cache.expire(self.session_idle_timeout)
+
+    def get_status(self):
+        now = time.time()
+        with self.lock:
+            sessions = [{
+                'irmc_url': key[0],
+                'username': key[1],
+                'validate_certs': key[2],
+                'requests': entry['requests'],
+                'idle': round(now - entry['last_used'], 1),
+            } for key, entry in self.sessions.items()]
+            return dict(self.stats, pid=os.getpid(), socket=self.path, sessions=sessions)
+
+    def handle_connection(self, conn):
+        try:
+            conn.settimeout(60)
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = conn.recv(65536)
+                if not chunk:
+                    return
+                data += chunk
+            conn.settimeout(None)
+            reply = self.handle_request(json.loads(data.decode('utf-8')))
+            conn.sendall(json.dumps(reply).encode('utf-8') + b'\n')
+        except (socket.error, OSError, ValueError):
+            pass
+        finally:
+            conn.close()
+
+    def handle_request(self, request):
+        if request.get('command') == 'status':
+            return self.get_status()
+        if request.get('command') == 'stop':
+            self.shutdown()
+            return self.get_status()
+
+        host = requests.utils.urlparse(request['url']).netloc
+        cache_ttl = request.get('cache_ttl') or 0
+        cache_key = get_cache_key(request['url'], request['username'], request['password'])
+        if request['method'] != 'GET':
+            self.cache.invalidate(host)
+        elif cache_ttl > 0:
+            reply = self.cache.get(host, cache_key, cache_ttl)
+            if reply is not None:
+                with self.lock:
+                    self.stats['cached'] += 1
+                return reply
+
+        key = (host, request['username'], request['verify'])
+        with self.lock:
+            entry = self.sessions.get(key)
+            if entry is None:
+                entry = self.sessions[key] = {'session': self.session_factory(), 'requests': 0, 'active': 0}
+                self.stats['sessions_opened'] += 1
+            entry['requests'] += 1
+            entry['active'] += 1
+            entry['last_used'] = time.time()
+            self.stats['requests'] += 1
+        auth = HTTPBasicAuth(request['username'], request['password']) if request['username'] is not None else None
+        try:
+            response = entry['session'].request(request['method'], request['url'], headers=request['headers'],
+                                                data=request['body'], verify=request['verify'], auth=auth,
+                                                timeout=request['timeout'])
+            reply = {
+                'status_code': response.status_code,
+                'reason': response.reason,
+                'headers': dict(response.headers),
+                'encoding': response.encoding,
+                'content': base64.b64encode(response.content).decode('ascii'),
+            }
+            if request['method'] == 'GET' and cache_ttl > 0 and response.status_code == 200:
+                self.cache.put(host, cache_key, reply)
+            return reply
+        except Exception as e:
+            with self.lock:
+                self.stats['errors'] += 1
+            return {'error': '{0}: {1}'.format(type(e).__name__, str(e)), 'traceback': traceback.format_exc()}
+        finally:
+            with self.lock:
+                entry['active'] -= 1
+                entry['last_used'] = time.time()
@@ -0,0 +1,119 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import asyncio
+import ipaddress
+import time
+
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import irmc_redfish_get
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_async import IrmcAsyncTransport
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_firmware import get_irmc_firmware_versions
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_limits import IrmcRetryPolicy
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_rolling_update import IrmcHost
+
+# Discovery of iRMCs in host lists and networks, used by the irmc_inventory plugin.
+# Each address is checked with a TCP connect to port 443 first, which is cheap for thousands of
+# addresses. Only open ports are requested for the Redfish service root and, if it answers, for model and
+# firmware versions (get_irmc_firmware_versions()), with a limited number of Redfish requests in flight.
+# Each Redfish request fails after 'request_timeout' seconds and is retried once, so a host which accepts
+# the connection but never answers does not stop the discovery.
+# Cached results are only checked again after 'cache_ttl' seconds, or after 'negative_cache_ttl' seconds
+# if no iRMC was found, so new or repaired iRMCs show up soon.
+
+
+def expand_targets(hosts=None, networks=None, exclude=None):
+    """Return the host names and the addresses of the networks, without duplicates and excluded addresses."""
+    excluded = [ipaddress.ip_network(net, strict=False) for net in exclude or []]
+
+    def is_excluded(name):
+        try:
+            address = ipaddress.ip_address(name)
+        except ValueError:
+            return False
+        return any(address in net for net in excluded)
+
+    targets = {}
+    for name in hosts or []:
+        targets.setdefault(str(name), None)
+    for net in networks or []:
+        net = ipaddress.ip_network(net, strict=False)
+        for address in (net.hosts() if net.num_addresses > 2 else net):
+            targets.setdefault(str(address), None)
+    return [name for name in targets if not is_excluded(name)]
+
+
+async def is_port_open(address, port=443, timeout=1.0):
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+class IrmcDiscovery(object):
+    def __init__(self, username, password, validate_certs=True, connect_timeout=1.0, scan_limit=256, limit=32,
+                 cache_ttl=3600, negative_cache_ttl=300, request_timeout=10.0):
+        self.username = username
+        self.password = password
+        self.validate_certs = validate_certs
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.scan_limit = max(1, int(scan_limit))
+        self.limit = max(1, int(limit))
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = min(negative_cache_ttl, cache_ttl)
+        self.stats = {'targets': 0, 'cached': 0, 'scanned': 0, 'probed': 0, 'found': 0}
+
+    def run(self, targets, cached=None):
+        """Return the discovery entry of each target, checking only targets without fresh entry in 'cached'."""
+        cached = cached or {}
+        now = time.time()
+        entries = dict((name, cached[name]) for name in targets
+                       if name in cached and self.is_fresh(cached[name], now))
+        todo = [name for name in targets if name not in entries]
+        self.stats['targets'] = len(targets)
+        self.stats['cached'] = len(entries)
+        self.stats['scanned'] = len(todo)
+
+        if todo:
+            entries.update(asyncio.run(self.discover(todo)))
+
+        self.stats['found'] = len([name for name in targets if entries[name].get('found')])
+        return dict((name, entries[name]) for name in targets)
+
+    def is_fresh(self, entry, now):
+        ttl = self.cache_ttl if entry.get('found') else self.negative_cache_ttl
+        return 0 <= now - entry.get('checked', 0) <= ttl
+
+    async def discover(self, targets):
+        scan = asyncio.Semaphore(self.scan_limit)
+
+        async with IrmcAsyncTransport(self.limit, limit_per_host=1, timeout=self.request_timeout,
+                                      retry_policy=IrmcRetryPolicy(attempts=1)) as transport:
+            async def discover_one(name):
+                async with scan:
+                    port_open = await is_port_open(name, 443, self.connect_timeout)
+                if not port_open:
+                    return name, {'checked': time.time(), 'found': False}
+                self.stats['probed'] += 1
+                host = IrmcHost(name, self.username, self.password, self.validate_certs)
+                status, data, msg = await transport.request(irmc_redfish_get, host, 'redfish/v1/')
+                entry = {'checked': time.time(), 'found': False, 'redfish': status == 200}
+                if status == 200:
+                    status, data, msg = await transport.request(get_irmc_firmware_versions, host)
+                    entry['found'] = status == 200
+                entry['status'] = status
+                if status == 200:
+                    entry.update(data)
+                else:
+                    entry['msg'] = msg
+                return name, entry
+
+            return dict(await asyncio.gather(*[discover_one(name) for name in targets]))
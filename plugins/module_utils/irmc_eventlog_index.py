@@ -0,0 +1,143 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from urllib.request import pathname2url
+
+# Local SQLite index of iRMC eventlog entries, written by 'irmc_eventlog' (command 'collect')
+# and read by the 'irmc_eventlog_query' lookup plugin. All forks share one database file,
+# so the database runs in WAL mode and waits for locks instead of failing.
+# Queries open the database read-only and do not create it.
+
+index_schema = '''
+CREATE TABLE IF NOT EXISTS eventlog (
+    host TEXT NOT NULL,
+    eventlog_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    created TEXT,
+    created_ts INTEGER,
+    severity TEXT,
+    alert_group TEXT,
+    entry_type TEXT,
+    event_source TEXT,
+    message TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (host, eventlog_type, id, created)
+);
+CREATE INDEX IF NOT EXISTS eventlog_host ON eventlog (host, created_ts);
+CREATE INDEX IF NOT EXISTS eventlog_severity ON eventlog (severity, created_ts);
+CREATE INDEX IF NOT EXISTS eventlog_alert_group ON eventlog (alert_group, created_ts);
+CREATE INDEX IF NOT EXISTS eventlog_created ON eventlog (created_ts);
+CREATE TABLE IF NOT EXISTS eventlog_cursor (
+    host TEXT NOT NULL,
+    eventlog_type TEXT NOT NULL,
+    id INTEGER,
+    created TEXT,
+    updated_ts INTEGER,
+    PRIMARY KEY (host, eventlog_type)
+);
+'''
+
+
+def get_index_timestamp(value):
+    if not value:
+        return None
+    try:
+        created = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return int(created.timestamp())
+
+
+def open_eventlog_index(path, timeout=30):
+    path = os.path.abspath(os.path.expanduser(path))
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    index = sqlite3.connect(path, timeout=timeout)
+    index.row_factory = sqlite3.Row
+    index.execute('PRAGMA journal_mode=WAL')
+    index.executescript(index_schema)
+    return index
+
+
+def open_eventlog_index_readonly(path, timeout=30):
+    # fails with sqlite3.OperationalError if the database does not exist
+    path = os.path.abspath(os.path.expanduser(path))
+    index = sqlite3.connect('file:{0}?mode=ro'.format(pathname2url(path)), timeout=timeout, uri=True)
+    index.row_factory = sqlite3.Row
+    return index
+
+
+def get_index_cursor(index, host, eventlog_type):
+    row = index.execute('SELECT id, created FROM eventlog_cursor WHERE host = ? AND eventlog_type = ?',
+                        (host, eventlog_type)).fetchone()
+    if row is None or row['id'] is None:
+        return None
+    return {'Id': row['id'], 'Created': row['created']}
+
+
+def add_index_entries(index, host, eventlog_type, entries, cursor):
+    rows = []
+    for entry in entries:
+        try:
+            entry_id = int(entry['Id'])
+        except (KeyError, TypeError, ValueError):
+            entry_id = 0
+        rows.append((host, eventlog_type, entry_id, entry.get('Created'), get_index_timestamp(entry.get('Created')),
+                     entry.get('Severity'), entry.get('AlertGroup'), entry.get('Type'), entry.get('EventSource'),
+                     entry.get('Message'), json.dumps(entry, sort_keys=True)))
+    with index:
+        before = index.total_changes
+        index.executemany('INSERT OR IGNORE INTO eventlog VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        added = index.total_changes - before
+        index.execute('INSERT OR REPLACE INTO eventlog_cursor VALUES (?, ?, ?, ?, ?)',
+                      (host, eventlog_type, cursor['Id'], cursor['Created'],
+                       int(datetime.now(timezone.utc).timestamp())))
+    return added
+
+
+def query_eventlog_index(index, hosts=None, eventlog_types=None, severities=None, alert_groups=None,
+                         entry_types=None, since_ts=None, until_ts=None, limit=None, hosts_only=False):
+    terms = []
+    args = []
+    for column, values in (('host', hosts), ('eventlog_type', eventlog_types), ('severity', severities),
+                           ('alert_group', alert_groups), ('entry_type', entry_types)):
+        if values:
+            values = list(values)
+            terms.append('{0} IN ({1})'.format(column, ', '.join('?' * len(values))))
+            args += values
+    if since_ts is not None:
+        terms.append('created_ts >= ?')
+        args.append(int(since_ts))
+    if until_ts is not None:
+        terms.append('created_ts < ?')
+        args.append(int(until_ts))
+    where = ' WHERE {0}'.format(' AND '.join(terms)) if terms else ''
+
+    if hosts_only:
+        sql = 'SELECT host, COUNT(*) AS count, MAX(created) AS last_created FROM eventlog{0} ' \
+              'GROUP BY host ORDER BY host'.format(where)
+    else:
+        sql = 'SELECT host, eventlog_type, record FROM eventlog{0} ' \
+              'ORDER BY created_ts DESC, host, id DESC'.format(where)
+    if limit:
+        sql += ' LIMIT ?'
+        args.append(int(limit))
+
+    rows = []
+    for row in index.execute(sql, args):
+        if hosts_only:
+            rows.append({'host': row['host'], 'count': row['count'], 'last_created': row['last_created']})
+        else:
+            record = json.loads(row['record'])
+            record['host'] = row['host']
+            record['eventlog_type'] = row['eventlog_type']
+            rows.append(record)
+    return rows
@@ -0,0 +1,284 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import re
+
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, get_irmc_retry_policy, \
+    irmc_redfish_get, irmc_redfish_get_parallel, irmc_redfish_patch, irmc_redfish_post
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_limits import IrmcRetryPolicy
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import read_state, update_state
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_upload_file import irmc_redfish_post_file
+
+# Version information of iRMC firmware and BIOS images.
+# The image formats are not documented, so the version is taken from a sidecar manifest
+# ('<image>.json' with keys 'version' and optionally 'sha256') or from the image file name,
+# e.g. 'D3279-B1x.R1.20.0.UPC' (BIOS R1.20.0) or 'D3279_09.09F_sdr03.12.bin' (iRMC 9.09F).
+# Only the naming of the images is accepted (BIOS 'R<major>.<minor>.<patch>', iRMC '<major>.<minor><letter>'),
+# and a file name with more than one such version is ambiguous, so no version is taken from it.
+# Image hashes are cached in a local state file keyed by path, size and modification time,
+# so unchanged images are not read again.
+# The steps of an update (check for running tasks, FWUpdate settings, start and polling of the task)
+# are shared by the modules irmc_fwbios_update and irmc_rolling_update.
+
+system_select = 'Model,BiosVersion,PowerState,Manufacturer,SerialNumber'
+firmware_inventory_url = 'redfish/v1/Systems/0/Oem/ts_fujitsu/FirmwareInventory'
+update_url = 'redfish/v1/Managers/iRMC/Oem/ts_fujitsu/iRMCConfiguration/FWUpdate/'
+
+image_name_patterns = {
+    'bios': re.compile(r'(?:^|[._-])(R\d+\.\d+\.\d+)(?=[._-]|$)', re.IGNORECASE),
+    'irmc': re.compile(r'(?:^|[._-])(\d{1,2}\.\d{2}[A-Z])(?=[._-]|$)'),
+}
+
+
+def get_image_hash(path, blocksize=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as image:
+        for block in iter(lambda: image.read(blocksize), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def get_image_manifest_path(path):
+    return path + '.json'
+
+
+def read_image_manifest(path):
+    with open(path, 'r') as manifest_file:
+        manifest = json.load(manifest_file)
+    if not isinstance(manifest, dict):
+        raise ValueError("Manifest '{0}' is not a JSON object".format(path))
+    return manifest
+
+
+def get_image_version_from_name(file_name, update_type):
+    versions = dict((normalize_firmware_version(match.group(1)), match.group(1))
+                    for match in image_name_patterns[update_type].finditer(os.path.basename(file_name)))
+    return list(versions.values())[0] if len(versions) == 1 else None
+
+
+def get_image_info(path, update_type, cache_file=None, manifest=None, version=None):
+    """Return path, size, sha256 and version of a local firmware image."""
+    path = os.path.realpath(os.path.expanduser(path))
+    stat = os.stat(path)
+    info = {
+        'file_name': path,
+        'size': stat.st_size,
+        'mtime': int(stat.st_mtime),
+        'sha256': None,
+        'version': None,
+        'version_source': None,
+    }
+
+    cached = read_state(cache_file, path, {}) if cache_file is not None else {}
+    if cached.get('size') == info['size'] and cached.get('mtime') == info['mtime'] and cached.get('sha256'):
+        info['sha256'] = cached['sha256']
+    else:
+        info['sha256'] = get_image_hash(path)
+
+    if manifest is None and os.path.isfile(get_image_manifest_path(path)):
+        manifest = get_image_manifest_path(path)
+    manifest_data = read_image_manifest(manifest) if manifest is not None else {}
+    if manifest_data.get('sha256') and manifest_data['sha256'].lower() != info['sha256']:
+        raise ValueError("Image '{0}' does not match sha256 of manifest '{1}'".format(path, manifest))
+
+    if version is not None:
+        info['version'], info['version_source'] = version, 'parameter'
+    elif manifest_data.get('version'):
+        info['version'], info['version_source'] = str(manifest_data['version']), 'manifest'
+    elif (name_version := get_image_version_from_name(path, update_type)) is not None:
+        info['version'], info['version_source'] = name_version, 'file_name'
+
+    if cache_file is not None and cached != {key: info[key] for key in ('size', 'mtime', 'sha256', 'version')}:
+        update_state(cache_file, path, {key: info[key] for key in ('size', 'mtime', 'sha256', 'version')})
+    return info
+
+
+def normalize_firmware_version(version):
+    # '09.09F' and '9.09F' as well as 'r1.20.0' and 'R1.20.0' name the same version
+    parts = []
+    for part in str(version).strip().upper().split('.'):
+        match = re.fullmatch(r'([A-Z]*)0*(\d+)([A-Z]*)', part)
+        parts.append(''.join(match.groups()) if match is not None else part)
+    return '.'.join(parts)
+
+
+def is_current_firmware(version, current):
+    """Check whether the running version string 'current' contains the image version.
+
+    'current' may be a plain version ('9.09F') or a version string like
+    'V5.0.0.11 R1.20.0 for D3279-B1x' as reported for the BIOS.
+    """
+    if not version or not current or 'does not exist' in str(current):
+        return False
+    version = normalize_firmware_version(version)
+    return any(normalize_firmware_version(token) == version for token in re.split(r'[\s_]+', str(current)) if token)
+
+
+def get_irmc_firmware_versions(module):
+    """Read model and BIOS and iRMC firmware versions with two parallel requests.
+
+    Returns (status, data, msg) like irmc_redfish_get(), with 'data' keyed like the
+    'system' and 'irmc' facts of the irmc_facts module.
+    """
+    (status, sysdata, msg), (fwstatus, fwdata, fwmsg) = irmc_redfish_get_parallel(
+        module, ['redfish/v1/Systems/0/?$select={0}'.format(system_select), firmware_inventory_url])
+    if status in (400, 501):
+        # iRMC does not support '$select' here
+        status, sysdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/')
+    if status < 100 or status != 200:
+        return status, sysdata, msg
+    if fwstatus < 100 or fwstatus != 200:
+        return fwstatus, fwdata, fwmsg
+
+    sysdata = sysdata.json()
+    fwdata = fwdata.json()
+    data = {
+        'system': {
+            'bios_version': get_irmc_json(sysdata, 'BiosVersion'),
+            'manufacturer': get_irmc_json(sysdata, 'Manufacturer'),
+            'model': get_irmc_json(sysdata, 'Model'),
+            'power_state': get_irmc_json(sysdata, 'PowerState'),
+            'serial_number': get_irmc_json(sysdata, 'SerialNumber'),
+        },
+        'irmc': {
+            'fw_version': get_irmc_json(fwdata, 'BMCFirmware'),
+            'fw_builddate': get_irmc_json(fwdata, 'BMCFirmwareBuildDate'),
+            'fw_running': get_irmc_json(fwdata, 'BMCFirmwareRunning'),
+            'sdrr_version': get_irmc_json(fwdata, 'SDRRVersion'),
+        },
+    }
+    return status, data, msg
+
+
+class IrmcTaskPoll(object):
+    """Connection of 'module' for polling the task of an update.
+
+    503 of the rebooting iRMC is returned at once instead of being retried, so the reboot is seen.
+    """
+
+    def __init__(self, module):
+        self.params = module.params
+        # see get_irmc_retry_policy()
+        self.irmc_retry_policy = (get_irmc_retry_policy(module) or IrmcRetryPolicy()).without_statuses()
+
+
+def get_update_task_state(status, data, power_state, update_type, reboot_done):
+    """Evaluate one poll of the task of an iRMC firmware or BIOS update.
+
+    Returns (state, reboot_done, msg, delay) with state one of 'running', 'finished',
+    'reboot_required', 'stopped' or 'failed', and 'delay' the additional seconds to wait
+    before the next poll. 'reboot_done' tracks the iRMC reboot after an iRMC update
+    and is passed again with the next poll (None before the first poll).
+    """
+    if status == 99:
+        return 'running', reboot_done, None, 55
+    if status == 404:
+        return ('finished' if reboot_done is True else 'running'), reboot_done, None, 0
+    if status == 503:
+        # just in case we miss the 'complete' message
+        return 'running', (False if reboot_done is None else True), None, 25
+    if status < 100 or status not in (200, 202, 204):
+        return 'running', reboot_done, None, 5
+
+    if 'Key' not in get_irmc_json(data, 'error'):
+        return 'stopped', reboot_done, None, 0
+    oemstate = get_irmc_json(data, ['Oem', 'ts_fujitsu', 'StatusOEM'])
+    state = get_irmc_json(data, 'TaskState')
+    # make sure the process ran through
+    if power_state == 'On' and oemstate == 'Pending':
+        msg = 'A BIOS firmware update has been started and a system reboot is required to continue the update.'
+        return 'reboot_required', False, msg, 0
+    if power_state == 'On' and oemstate == 'FlashImageDownloadedSuccessfully':
+        msg = 'A BIOS firmware update has been started. A system reboot is required to continue the update.'
+        return 'reboot_required', False, msg, 0
+    if power_state == 'On' and oemstate == 'FlashingFinishedSuccessfullyRebootRequired':
+        msg = 'A iRMC firmware update has finished. A system reboot is required to activate the update.'
+        return 'reboot_required', False, msg, 0
+    if state == 'Exception':
+        return 'failed', False, 'Update failed.', 0
+    # for BIOS we are done here, for iRMC we need to wait for iRMC shutdown and reboot
+    if update_type == 'bios' and state == 'Completed':
+        return 'finished', False, None, 0
+    return 'running', False, None, 0
+
+
+def get_update_action_url(update_source, update_type):
+    if update_source == 'tftp':
+        if update_type == 'irmc':
+            return 'redfish/v1/Managers/iRMC/Actions/FTSManager.FWTFTPUpdate'
+        return 'redfish/v1/Systems/0/Bios/Actions/Oem/FTSBios.BiosTFTPUpdate'
+    if update_type == 'irmc':
+        return 'redfish/v1/Managers/iRMC/Actions/FTSManager.FWUpdate'
+    return 'redfish/v1/Systems/0/Bios/Actions/Oem/FTSBios.BiosUpdate'
+
+
+def check_update_tasks_finished(module):
+    """Check that no task of the iRMC waits for a reboot or is still in progress.
+
+    Returns (status, data, msg) like irmc_redfish_get(), with status 30 if an update
+    waits for a system reboot and 31 if a task is still in progress.
+    """
+    status, taskdata, msg = irmc_redfish_get(module, 'redfish/v1/TaskService/Tasks')
+    if status < 100 or status not in (200, 202, 204):
+        return status, taskdata, msg
+    for task in get_irmc_json(taskdata.json(), ['Members']):
+        tstatus, sdata, tmsg = irmc_redfish_get(module, get_irmc_json(task, '@odata.id')[1:])
+        if tstatus < 100 or tstatus not in (200, 202, 204):
+            return tstatus, sdata, tmsg
+        if get_irmc_json(sdata.json(), ['Oem', 'ts_fujitsu', 'StatusOEM']) in \
+           ('Pending', 'FlashImageDownloadedSuccessfully'):
+            return 30, None, 'Firmware update has already been started, system reboot is required. ' \
+                             'Cannot continue new update.'
+        if str(get_irmc_json(sdata.json(), ['Oem', 'ts_fujitsu', 'TotalProgressPercent'])) != '100':
+            return 31, None, "Task '{0}' is still in progress. Cannot continue new update.". \
+                             format(get_irmc_json(sdata.json(), 'Name'))
+    return status, taskdata, msg
+
+
+def set_update_settings(module, params, etag=None):
+    """PATCH TFTP server, file name and image selectors of 'params' into the FWUpdate settings.
+
+    'params' has the keys of the irmc_fwbios_update options. Returns (status, data, msg)
+    like irmc_redfish_patch(), status 200 without request if there is nothing to set.
+    """
+    body = {}
+    if params['update_source'] == 'tftp':
+        body['ServerName'] = params['server_name']
+        body['iRMCFileName' if params['update_type'] == 'irmc' else 'BiosFileName'] = params['file_name']
+    if params['irmc_flash_selector'] is not None:
+        body['iRMCFlashSelector'] = params['irmc_flash_selector']
+    if params['irmc_boot_selector'] is not None:
+        body['iRMCBootSelector'] = params['irmc_boot_selector']
+    if not body:
+        return 200, None, 'OK'
+    if etag is None:
+        status, fwdata, msg = irmc_redfish_get(module, update_url)
+        if status < 100 or status != 200:
+            return status, fwdata, msg
+        etag = get_irmc_json(fwdata.json(), '@odata.etag')
+    return irmc_redfish_patch(module, update_url, json.dumps(body), etag)
+
+
+def start_update(module, params, stats=None):
+    """Upload the image of 'params' or let the iRMC load it from the TFTP server.
+
+    Returns (status, data, msg) of the request, the task of the update is in header 'Location' of 'data'.
+    'stats' receives the upload statistics, see irmc_redfish_post_file().
+    """
+    url = get_update_action_url(params['update_source'], params['update_type'])
+    if params['update_source'] == 'file':
+        return irmc_redfish_post_file(module, url, params['file_name'], block_size=params.get('upload_block_size'),
+                                      deadline=params.get('upload_timeout'), stats=stats)
+    return irmc_redfish_post(module, url, body='')
+
+
+def poll_update_task(poll, location, power_state, update_type, reboot_done):
+    """Request the task of an update with 'poll' (IrmcTaskPoll) and evaluate it with get_update_task_state()."""
+    status, sdata, msg = irmc_redfish_get(poll, location[1:])
+    data = sdata.json() if status in (200, 202, 204) else None
+    return get_update_task_state(status, data, power_state, update_type, reboot_done)
@@ -0,0 +1,245 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import itertools
+import os
+import random
+import re
+import threading
+import time
+
+try:
+    import requests
+    from urllib3.util.retry import Retry
+    HAS_REQUESTS = True
+except ImportError:
+    Retry = object
+    HAS_REQUESTS = False
+
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_connection import SessionMethods
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import acquire_token, load_state_file, \
+    locked_state_file, write_state_file
+
+# Limits per iRMC shared by all forks and plays on the controller. iRMCs accept only a few
+# concurrent HTTPS sessions, so the number of requests in flight per iRMC ('max_in_flight')
+# and the minimum time between their starts ('min_interval') can be limited.
+# A circuit breaker stops sending requests to an iRMC for 'breaker_cooldown' seconds
+# after 'breaker_threshold' consecutive requests failed with an exception or 502/503/504.
+# The state of each iRMC is kept in a locked file in 'limits_dir', see irmc_state.py.
+#
+# The limits are off unless set in the environment of the controller or the play:
+#   IRMC_MAX_IN_FLIGHT, IRMC_MIN_INTERVAL, IRMC_BREAKER_THRESHOLD, IRMC_BREAKER_COOLDOWN,
+#   IRMC_SLOT_TIMEOUT, IRMC_LIMITS_DIR
+
+busy_statuses = (429, 503)
+failed_statuses = (502, 503, 504)
+idempotent_methods = ('DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT')
+holder_ids = itertools.count()
+
+
+class IrmcRetry(Retry):
+    # 429 and 503 (iRMC busy or rebooting) are retried after their 'Retry-After' time, at most
+    # 'irmc_retry_after_max' seconds. Without 'policy', they are retried with an exponential backoff
+    # starting at 'busy_backoff' seconds and other retries use the backoff of Retry.
+    # With 'policy', all retries wait 'backoff_factor * 2 ** (retry - 1)' seconds, at most
+    # 'backoff_max', plus the jitter of the policy, and each retry is counted.
+    busy_backoff = 1.0
+    busy_backoff_max = 30.0
+    # not 'retry_after_max', which urllib3 >= 2.8 sets on each instance
+    irmc_retry_after_max = 60.0
+
+    def __init__(self, *args, **kwargs):
+        self.policy = kwargs.pop('policy', None)
+        super(IrmcRetry, self).__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        retry = super(IrmcRetry, self).new(**kwargs)
+        retry.policy = self.policy
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        # raises MaxRetryError if the request is not retried
+        retry = super(IrmcRetry, self).increment(method, url, response, error, _pool, _stacktrace)
+        if self.policy is not None:
+            self.policy.count_retry(response, error)
+        return retry
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        # Retry also retries responses with 'Retry-After' whose status is not in 'status_forcelist'
+        if self.policy is not None and status_code not in self.policy.statuses:
+            return False
+        return super(IrmcRetry, self).is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super(IrmcRetry, self).get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.irmc_retry_after_max)
+
+    def get_backoff_time(self):
+        if self.policy is not None:
+            retries = 0
+            for entry in reversed(self.history):
+                if entry.redirect_location:
+                    break
+                retries += 1
+            if retries == 0:
+                return 0
+            backoff = min(self.policy.backoff_max, self.policy.backoff_factor * 2 ** (retries - 1))
+            if self.policy.jitter > 0 and backoff > 0:
+                backoff += random.uniform(0, self.policy.jitter)
+            return backoff
+
+        busy = 0
+        for entry in reversed(self.history):
+            if entry.status not in busy_statuses:
+                break
+            busy += 1
+        if busy == 0:
+            return min(self.busy_backoff_max, super(IrmcRetry, self).get_backoff_time())
+        return min(self.busy_backoff_max, self.busy_backoff * 2 ** (busy - 1))
+
+
+class IrmcRetryPolicy(object):
+    """Retry policy of the requests to an iRMC, set with the module option 'retry'.
+
+    Requests are retried 'attempts' times after connection errors, and, if their method is in 'methods',
+    after read errors and responses with a status in 'statuses'. Methods which are not idempotent
+    (POST, PATCH) are not in 'methods' by default, as the iRMC may have executed them already.
+    """
+
+    def __init__(self, attempts=5, backoff_factor=0.1, backoff_max=30.0, jitter=0.0, statuses=busy_statuses,
+                 methods=idempotent_methods):
+        self.attempts = int(attempts)
+        self.backoff_factor = float(backoff_factor)
+        self.backoff_max = float(backoff_max)
+        self.jitter = float(jitter)
+        self.statuses = frozenset(int(status) for status in statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.lock = threading.Lock()
+        self.retries = {}
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(**dict((key, value) for key, value in params.items() if value is not None))
+
+    def without_statuses(self):
+        # same policy without retries of responses, e.g. to see a 503 of a rebooting iRMC at once;
+        # the retries are counted in this policy
+        policy = IrmcRetryPolicy(self.attempts, self.backoff_factor, self.backoff_max, self.jitter, statuses=(),
+                                 methods=self.methods)
+        policy.lock = self.lock
+        policy.retries = self.retries
+        return policy
+
+    def get_retry(self):
+        # the last response is returned if all attempts got a status in 'statuses'
+        return IrmcRetry(total=self.attempts, backoff_factor=self.backoff_factor, status_forcelist=self.statuses,
+                         allowed_methods=self.methods, raise_on_status=False, policy=self)
+
+    def count_retry(self, response=None, error=None):
+        if response is not None and response.status:
+            reason = str(response.status)
+        else:
+            reason = type(error).__name__ if error is not None else 'unknown'
+        with self.lock:
+            self.retries[reason] = self.retries.get(reason, 0) + 1
+
+    def get_result(self):
+        with self.lock:
+            return {'count': sum(self.retries.values()), 'reasons': dict(self.retries)}
+
+
+def get_irmc_limits(environ=None):
+    """Return the limits set in the environment, None if no limit is set."""
+    environ = os.environ if environ is None else environ
+    limits = {
+        'max_in_flight': int(environ.get('IRMC_MAX_IN_FLIGHT', 0)),
+        'min_interval': float(environ.get('IRMC_MIN_INTERVAL', 0)),
+        'breaker_threshold': int(environ.get('IRMC_BREAKER_THRESHOLD', 0)),
+        'breaker_cooldown': float(environ.get('IRMC_BREAKER_COOLDOWN', 60)),
+        'slot_timeout': float(environ.get('IRMC_SLOT_TIMEOUT', 300)),
+        'limits_dir': environ.get('IRMC_LIMITS_DIR', '~/.ansible/irmc_limits'),
+    }
+    if limits['max_in_flight'] <= 0 and limits['min_interval'] <= 0 and limits['breaker_threshold'] <= 0:
+        return None
+    return limits
+
+
+def get_limits_file(limits, irmc_url):
+    name = re.sub(r'[^A-Za-z0-9_.-]', '_', irmc_url)
+    return os.path.join(os.path.expanduser(limits['limits_dir']), name + '.json')
+
+
+class IrmcLimitError(requests.exceptions.ConnectionError if HAS_REQUESTS else Exception):
+    # raised instead of sending a request, reported like any request exception (status 99)
+    pass
+
+
+class IrmcLimitedSession(SessionMethods):
+    """Session wrapper which applies the limits of one iRMC to each request."""
+
+    def __init__(self, session, irmc_url, limits):
+        self.session = session
+        self.irmc_url = irmc_url
+        self.limits = limits
+        self.path = get_limits_file(limits, irmc_url)
+
+    def request(self, method, url, **kwargs):
+        breaker = self.check_breaker()
+        holder = None
+        if self.limits['max_in_flight'] > 0 or self.limits['min_interval'] > 0:
+            holder = '{0}-{1}-{2}'.format(os.getpid(), threading.current_thread().ident, next(holder_ids))
+            # a request slot of a killed process is dropped after 'slot_timeout' seconds
+            waited = acquire_token(self.path, holder, self.limits['max_in_flight'], self.limits['min_interval'],
+                                   lease=self.limits['slot_timeout'], timeout=self.limits['slot_timeout'], poll=0.05)
+            if waited is None:
+                raise IrmcLimitError("No request slot for iRMC '{0}' within {1} seconds (IRMC_MAX_IN_FLIGHT={2})".
+                                     format(self.irmc_url, self.limits['slot_timeout'], self.limits['max_in_flight']))
+
+        failed = True
+        try:
+            # the method of the session is called, so it does not matter how it implements it
+            response = getattr(self.session, method.lower())(url, **kwargs)
+            failed = response.status_code in failed_statuses
+            return response
+        finally:
+            if holder is not None or failed or breaker.get('failures'):
+                self.finish_request(holder, failed)
+
+    def check_breaker(self):
+        if self.limits['breaker_threshold'] <= 0:
+            return {}
+        with locked_state_file(self.path) as statepath:
+            breaker = load_state_file(statepath).get('breaker', {})
+        wait = breaker.get('open_until', 0) - time.time()
+        if wait > 0:
+            raise IrmcLimitError("iRMC '{0}' is not available, requests suspended for {1:.0f} seconds "
+                                 "after {2} failures".format(self.irmc_url, wait, breaker.get('failures')))
+        return breaker
+
+    def finish_request(self, holder, failed):
+        with locked_state_file(self.path) as statepath:
+            data = load_state_file(statepath)
+            if holder is not None:
+                data.get('tokens', {}).pop(holder, None)
+            if self.limits['breaker_threshold'] > 0:
+                # the first request after the cooldown closes the breaker again or opens it for another cooldown
+                breaker = {'failures': data.get('breaker', {}).get('failures', 0) + 1 if failed else 0}
+                if breaker['failures'] >= self.limits['breaker_threshold']:
+                    breaker['open_until'] = time.time() + self.limits['breaker_cooldown']
+                data['breaker'] = breaker
+            write_state_file(statepath, data)
+
+    def close(self):
+        self.session.close()
+
+
+def get_irmc_limited_session(module, session):
+    """Return 'session' wrapped with the limits set in the environment, or 'session' if no limit is set."""
+    limits = get_irmc_limits()
+    if limits is None:
+        return session
+    return IrmcLimitedSession(session, module.params['irmc_url'], limits)
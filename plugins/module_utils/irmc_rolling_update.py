@@ -0,0 +1,205 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_firmware import IrmcTaskPoll, \
+    check_update_tasks_finished, get_image_version_from_name, get_irmc_firmware_versions, is_current_firmware, \
+    poll_update_task, set_update_settings, start_update
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import load_state_file, locked_state_file, \
+    write_state_file
+
+# Rolling iRMC firmware or BIOS update of many servers from one process.
+# Servers are grouped into waves by model. Within a wave at most 'max_in_flight' updates run
+# at the same time, and all running update tasks are polled together by one loop.
+# The rollout stops starting new updates once more than 'max_failures' servers failed.
+# The state of every server is written to a state file after each change, so an interrupted
+# rollout continues with the servers which are not done yet, and polls running tasks again.
+
+done_states = ('finished', 'stopped', 'current', 'reboot_required')
+
+
+class IrmcHost(object):
+    """Connection parameters of one iRMC in the form expected by the irmc_redfish_* functions."""
+
+    def __init__(self, irmc_url, irmc_username, irmc_password, validate_certs=True, retry_policy=None):
+        self.params = dict(irmc_url=irmc_url, irmc_username=irmc_username, irmc_password=irmc_password,
+                           validate_certs=validate_certs)
+        # shared with the module, see get_irmc_retry_policy()
+        self.irmc_retry_policy = retry_policy
+
+
+def plan_waves(hosts, wave_size=0):
+    """Group the hosts into waves of at most 'wave_size' hosts of the same model (0: one wave per model)."""
+    models = {}
+    for name, host in hosts.items():
+        models.setdefault(host.get('model') or 'unknown', []).append(name)
+    waves = []
+    for model in sorted(models):
+        names = models[model]
+        size = wave_size if wave_size and wave_size > 0 else len(names)
+        waves += [names[index:index + size] for index in range(0, len(names), size)]
+    return waves
+
+
+class RollingUpdate(object):
+    def __init__(self, connections, options, state_file=None):
+        # options: update_type, update_source, server_name, file_name, file_name_mapping, irmc_flash_selector,
+        #          irmc_boot_selector, skip_if_current, ignore_power_on, wave_size, max_in_flight,
+        #          max_failures, timeout (minutes), poll_interval (seconds)
+        self.connections = connections
+        self.options = options
+        self.state_file = state_file
+        self.hosts = dict((name, {'state': 'pending'}) for name in connections)
+        self.waves = []
+        self.aborted = False
+        if state_file is not None:
+            with locked_state_file(state_file) as path:
+                saved = load_state_file(path).get('hosts', {})
+            for name in self.hosts:
+                if name in saved:
+                    self.hosts[name] = saved[name]
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(options['max_in_flight'])))
+
+    def run(self):
+        try:
+            self.probe_hosts([name for name, host in self.hosts.items()
+                              if host['state'] not in done_states and host['state'] != 'running'])
+            self.waves = plan_waves(dict((name, host) for name, host in self.hosts.items()
+                                         if host['state'] in ('pending', 'running')), self.options['wave_size'])
+            for wave in self.waves:
+                if self.aborted:
+                    break
+                self.run_wave(wave)
+        finally:
+            self.executor.shutdown(wait=True)
+        for host in self.hosts.values():
+            if host['state'] == 'pending':
+                host['state'] = 'not_started'
+        self.save()
+        return self.hosts
+
+    def get_failures(self):
+        return len([host for host in self.hosts.values() if host['state'] == 'failed'])
+
+    def save(self):
+        if self.state_file is None:
+            return
+        with locked_state_file(self.state_file) as path:
+            data = load_state_file(path)
+            data['hosts'] = json.loads(json.dumps(self.hosts))
+            data['waves'] = self.waves
+            data['aborted'] = self.aborted
+            data['updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            write_state_file(path, data)
+
+    def fail_host(self, name, msg, status):
+        self.hosts[name].update(state='failed', msg=msg, status=status,
+                                finished=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        if self.get_failures() > self.options['max_failures']:
+            self.aborted = True
+
+    def probe_hosts(self, names):
+        for name, probe in zip(names, self.executor.map(self.probe_host, names)):
+            status, info, msg = probe
+            if status != 0:
+                self.hosts[name] = {'state': 'pending'}
+                self.fail_host(name, msg, status)
+                continue
+            host = self.hosts[name] = dict(info, state='pending')
+            if host['file_name'] is None:
+                host.update(state='skipped', msg="No image for model '{0}'.".format(host['model']))
+            elif self.options['skip_if_current'] and \
+                    is_current_firmware(host['image_version'], host['current_version']):
+                host.update(state='current', msg="Already runs version '{0}'.".format(host['image_version']))
+            elif host['power_state'] == 'On' and not self.options['ignore_power_on']:
+                host.update(state='skipped', msg='Server is powered on. Cannot continue.')
+        self.save()
+
+    def probe_host(self, name):
+        status, versions, msg = get_irmc_firmware_versions(self.connections[name])
+        if status < 100 or status != 200:
+            return status, None, msg
+        model = versions['system']['model']
+        if self.options['update_type'] == 'irmc':
+            current_version = versions['irmc']['fw_version']
+        else:
+            current_version = versions['system']['bios_version']
+        # model names like in the roles, e.g. 'PRIMERGY_RX1330_M6S'
+        file_name = (self.options['file_name_mapping'] or {}).get(str(model).replace(' ', '_'),
+                                                                  self.options['file_name'])
+        image_version = get_image_version_from_name(file_name, self.options['update_type']) if file_name else None
+        return 0, {
+            'model': model,
+            'power_state': versions['system']['power_state'],
+            'current_version': current_version,
+            'file_name': file_name,
+            'image_version': image_version,
+        }, 'OK'
+
+    def run_wave(self, wave):
+        queue = [name for name in wave if self.hosts[name]['state'] == 'pending']
+        # tasks of an interrupted rollout are polled again
+        running = [name for name in wave if self.hosts[name]['state'] == 'running']
+        while queue or running:
+            free = self.options['max_in_flight'] - len(running)
+            if free > 0 and queue and not self.aborted:
+                starting, queue = queue[:free], queue[free:]
+                for name, start in zip(starting, self.executor.map(self.start_update, starting)):
+                    status, location, msg = start
+                    if status != 0:
+                        self.fail_host(name, msg, status)
+                    else:
+                        self.hosts[name].update(state='running', location=location, reboot_done=None,
+                                                started=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                                started_ts=time.time())
+                        running.append(name)
+                self.save()
+            elif self.aborted:
+                queue = []
+            if not running:
+                continue
+
+            time.sleep(self.options['poll_interval'])
+            polls = list(self.executor.map(self.poll_update, running))
+            for name, poll in zip(list(running), polls):
+                host = self.hosts[name]
+                state, host['reboot_done'], msg = poll
+                if state == 'running':
+                    if time.time() - host['started_ts'] > self.options['timeout'] * 60:
+                        running.remove(name)
+                        self.fail_host(name, 'Timeout of {0} minutes exceeded. Abort.'.
+                                       format(self.options['timeout']), 20)
+                    continue
+                running.remove(name)
+                if state == 'failed':
+                    self.fail_host(name, msg, 21)
+                else:
+                    host.update(state=state, msg=msg,
+                                finished=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            self.save()
+
+    def start_update(self, name):
+        irmc = self.connections[name]
+        params = dict(self.options, file_name=self.hosts[name]['file_name'])
+        status, data, msg = check_update_tasks_finished(irmc)
+        if status < 100 or status not in (200, 202, 204):
+            return status, None, msg
+        status, data, msg = set_update_settings(irmc, params)
+        if status < 100 or status != 200:
+            return status, None, msg
+        status, udata, msg = start_update(irmc, params)
+        if status < 100 or status not in (200, 202, 204):
+            return status, None, msg
+        return 0, udata.headers['Location'], 'OK'
+
+    def poll_update(self, name):
+        host = self.hosts[name]
+        # the additional delay is not used, all tasks are polled every 'poll_interval' seconds
+        return poll_update_task(IrmcTaskPoll(self.connections[name]), host['location'], host['power_state'],
+                                self.options['update_type'], host.get('reboot_done'))[:3]
@@ -9,11 +9,14 @@ try:
     import requests
     from requests.adapters import HTTPAdapter
     from requests.auth import HTTPBasicAuth
-    from urllib3.util.retry import Retry
     HAS_REQUESTS = True
 except:
     HAS_REQUESTS = False
 
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_keepalive_session, \
+    get_irmc_retry, get_irmc_session
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_limits import get_irmc_limited_session
+
 
 scci_body_start = '''<?xml version="1.0" encoding="UTF-8" standalone="yes" ?><CMDSEQ>\n'''
 scci_body_end = '</CMDSEQ>'
@@ -252,17 +255,15 @@ def irmc_scci_post(module, body):
         msg = f'POST request got invalid XML body: {body}'
         return 98, data, msg
 
-    session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_session(module)
 
     url = 'https://{}/config'.format(module.params['irmc_url'])
     msg = 'OK'
     try:
         data = session.post(url, data=body, verify=module.params['validate_certs'],
                             auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']))
-        data.connection.close()
+        if get_irmc_keepalive_session(module) is None:
+            data.connection.close()
 
         status = data.status_code
         if status not in (200, 202, 204):
@@ -286,9 +287,10 @@ def irmc_scci_update(module, update_url):
         return 90, "Python 'requests' module not found.", "iRMC module requires 'requests' Module"
 
     session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
+    retries = get_irmc_retry(module)
     session.mount('http://', HTTPAdapter(max_retries=retries))
     session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_limited_session(module, session)
 
     url = 'https://{}/{}'.format(module.params['irmc_url'], update_url)
     msg = 'OK'
@@ -0,0 +1,106 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import fcntl
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Local state files are shared by all forks running against the same controller,
+# so every read-modify-write cycle is serialized with an exclusive lock on '<path>.lock'.
+
+
+@contextmanager
+def locked_state_file(path):
+    path = os.path.abspath(os.path.expanduser(path))
+    statedir = os.path.dirname(path)
+    if not os.path.isdir(statedir):
+        os.makedirs(statedir)
+    with open(path + '.lock', 'a') as lockfile:
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            yield path
+        finally:
+            fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+
+def load_state_file(path):
+    try:
+        with open(path, 'r') as statefile:
+            data = json.load(statefile)
+    except (IOError, OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_state_file(path, data):
+    fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.irmc_state_')
+    try:
+        with os.fdopen(fd, 'w') as tmpfile:
+            json.dump(data, tmpfile, indent=2, sort_keys=True)
+        os.replace(tmpname, path)
+    except Exception:
+        os.unlink(tmpname)
+        raise
+
+
+def read_state(path, key, default=None):
+    with locked_state_file(path) as statepath:
+        return load_state_file(statepath).get(key, default)
+
+
+def update_state(path, key, value):
+    with locked_state_file(path) as statepath:
+        data = load_state_file(statepath)
+        if value is None:
+            data.pop(key, None)
+        else:
+            data[key] = value
+        write_state_file(statepath, data)
+    return value
+
+
+# Tokens limit how many tasks run an action at the same time and how fast they start,
+# e.g. to power on a rack of servers one after the other. Tokens of killed processes
+# are dropped after 'lease' seconds.
+def try_acquire_token(path, name, max_tokens=0, stagger=0, lease=600, poll=1):
+    # returns 0 if the token was taken, otherwise the seconds to wait before trying again
+    with locked_state_file(path) as statepath:
+        data = load_state_file(statepath)
+        now = time.time()
+        tokens = dict((key, taken) for key, taken in data.get('tokens', {}).items()
+                      if key != name and 0 <= now - taken < lease)
+        if max_tokens > 0 and len(tokens) >= max_tokens:
+            return poll
+        wait = data.get('last', 0) + stagger - now
+        if wait > 0:
+            return min(wait, stagger)
+        tokens[name] = now
+        data['tokens'] = tokens
+        data['last'] = now
+        write_state_file(statepath, data)
+    return 0
+
+
+def acquire_token(path, name, max_tokens=0, stagger=0, lease=600, timeout=600, poll=1):
+    # returns the seconds waited for the token, None if it was not taken within 'timeout' seconds
+    start = time.time()
+    while True:
+        wait = try_acquire_token(path, name, max_tokens, stagger, lease, poll)
+        if wait <= 0:
+            return time.time() - start
+        if time.time() + wait > start + timeout:
+            return None
+        time.sleep(wait)
+
+
+def release_token(path, name):
+    with locked_state_file(path) as statepath:
+        data = load_state_file(statepath)
+        if name in data.get('tokens', {}):
+            del data['tokens'][name]
+            write_state_file(statepath, data)
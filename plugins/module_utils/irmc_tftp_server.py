@@ -0,0 +1,295 @@
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import mmap
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+# Read-only TFTP server (RFC 1350 with the options blksize, tsize and timeout of RFC 2347-2349)
+# which lets many iRMCs pull the same firmware image from the controller concurrently.
+# Images are memory-mapped once and shared by all transfers. Every transfer runs in its own
+# thread with its own UDP socket. Requests beyond 'max_transfers' are not answered,
+# so the iRMC repeats them after its retransmission timeout instead of failing.
+# shutdown() stops answering requests and lets the active transfers finish, abort() ends them.
+
+TFTP_RRQ = 1
+TFTP_WRQ = 2
+TFTP_DATA = 3
+TFTP_ACK = 4
+TFTP_ERROR = 5
+TFTP_OACK = 6
+
+TFTP_ERR_UNDEFINED = 0
+TFTP_ERR_NOT_FOUND = 1
+TFTP_ERR_ACCESS = 2
+TFTP_ERR_ILLEGAL = 4
+TFTP_ERR_UNKNOWN_TID = 5
+
+TFTP_BLKSIZE_DEFAULT = 512
+TFTP_BLKSIZE_MAX = 65464
+
+
+def parse_tftp_request(packet):
+    """Return opcode, file name, mode and options of a RRQ or WRQ packet."""
+    if len(packet) < 4:
+        raise ValueError('Packet too short')
+    opcode = struct.unpack('!H', packet[:2])[0]
+    fields = packet[2:].split(b'\0')
+    if len(fields) < 3 or fields[-1] != b'':
+        raise ValueError('Malformed request')
+    fields = [field.decode('ascii', 'replace') for field in fields[:-1]]
+    options = {}
+    for index in range(2, len(fields) - 1, 2):
+        options[fields[index].lower()] = fields[index + 1]
+    return opcode, fields[0], fields[1].lower(), options
+
+
+def get_tftp_error(code, message):
+    return struct.pack('!HH', TFTP_ERROR, code) + message.encode('ascii', 'replace') + b'\0'
+
+
+class TftpServer(object):
+    def __init__(self, root, address='0.0.0.0', port=69, max_transfers=8, timeout=5, retries=5,
+                 on_stats=None):
+        self.root = os.path.realpath(root)
+        self.address = address
+        self.port = port
+        self.max_transfers = max(1, int(max_transfers))
+        self.timeout = timeout
+        self.retries = retries
+        self.on_stats = on_stats
+        self.stop_event = threading.Event()
+        self.abort_event = threading.Event()
+        self.lock = threading.Lock()
+        self.images = {}
+        self.active = {}
+        self.last_activity = time.time()
+        self.stats = {
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'deferred': 0,
+            'rejected': 0,
+            'active': 0,
+            'bytes_sent': 0,
+            'clients': {},
+        }
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((address, port))
+        self.port = self.socket.getsockname()[1]
+
+    def get_image(self, filename):
+        # only files below root are served, absolute names are taken relative to root,
+        # a single image as root is served by its base name
+        if os.path.isdir(self.root):
+            path = os.path.realpath(os.path.join(self.root, filename.lstrip('/\\')))
+            if not path.startswith(self.root + os.sep):
+                return None
+        elif os.path.basename(filename.replace('\\', '/')) == os.path.basename(self.root):
+            path = self.root
+        else:
+            return None
+        with self.lock:
+            if path not in self.images:
+                if not os.path.isfile(path):
+                    return None
+                with open(path, 'rb') as image:
+                    size = os.fstat(image.fileno()).st_size
+                    self.images[path] = mmap.mmap(image.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+            return self.images[path]
+
+    def serve_forever(self, idle_timeout=None):
+        try:
+            while not self.stop_event.is_set():
+                readable = select.select([self.socket], [], [], 1)[0]
+                if readable:
+                    try:
+                        packet, client = self.socket.recvfrom(65536)
+                    except (socket.error, OSError):
+                        continue
+                    self.handle_packet(packet, client)
+                elif idle_timeout and self.stats['active'] == 0 and \
+                        time.time() - self.last_activity > idle_timeout:
+                    break
+        finally:
+            self.close()
+
+    def shutdown(self):
+        self.stop_event.set()
+
+    def abort(self):
+        self.abort_event.set()
+
+    def close(self):
+        self.stop_event.set()
+        self.socket.close()
+        # a transfer ends by itself once its iRMC stops acknowledging for 'retries' timeouts
+        while self.active and not self.abort_event.wait(0.2):
+            pass
+        for thread in list(self.active.values()):
+            thread.join(self.timeout * (self.retries + 1))
+        for image in self.images.values():
+            if isinstance(image, mmap.mmap):
+                image.close()
+        self.images = {}
+        self.report_stats()
+
+    def handle_packet(self, packet, client):
+        # an error with one request must not stop the server and the transfers of the other iRMCs
+        try:
+            self.handle_request(packet, client)
+        except Exception as e:
+            self.count(client, 'rejected')
+            try:
+                self.socket.sendto(get_tftp_error(TFTP_ERR_UNDEFINED, 'Server error: {0}'.format(e)), client)
+            except (socket.error, OSError):
+                pass
+
+    def handle_request(self, packet, client):
+        self.last_activity = time.time()
+        try:
+            opcode, filename, mode, options = parse_tftp_request(packet)
+        except ValueError:
+            self.socket.sendto(get_tftp_error(TFTP_ERR_ILLEGAL, 'Illegal TFTP operation'), client)
+            return
+        if opcode == TFTP_WRQ:
+            self.count(client, 'rejected')
+            self.socket.sendto(get_tftp_error(TFTP_ERR_ACCESS, 'Server is read-only'), client)
+            return
+        if opcode != TFTP_RRQ:
+            self.socket.sendto(get_tftp_error(TFTP_ERR_ILLEGAL, 'Illegal TFTP operation'), client)
+            return
+
+        with self.lock:
+            if client in self.active:
+                # retransmitted request of a running transfer
+                return
+            if len(self.active) >= self.max_transfers:
+                self.stats['deferred'] += 1
+                return
+        image = self.get_image(filename)
+        if image is None:
+            self.count(client, 'rejected')
+            self.socket.sendto(get_tftp_error(TFTP_ERR_NOT_FOUND, 'File not found'), client)
+            return
+
+        thread = threading.Thread(target=self.run_transfer, args=(image, filename, options, client))
+        thread.daemon = True
+        with self.lock:
+            self.active[client] = thread
+            self.stats['active'] = len(self.active)
+        try:
+            thread.start()
+        except RuntimeError:
+            with self.lock:
+                self.active.pop(client, None)
+                self.stats['active'] = len(self.active)
+            raise
+        self.count(client, 'started')
+
+    def count(self, client, key, value=1):
+        with self.lock:
+            self.stats[key] += value
+            client_stats = self.stats['clients'].setdefault(client[0], {
+                'started': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'bytes_sent': 0, 'seconds': 0})
+            if key in client_stats:
+                client_stats[key] += value
+
+    def report_stats(self):
+        if self.on_stats is not None:
+            with self.lock:
+                clients = dict((key, dict(value)) for key, value in self.stats['clients'].items())
+                stats = dict(self.stats, clients=clients)
+            self.on_stats(stats)
+
+    def run_transfer(self, image, filename, options, client):
+        start = time.time()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.address, 0))
+        success = False
+        sent = 0
+        try:
+            success, sent = self.send_image(sock, image, options, client)
+        except (socket.error, OSError):
+            success = False
+        finally:
+            sock.close()
+            self.count(client, 'bytes_sent', sent)
+            self.count(client, 'completed' if success else 'failed')
+            with self.lock:
+                self.stats['clients'][client[0]]['seconds'] += round(time.time() - start, 3)
+                self.active.pop(client, None)
+                self.stats['active'] = len(self.active)
+                self.last_activity = time.time()
+            self.report_stats()
+
+    def send_image(self, sock, image, options, client):
+        blksize = TFTP_BLKSIZE_DEFAULT
+        timeout = self.timeout
+        accepted = {}
+        if 'blksize' in options:
+            try:
+                blksize = min(max(int(options['blksize']), 8), TFTP_BLKSIZE_MAX)
+                accepted['blksize'] = str(blksize)
+            except ValueError:
+                pass
+        if 'timeout' in options:
+            try:
+                timeout = min(max(int(options['timeout']), 1), 255)
+                accepted['timeout'] = str(timeout)
+            except ValueError:
+                pass
+        if 'tsize' in options:
+            accepted['tsize'] = str(len(image))
+
+        if accepted:
+            oack = struct.pack('!H', TFTP_OACK) + b''.join(key.encode('ascii') + b'\0' + value.encode('ascii') + b'\0'
+                                                           for key, value in accepted.items())
+            if not self.send_packet(sock, oack, 0, client, timeout):
+                return False, 0
+
+        sent = 0
+        block = 1
+        offset = 0
+        while True:
+            data = image[offset:offset + blksize]
+            packet = struct.pack('!HH', TFTP_DATA, block & 0xFFFF) + data
+            if not self.send_packet(sock, packet, block & 0xFFFF, client, timeout):
+                return False, sent
+            sent += len(data)
+            offset += len(data)
+            if len(data) < blksize:
+                return True, sent
+            block += 1
+
+    def send_packet(self, sock, packet, block, client, timeout):
+        """Send a packet and wait for the ACK of 'block', repeating the packet on timeout."""
+        for attempt in range(self.retries + 1):
+            if self.abort_event.is_set():
+                return False
+            sock.sendto(packet, client)
+            deadline = time.time() + timeout
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+                    break
+                reply, address = sock.recvfrom(65536)
+                if address != client:
+                    sock.sendto(get_tftp_error(TFTP_ERR_UNKNOWN_TID, 'Unknown transfer ID'), address)
+                    continue
+                if len(reply) < 4:
+                    continue
+                opcode, number = struct.unpack('!HH', reply[:4])
+                if opcode == TFTP_ERROR:
+                    return False
+                if opcode == TFTP_ACK and number == block:
+                    return True
+                # duplicate ACKs of older blocks are ignored and do not trigger a retransmission
+        return False
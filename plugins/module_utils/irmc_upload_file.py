@@ -6,6 +6,7 @@ __metaclass__ = type
 from builtins import str
 
 import ntpath
+import time
 import traceback
 
 try:
@@ -13,20 +14,68 @@ try:
     from requests.auth import HTTPBasicAuth
     from requests.adapters import HTTPAdapter
     import urllib3
-    from urllib3.util.retry import Retry
     from urllib3.exceptions import InsecureRequestWarning
     urllib3.disable_warnings(InsecureRequestWarning)
     HAS_REQUESTS = True
 except:
     HAS_REQUESTS = False
 try:
-    from requests_toolbelt import MultipartEncoder
+    from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
     HAS_REQUESTS_TOOLBELT = True
 except:
     HAS_REQUESTS_TOOLBELT = False
 
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_retry
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_limits import get_irmc_limited_session
 
-def irmc_redfish_post_file(module, uri, filename):
+
+class UploadDeadlineExceeded(Exception):
+    pass
+
+
+class UploadMonitor(object):
+    """File-like wrapper of a multipart upload which reads fixed-size blocks,
+    records the upload progress and stops the upload once the deadline is exceeded.
+
+    The progress counts the bytes read from the encoder by the HTTP connection for sending,
+    not the bytes received by the iRMC."""
+
+    def __init__(self, encoder, block_size=None, deadline=None):
+        self.monitor = MultipartEncoderMonitor(encoder, self.progress)
+        self.len = self.monitor.len
+        self.content_type = self.monitor.content_type
+        self.block_size = block_size
+        self.deadline = deadline
+        self.start_time = time.time()
+        self.read_time = None
+        self.bytes_read = 0
+
+    def progress(self, monitor):
+        self.bytes_read = monitor.bytes_read
+        if self.bytes_read >= self.len and self.read_time is None:
+            self.read_time = time.time()
+        if self.deadline and time.time() - self.start_time > self.deadline:
+            raise UploadDeadlineExceeded('Upload deadline of {0} seconds exceeded after {1} of {2} bytes.'.
+                                         format(self.deadline, self.bytes_read, self.len))
+
+    def read(self, size=-1):
+        return self.monitor.read(self.block_size or size)
+
+    def get_stats(self):
+        now = time.time()
+        upload_time = (self.read_time or now) - self.start_time
+        return {
+            'bytes_total': self.len,
+            'bytes_read': self.bytes_read,
+            'block_size': self.block_size,
+            'upload_time': round(upload_time, 3),
+            'response_time': round(now - self.read_time, 3) if self.read_time is not None else None,
+            'bytes_per_second': int(self.bytes_read / upload_time) if upload_time > 0 else None,
+        }
+
+
+def irmc_redfish_post_file(module, uri, filename, block_size=None, deadline=None, stats=None):
+    # 'stats' is an optional dict which receives the upload statistics of UploadMonitor.get_stats()
     if not HAS_REQUESTS:
         return 90, "Python 'requests' module not found.", "iRMC module requires 'requests' module"
     if not HAS_REQUESTS_TOOLBELT:
@@ -41,9 +90,9 @@ def irmc_redfish_post_file(module, uri, filename):
         return status, fdata, msg
 
     filebasename = ntpath.basename(filename)
-    multipart_data = MultipartEncoder(
+    multipart_data = UploadMonitor(MultipartEncoder(
         fields={'data': (filebasename, filedata, 'application/octet-stream', {'Content-Disposition': 'form-data'})}
-    )
+    ), block_size, deadline)
     headers = {
         "Accept": "application/json",
         "Content-Type": multipart_data.content_type
@@ -51,14 +100,16 @@ def irmc_redfish_post_file(module, uri, filename):
     url = "https://{0}/{1}".format(module.params['irmc_url'], uri)
 
     session = requests.Session()
-    retries = Retry(total=5, backoff_factor=0.1)
+    retries = get_irmc_retry(module)
     session.mount('http://', HTTPAdapter(max_retries=retries))
     session.mount('https://', HTTPAdapter(max_retries=retries))
+    session = get_irmc_limited_session(module, session)
 
     msg = "OK"
     try:
         data = session.post(url, headers=headers, data=multipart_data, verify=module.params['validate_certs'],
-                            auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']))
+                            auth=HTTPBasicAuth(module.params['irmc_username'], module.params['irmc_password']),
+                            timeout=deadline or None)
         data.connection.close()
 
         status = data.status_code
@@ -68,9 +119,15 @@ def irmc_redfish_post_file(module, uri, filename):
             except Exception:
                 msg = "POST request was not successful ({0}).".format(url)
 
+    except UploadDeadlineExceeded as e:
+        status = 88
+        data = traceback.format_exc()
+        msg = "POST request was stopped ({0}): {1}".format(url, str(e))
     except Exception as e:
         status = 99
         data = traceback.format_exc()
         msg = "POST request encountered exception ({0}): {1}".format(url, str(e))
 
+    if stats is not None:
+        stats.update(multipart_data.get_stats())
     return status, data, msg
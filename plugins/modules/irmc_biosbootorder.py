@@ -26,6 +26,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -56,12 +59,29 @@ options:
         choices:     ['DeviceName', 'StructuredBootString']
     boot_device:
         description: String to match with specified key for existing boot devices.
-                     Needs to be provided for 'set' command.
+                     Needs to be provided for 'set' command if 'boot_order' is not set.
+        required:    false
+    boot_order:
+        description: List of strings to match with specified key for existing boot devices.
+                     The matching devices are moved to the front in this order, all other devices follow
+                     in their current order. Used instead of 'boot_device' for 'set' command.
         required:    false
+        type:        list
+        elements:    str
     force_new:
         description: Force generation of new BiosBootOrder configuration in iRMC before getting or setting boot order.
         default:     false
         required:    false
+    max_age:
+        description: With 'force_new', the BiosBootOrder configuration is only generated again if it is older than
+                     'max_age' seconds or the boot order reported by the server has changed since it was generated.
+                     '0' means the configuration is always generated again. Requires 'cache_file'.
+        required:    false
+        default:     0
+    cache_file:
+        description: Local file which keeps per iRMC the time the BiosBootOrder configuration was generated and a hash
+                     of the boot devices at that time. The entry is removed after the boot order was changed.
+        required:    false
     next_boot_device:
         description: Set next boot to specified device.
         required:    false
@@ -86,6 +106,21 @@ EXAMPLES = '''
       ansible.builtin.debug:
         var: result.boot_order
 
+- name: Get Bios Boot Order, generate BiosBootOrder configuration only if older than a day or boot devices changed
+  fujitsu.primergy.irmc_biosbootorder:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "get"
+    force_new: true
+    max_age: 86400
+    cache_file: "{{ playbook_dir }}/bootorder_cache.json"
+  register: result
+  delegate_to: localhost
+  tags:
+    - get_cached
+
 - name: Reset Bios Boot Order to default
   fujitsu.primergy.irmc_biosbootorder:
     irmc_url: "{{ inventory_hostname }}"
@@ -112,6 +147,23 @@ EXAMPLES = '''
   delegate_to: localhost
   tags:
     - set
+
+- name: Set complete Bios Boot Order
+  fujitsu.primergy.irmc_biosbootorder:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "set"
+    boot_order:
+      - "NIC.LOM.1.1.PXE"
+      - "RAID.Slot.1.Legacy"
+      - "USB.Front.1"
+    boot_key: "StructuredBootString"
+    ignore_power_on: "{{ ignore_power_on | default(false) }}"
+  delegate_to: localhost
+  tags:
+    - set_order
 '''
 
 RETURN = '''
@@ -133,6 +185,12 @@ details_for_get:
             returned: always
             type: string
             sample: RAID.Slot.1.Legacy
+boot_profile:
+    description: Whether the BiosBootOrder configuration was generated again and why.
+                 The reason is one of 'forced', 'stale', 'devices_changed', 'missing', 'fresh' or 'backup_active'.
+    returned: if 'force_new' is set
+    type: dict
+    sample: { "age": 610, "reason": "fresh", "regenerated": false }
 otherwise:
     description:
         For other commands, the default return value of Ansible is returned.
@@ -140,7 +198,9 @@ otherwise:
 
 
 import copy
+import hashlib
 import json
+import time
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
@@ -148,6 +208,7 @@ from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
     irmc_redfish_delete,
     irmc_redfish_get,
     irmc_redfish_post,
+    irmc_retry_argument_spec,
     waitForSessionToFinish,
 )
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_scci_utils import (
@@ -157,6 +218,7 @@ from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_scci_utils i
     scci_body_end,
     scci_body_start,
 )
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import read_state, update_state
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_utils import compare_irmc_profile
 
 # Global
@@ -180,14 +242,25 @@ def irmc_biosbootorder(module):
 
     if module.params['command'] == 'default':
         set_default_bootorder(module)
+        invalidate_boot_profile(module)
         result['changed'] = True
         module.exit_json(**result)
 
+    reason, boot_devices = None, None
     if module.params['force_new'] is True:
-        force_new_boot_profile(module)
+        reason, boot_devices = check_boot_profile(module)
+        force_new_boot_profile(module, reason, boot_devices)
 
     # Get Boot Profile Data
     boot_profile_data = get_boot_profile_data(module)
+    if boot_profile_data is None and reason == 'fresh':
+        # profile has been deleted on the iRMC in the meantime
+        force_new_boot_profile(module, 'missing', boot_devices)
+        boot_profile_data = get_boot_profile_data(module)
+    if boot_profile_data is None:
+        result['msg'] = "Boot Profile does not yet exist. Create manually or restart with 'force_new' set to 'True'."
+        result['status'] = 404
+        module.fail_json(**result)
     devices = get_irmc_json(boot_profile_data, ['Server', 'SystemConfig', 'BiosConfig', 'BiosBootOrder', 'Devices'])
 
     if module.params['command'] == 'get':
@@ -229,6 +302,7 @@ def irmc_biosbootorder(module):
     elif status not in (200, 202, 204):
         module.fail_json(msg=msg, log=data, status=status)
 
+    invalidate_boot_profile(module)
     result['changed'] = True
     module.exit_json(**result)
 
@@ -237,10 +311,8 @@ def get_boot_profile_data(module):
     status, sysdata, msg = irmc_redfish_get(module, 'rest/v1/Oem/eLCM/ProfileManagement/BiosBootOrder')
     if status < 100:
         module.fail_json(msg=msg, status=status, exception=sysdata)
-    elif status == 404:     # Boot Profile does not yet exist, create
-        result['msg'] = "Boot Profile does not yet exist. Create manually or restart with 'force_new' set to 'True'."
-        result['status'] = status
-        module.fail_json(**result)
+    elif status == 404:     # Boot Profile does not yet exist
+        return None
     elif status != 200:
         module.fail_json(msg=msg, status=status)
 
@@ -248,10 +320,18 @@ def get_boot_profile_data(module):
 
 
 def preliminary_parameter_check(module):
-    if module.params['command'] == 'set' and module.params['boot_device'] is None:
-        result['msg'] = "Command 'set' requires 'boot_device' parameter to be set!"
+    if module.params['command'] == 'set' and module.params['boot_device'] is None and not module.params['boot_order']:
+        result['msg'] = "Command 'set' requires 'boot_device' or 'boot_order' parameter to be set!"
         result['status'] = 10
         module.fail_json(**result)
+    if module.params['boot_device'] is not None and module.params['boot_order']:
+        result['msg'] = "Parameters 'boot_device' and 'boot_order' cannot be used together!"
+        result['status'] = 11
+        module.fail_json(**result)
+    if module.params['max_age'] > 0 and module.params['cache_file'] is None:
+        result['msg'] = "Parameter 'max_age' requires 'cache_file' to be set!"
+        result['status'] = 12
+        module.fail_json(**result)
 
     if module.params['command'] in ('set', 'default') and module.params['ignore_power_on'] is False:
         # Get server power state
@@ -267,43 +347,49 @@ def preliminary_parameter_check(module):
             module.exit_json(**result)
 
 
+def get_requested_boot_order(module):
+    if module.params['boot_order']:
+        return module.params['boot_order']
+    return [module.params['boot_device']]
+
+
 def setup_new_boot_profile(module, profile):
-    index = 0
-    boot_devices = ''
+    boot_key = module.params['boot_key']
+    boot_order = get_requested_boot_order(module)
     new_profile = copy.deepcopy(profile)
     devices = get_irmc_json(new_profile, ['Server', 'SystemConfig', 'BiosConfig', 'BiosBootOrder', 'Devices'])
 
     new_bootorder = []
+    boot_devices = []
     for msg, devicelist in devices.items():
+        # devices by value of 'boot_key', several devices may have the same value
+        index = dict()
         for item in devicelist:
-            for ikey, value in item.items():
-                if ikey == module.params['boot_key'] and value == module.params['boot_device']:
-                    index += 1
-                    item['@DeviceIdx'] = index
-                    if boot_devices != '':
-                        boot_devices += ', '
-                    boot_devices += item[module.params['boot_key']]
-                    new_bootorder.append(item)
-        for item in devicelist:
-            for ikey, value in item.items():
-                if ikey == module.params['boot_key'] and value != module.params['boot_device']:
-                    index += 1
-                    item['@DeviceIdx'] = index
-                    if boot_devices != '':
-                        boot_devices += ', '
-                    boot_devices += str(item[module.params['boot_key']])
-                    new_bootorder.append(item)
-
-    if module.params['boot_device'] not in boot_devices:
-        msg = "'boot_device' '{}' cannot be found in existing boot devices: '{}'". \
-              format(module.params['boot_device'], boot_devices)
-        module.fail_json(msg=msg, status=20)
-
-    if module.params['next_boot_device'] is not None and module.params['next_boot_device'] not in boot_devices:
+            if boot_key in item:
+                index.setdefault(item[boot_key], []).append(item)
+                boot_devices.append(str(item[boot_key]))
+        requested = []
+        for boot_device in boot_order:
+            if boot_device in index:
+                requested += index.pop(boot_device)
+        remaining = [item for item in devicelist if boot_key in item and item[boot_key] in index]
+        new_bootorder += requested + remaining
+
+    for boot_device in boot_order:
+        if boot_device not in boot_devices:
+            msg = "'boot_device' '{}' cannot be found in existing boot devices: '{}'". \
+                  format(boot_device, ', '.join(boot_devices))
+            module.fail_json(msg=msg, status=20)
+
+    if module.params['next_boot_device'] is not None and \
+       module.params['next_boot_device'] not in ', '.join(boot_devices):
         msg = "'next_boot_device' '{}' cannot be found in existing boot devices: '{}'". \
-              format(module.params['next_boot_device'], boot_devices)
+              format(module.params['next_boot_device'], ', '.join(boot_devices))
         module.fail_json(msg=msg, status=21)
 
+    for index, item in enumerate(new_bootorder):
+        item['@DeviceIdx'] = index + 1
+
     # add new boot order to profile
     del new_profile['Server']['SystemConfig']['BiosConfig']['BiosBootOrder']['Devices']['Device']
     new_profile['Server']['SystemConfig']['BiosConfig']['BiosBootOrder']['Devices']['Device'] = new_bootorder
@@ -314,7 +400,46 @@ def setup_new_boot_profile(module, profile):
     return new_profile
 
 
-def force_new_boot_profile(module):
+def get_boot_devices_hash(module):
+    # the boot options of the server in their order, so a boot order changed outside the module is seen
+    status, sysdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/')
+    if status < 100:
+        module.fail_json(msg=msg, status=status, exception=sysdata)
+    elif status != 200:
+        module.fail_json(msg=msg, status=status)
+    boot_order = get_irmc_json(sysdata.json(), ['Boot', 'BootOrder'])
+    if not isinstance(boot_order, list):
+        return None
+    return hashlib.sha256(json.dumps([str(device) for device in boot_order]).encode()).hexdigest()
+
+
+def check_boot_profile(module):
+    if module.params['cache_file'] is None or module.params['max_age'] <= 0:
+        # always generated again, the boot order is not needed
+        return 'forced', None
+    boot_devices = get_boot_devices_hash(module)
+    entry = read_state(module.params['cache_file'], module.params['irmc_url']) or {}
+    age = time.time() - entry.get('generated', 0)
+    if not 0 <= age <= module.params['max_age']:
+        return 'stale', boot_devices
+    if boot_devices is not None and entry.get('boot_devices') != boot_devices:
+        return 'devices_changed', boot_devices
+    result['boot_profile'] = {'regenerated': False, 'reason': 'fresh', 'age': int(age)}
+    return 'fresh', boot_devices
+
+
+def invalidate_boot_profile(module):
+    # the BiosBootOrder configuration in iRMC does not show the new boot order
+    if module.params['cache_file'] is not None:
+        update_state(module.params['cache_file'], module.params['irmc_url'], None)
+
+
+def force_new_boot_profile(module, reason, boot_devices=None):
+    if reason == 'fresh':
+        return
+    result['boot_profile'] = {'regenerated': False, 'reason': 'backup_active', 'age': None}
+    generated = time.time()
+
     # check whether 'Automatic BiosParameter Backup' is set
     scci_map = [        # Param, SCCI Name, SCCI Code, value
         ['bios_backup_enabled', 'ConfPermanentBiosConfigStorageEnabled', 0x1CC0, None],
@@ -365,6 +490,11 @@ def force_new_boot_profile(module):
         elif status not in (200, 202, 204):
             module.fail_json(msg=msg, log=data, status=status)
 
+        result['boot_profile'] = {'regenerated': True, 'reason': reason, 'age': 0}
+        if module.params['cache_file'] is not None:
+            update_state(module.params['cache_file'], module.params['irmc_url'],
+                         {'generated': generated, 'boot_devices': boot_devices})
+
 
 def waitForIrmcSessionsInactive(module):
     # Get iRMC Profile processing state
@@ -425,13 +555,17 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'set', 'default']),
         ignore_power_on=dict(required=False, type='bool', default=False),
         boot_key=dict(required=False, type='str', default='StructuredBootString',
                       choices=['DeviceName', 'StructuredBootString']),
         boot_device=dict(required=False, type='str'),
+        boot_order=dict(required=False, type='list', elements='str'),
         force_new=dict(required=False, type='bool', default=False),
         next_boot_device=dict(required=False, type='str'),
+        max_age=dict(required=False, type='int', default=0),
+        cache_file=dict(required=False, type='path'),
     )
     module = AnsibleModule(
         argument_spec=module_args,
@@ -26,6 +26,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -205,6 +208,7 @@ details:
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_scci_utils import get_scciresultlist, irmc_scci_post, setup_commandlist, setup_datadict
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import irmc_retry_argument_spec
 
 cas_priv = {'0': 'Reserved', '1': 'Callback', '2': 'User', '3': 'Operator', '4': 'Administrator', '5': 'OEM', '15': 'NoAccess'}
 cas_priv_src = {'0': 'Local', '1': 'LDAP'}
@@ -299,6 +303,7 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'set']),
         enabled=dict(required=False, type='bool'),
         ssl_verify=dict(required=False, type='bool'),
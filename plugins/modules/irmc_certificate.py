@@ -24,6 +24,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -119,6 +122,7 @@ details:
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_scci_utils import get_scciresultlist, irmc_scci_post, setup_commandlist, setup_datadict
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import irmc_retry_argument_spec
 
 param_scci_map = [
     # Param, SCCI Name, SCCI Code, index, value dict
@@ -226,6 +230,7 @@ def main() -> None:
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'set']),
         private_key_path=dict(required=False, type='str'),
         ssl_cert_path=dict(required=False, type='str'),
@@ -0,0 +1,238 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+
+DOCUMENTATION = r'''
+---
+module: irmc_connection
+
+short_description: keep iRMC connections open across tasks with a local connection daemon
+
+description:
+    - Ansible module to start, query or stop a local daemon which keeps pooled and authenticated
+      connections to the iRMCs open across tasks.
+    - While the daemon is running, all Redfish requests of the modules of this collection on the controller
+      are sent through its Unix socket, so the tasks of a play reuse the same TCP and TLS connections
+      instead of opening new ones for every task.
+      Without the daemon, or if it does not accept the connection, the modules send their requests directly.
+      If the daemon does not reply to a request, only GET requests are repeated directly.
+    - On command 'stop', the daemon finishes the running requests before it exits.
+    - Connections not used for 'session_idle_timeout' seconds are closed.
+    - Module Version V1.3.0.
+
+requirements:
+    - The module needs to run locally, once per play (e.g. with 'run_once').
+    - Python >= 3.10
+    - Python modules 'requests', 'urllib3'
+
+version_added: "2.1.0"
+
+author:
+    - Fsas Technologies Inc.
+
+options:
+    command:
+        description: Start, query or stop the connection daemon.
+        required:    false
+        default:     status
+        choices:     ['start', 'status', 'stop']
+    socket_path:
+        description: Unix socket of the daemon.
+                     The modules use the socket from environment variable IRMC_CONNECTION_SOCKET
+                     or '~/.ansible/irmc_connection.sock', so a different path needs to be set
+                     in the environment of the play as well.
+        required:    false
+    idle_timeout:
+        description: Time in seconds after which the daemon stops itself if no request was received.
+                     '0' means the daemon runs until command 'stop'.
+        required:    false
+        default:     3600
+    session_idle_timeout:
+        description: Time in seconds after which an unused connection to an iRMC is closed.
+        required:    false
+        default:     300
+'''
+
+EXAMPLES = r'''
+# Keep the iRMC connections open for all tasks of the play
+- block:
+  - name: Start iRMC connection daemon
+    fujitsu.primergy.irmc_connection:
+      command: "start"
+    run_once: true
+    delegate_to: localhost
+  - name: Get server power state
+    fujitsu.primergy.irmc_powerstate:
+      irmc_url: "{{ inventory_hostname }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+      command: "get"
+    delegate_to: localhost
+  always:
+  - name: Stop iRMC connection daemon
+    fujitsu.primergy.irmc_connection:
+      command: "stop"
+    run_once: true
+    delegate_to: localhost
+    register: connection
+  - name: Show connection statistics
+    debug:
+      var: connection.daemon
+    run_once: true
+  tags:
+    - connection_daemon
+'''
+
+RETURN = r'''
+daemon:
+    description:
+        State and statistics of the connection daemon. 'sessions' lists the open connections,
+        'idle' is the time in seconds since their last request.
+        'cached' counts requests of the action plugins answered from the response cache.
+    returned: always
+    type: dict
+    sample:
+        {
+            "cached": 5,
+            "errors": 0,
+            "pid": 12345,
+            "requests": 42,
+            "running": true,
+            "sessions": [
+                {"idle": 3.2, "irmc_url": "192.0.2.101", "requests": 21, "username": "admin", "validate_certs": false}
+            ],
+            "sessions_evicted": 1,
+            "sessions_opened": 3,
+            "socket": "/home/user/.ansible/irmc_connection.sock",
+            "started": "2024-12-10 10:15:12"
+        }
+'''
+
+
+import os
+import signal
+import socket
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import new_irmc_session
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_connection import IrmcConnectionServer, \
+    HAS_REQUESTS, get_connection_socket_path, send_daemon_request
+
+# Global
+result = dict()
+
+
+def irmc_connection(module):
+    # initialize result
+    result['changed'] = False
+    result['status'] = 0
+
+    if module.check_mode:
+        result['msg'] = 'module was not run'
+        module.exit_json(**result)
+
+    if not HAS_REQUESTS:
+        result['msg'] = "iRMC connection daemon requires 'requests' Module"
+        result['status'] = 10
+        module.fail_json(**result)
+
+    path = get_connection_socket_path(module.params['socket_path'])
+    daemon = get_daemon_status(path)
+
+    if module.params['command'] == 'start' and not daemon['running']:
+        daemon = start_connection_daemon(module, path)
+        result['changed'] = True
+    elif module.params['command'] == 'stop' and daemon['running']:
+        daemon = stop_connection_daemon(module, path)
+        result['changed'] = True
+
+    result['daemon'] = daemon
+    module.exit_json(**result)
+
+
+def get_daemon_status(path, command='status'):
+    try:
+        daemon = send_daemon_request(path, {'command': command}, timeout=10)
+    except (socket.error, OSError, ValueError):
+        return {'running': False, 'socket': path}
+    daemon['running'] = command != 'stop'
+    return daemon
+
+
+def start_connection_daemon(module, path):
+    # bind in the module process, so a path or permission problem is reported as failure
+    try:
+        server = IrmcConnectionServer(path, new_irmc_session,
+                                      session_idle_timeout=module.params['session_idle_timeout'])
+    except (socket.error, OSError) as e:
+        result['msg'] = "Could not start iRMC connection daemon on '{0}': {1}".format(path, str(e))
+        result['status'] = 11
+        module.fail_json(**result)
+
+    start_daemon(server, module.params['idle_timeout'])
+    server.socket.close()
+    daemon = get_daemon_status(path)
+    if not daemon['running']:
+        result['msg'] = "iRMC connection daemon on '{0}' does not answer.".format(path)
+        result['status'] = 12
+        module.fail_json(**result)
+    return daemon
+
+
+def start_daemon(server, idle_timeout):
+    # double fork, so the daemon survives the module process and does not block Ansible
+    pid = os.fork()
+    if pid > 0:
+        os.waitpid(pid, 0)
+        return
+
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    os.chdir('/')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.shutdown())
+    try:
+        server.serve_forever(idle_timeout=idle_timeout)
+    finally:
+        os._exit(0)
+
+
+def stop_connection_daemon(module, path):
+    daemon = get_daemon_status(path, command='stop')
+    # the daemon checks for 'stop' once per second, then refuses new connections
+    # and removes its socket after the running requests are finished
+    deadline = time.time() + IrmcConnectionServer.drain_timeout + 10
+    while os.path.exists(path):
+        if time.time() > deadline:
+            result['msg'] = "iRMC connection daemon with pid {0} did not stop.".format(daemon.get('pid'))
+            result['status'] = 13
+            module.fail_json(**result)
+        time.sleep(0.2)
+    return daemon
+
+
+def main():
+    # import pdb; pdb.set_trace()
+    module_args = dict(
+        command=dict(required=False, type='str', default='status', choices=['start', 'status', 'stop']),
+        socket_path=dict(required=False, type='path'),
+        idle_timeout=dict(required=False, type='int', default=3600),
+        session_idle_timeout=dict(required=False, type='int', default=300),
+    )
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False,
+    )
+
+    irmc_connection(module)
+
+
+if __name__ == '__main__':
+    main()
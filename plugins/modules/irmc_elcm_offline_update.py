@@ -31,6 +31,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -105,6 +108,7 @@ from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
     irmc_redfish_get,
     irmc_redfish_post,
     irmc_redfish_put,
+    irmc_retry_argument_spec,
     waitForSessionToFinish,
 )
 
@@ -176,6 +180,7 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=True, type='str', choices=['prepare', 'execute']),
         ignore_power_on=dict(required=False, type='bool', default=False),
         skip_hcl_verify=dict(required=False, type='bool', default=False),
@@ -33,6 +33,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -70,6 +73,16 @@ options:
     select:
         description: Execution selection for specified component/subcomponent.
         required:    false
+    selected_only:
+        description: Only return components whose execution is 'selected'.
+                     Only evaluated for command='get'.
+        required:    false
+        default:     false
+    max_workers:
+        description: Maximum number of component details which are read in parallel.
+                     Only evaluated for command='get'.
+        required:    false
+        default:     8
 '''
 
 EXAMPLES = r'''
@@ -95,6 +108,18 @@ EXAMPLES = r'''
     command: "get"
   delegate_to: localhost
 
+# Read selected entries of eLCM Online Update List
+- name: Read selected entries of eLCM Online Update List
+  fujitsu.primergy.irmc_elcm_online_update:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "get"
+    selected_only: true
+    max_workers: 16
+  delegate_to: localhost
+
 # De-select entry in eLCM Online Update List
 - name: De-select entry in eLCM Online Update List
   fujitsu.primergy.irmc_elcm_online_update:
@@ -152,9 +177,11 @@ from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
     get_irmc_json,
     irmc_redfish_delete,
     irmc_redfish_get,
+    irmc_redfish_get_parallel,
     irmc_redfish_patch,
     irmc_redfish_post,
     irmc_redfish_put,
+    irmc_retry_argument_spec,
     waitForSessionToFinish,
 )
 
@@ -191,6 +218,10 @@ def irmc_elcm_online_update(module):
         module.fail_json(**result)
 
     # preliminary parameter check
+    if module.params['max_workers'] < 1:
+        result['msg'] = "Parameter 'max_workers' needs to be at least 1!"
+        result['status'] = 13
+        module.fail_json(**result)
     if module.params['command'] == 'set':
         if module.params['component'] is None and module.params['subcomponent'] is None:
             result['msg'] = "Command 'set' requires 'component' and 'subcomponent' parameters to be set!"
@@ -280,24 +311,25 @@ def elcm_online_collection(module):
 
     if module.params['command'] == 'get':
         result['update_collection'] = []
-        for item in get_irmc_json(elcmdata.json(), ['Links', 'Contains']):
-            sw = {}
-#            sw['link'] = get_irmc_json(item, ["@odata.id"])
-#            sw['name'] = sw['link'].replace("rest/v1/Oem/eLCM/OnlineUpdate/updateCollection/PrimSupportPack-Win/", "")
-
-            status, swdata, msg = irmc_redfish_get(module, get_irmc_json(item, ['@odata.id']))
+        links = [get_irmc_json(item, ['@odata.id'])
+                 for item in get_irmc_json(elcmdata.json(), ['Links', 'Contains'])]
+        for status, swdata, msg in irmc_redfish_get_parallel(module, links, module.params['max_workers']):
             if status < 100:
                 module.fail_json(msg=msg, status=status, exception=swdata)
             elif status not in (200, 202, 204):
                 module.fail_json(msg=msg, status=status)
-            sw['component'] = get_irmc_json(swdata.json(), ['Update', 'Component'])
-            sw['subcomponent'] = get_irmc_json(swdata.json(), ['Update', 'SubComponent'])
-            sw['current'] = get_irmc_json(swdata.json(), ['Update', 'Current'])
-            sw['new'] = get_irmc_json(swdata.json(), ['Update', 'New'])
-            sw['severity'] = get_irmc_json(swdata.json(), ['Update', 'Severity'])
-            sw['status'] = get_irmc_json(swdata.json(), ['Update', 'Status'])
-            sw['reboot'] = get_irmc_json(swdata.json(), ['Update', 'Reboot'])
-            sw['selected'] = get_irmc_json(swdata.json(), ['Update', 'Execution'])
+            swupdate = get_irmc_json(swdata.json(), 'Update')
+            sw = {}
+            sw['component'] = get_irmc_json(swupdate, 'Component')
+            sw['subcomponent'] = get_irmc_json(swupdate, 'SubComponent')
+            sw['current'] = get_irmc_json(swupdate, 'Current')
+            sw['new'] = get_irmc_json(swupdate, 'New')
+            sw['severity'] = get_irmc_json(swupdate, 'Severity')
+            sw['status'] = get_irmc_json(swupdate, 'Status')
+            sw['reboot'] = get_irmc_json(swupdate, 'Reboot')
+            sw['selected'] = get_irmc_json(swupdate, 'Execution')
+            if module.params['selected_only'] and sw['selected'] != true_false[True]:
+                continue
             result['update_collection'].append(sw)
     else:
         result['changed'] = True
@@ -310,6 +342,7 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get',
                      choices=['get', 'set', 'check', 'execute', 'delete']),
         skip_hcl_verify=dict(required=False, type='bool', default=False),
@@ -317,6 +350,8 @@ def main():
         component=dict(required=False, type='str'),
         subcomponent=dict(required=False, type='str'),
         select=dict(required=False, type='bool'),
+        selected_only=dict(required=False, type='bool', default=False),
+        max_workers=dict(required=False, type='int', default=8),
     )
     module = AnsibleModule(
         argument_spec=module_args,
@@ -30,6 +30,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -130,6 +133,7 @@ from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
     get_irmc_json,
     irmc_redfish_get,
     irmc_redfish_put,
+    irmc_retry_argument_spec,
     waitForSessionToFinish,
 )
 
@@ -244,6 +248,7 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'set']),
         server=dict(required=False, type='str'),
         catalog=dict(required=False, type='str'),
@@ -25,6 +25,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -43,7 +46,7 @@ options:
         description: Handle iRMC eventlogs.
         required:    false
         default:     list
-        choices:     ['list', 'get', 'clear']
+        choices:     ['list', 'get', 'clear', 'collect']
     eventlog_type:
         description: Specific eventlog to handle.
         default:     SystemEventLog
@@ -52,6 +55,95 @@ options:
     id:
         description: Specific eventlog ID to get.
         required:    false
+    page_size:
+        description: Number of entries to be read per request (Redfish '$top'/'$skip').
+                     '0' reads the entries without explicit paging, with 'export_path' in pages of 100 entries.
+                     'Members@odata.nextLink' is followed in both cases.
+                     Only evaluated for command='list'.
+        required:    false
+        default:     0
+    since_id:
+        description: Only return entries with an ID greater than this ID.
+                     Only evaluated for command='list'.
+        required:    false
+    since_time:
+        description: Only return entries created after this time (ISO 8601, e.g. '2024-07-24T15:57:40+02:00').
+                     Only evaluated for command='list'.
+        required:    false
+    until_time:
+        description: Only return entries created before this time (ISO 8601).
+                     Only evaluated for command='list'.
+        required:    false
+    min_severity:
+        description: Only return entries with at least this severity.
+                     Only evaluated for command='list'.
+        required:    false
+        choices:     ['OK', 'Warning', 'Critical']
+    entry_type:
+        description: Only return entries of these entry types (e.g. 'SEL', 'Oem').
+                     Only evaluated for command='list'.
+        required:    false
+        type:        list
+        elements:    str
+    alert_group:
+        description: Only return entries of these alert groups (e.g. 'Memory', 'Fan').
+                     Only evaluated for command='list'.
+        required:    false
+        type:        list
+        elements:    str
+    event_source:
+        description: Only return entries from these event sources (e.g. 'BIOS').
+                     Only SystemEventLog entries have an event source.
+                     Only evaluated for command='list'.
+        required:    false
+        type:        list
+        elements:    str
+    filter_pushdown:
+        description: Send the severity, entry type and time filters to iRMC as Redfish '$filter'.
+                     The filters are applied locally in any case, and '$filter' is dropped if iRMC rejects it.
+                     Not used together with 'cursor_file' or command='collect'.
+        required:    false
+        default:     true
+    cursor_file:
+        description: Local file which keeps the newest entry returned per iRMC and eventlog type.
+                     If set and 'since_id' is not set, only entries newer than the stored cursor are returned,
+                     and the cursor is updated afterwards.
+                     If the eventlog has been cleared in the meantime, all entries are returned.
+                     Only evaluated for command='list'.
+        required:    false
+    export_path:
+        description: Local file the eventlog entries are written to while they are read.
+                     If set, the entries are not returned in 'eventlog', only a summary is returned in 'export'.
+                     The entries are read page by page (see 'page_size'), so the memory used does not grow
+                     with the size of the eventlog.
+                     Only evaluated for command='list'.
+        required:    false
+    export_format:
+        description: Format of 'export_path', one JSON object per line or CSV with header line.
+        required:    false
+        default:     jsonl
+        choices:     ['jsonl', 'csv']
+    export_compress:
+        description: Compress 'export_path' with gzip.
+        required:    false
+        default:     false
+    index_file:
+        description: Local SQLite database new eventlog entries are added to.
+                     The database keeps a cursor per iRMC and eventlog type, so only new entries are read.
+                     Use the 'fujitsu.primergy.irmc_eventlog_query' lookup plugin to query the database.
+                     Required for command='collect'.
+        required:    false
+    watch_duration:
+        description: Keep collecting new entries for this number of seconds.
+                     '0' collects once.
+                     Only evaluated for command='collect'.
+        required:    false
+        default:     0
+    watch_interval:
+        description: Seconds between two collections while watching.
+                     Only evaluated for command='collect'.
+        required:    false
+        default:     60
 '''
 
 EXAMPLES = r'''
@@ -90,6 +182,82 @@ EXAMPLES = r'''
   tags:
     - list_systemeventlog
 
+# List new iRMC SystemEventLog entries since the last run
+- block:
+  - name: List new iRMC SystemEventLog entries
+    fujitsu.primergy.irmc_eventlog:
+      irmc_url: "{{ inventory_hostname }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+      command: "list"
+      eventlog_type: "SystemEventLog"
+      page_size: 100
+      cursor_file: "{{ playbook_dir }}/eventlog_cursor.json"
+    delegate_to: localhost
+    register: list_new_systemeventlog
+  - name: Show new SystemEventLog entries
+    debug:
+      var: list_new_systemeventlog.eventlog
+  tags:
+    - list_new_systemeventlog
+
+# List critical iRMC SystemEventLog memory entries
+- name: List critical iRMC SystemEventLog memory entries
+  fujitsu.primergy.irmc_eventlog:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "list"
+    eventlog_type: "SystemEventLog"
+    min_severity: "Critical"
+    alert_group:
+      - "Memory"
+    since_time: "2024-07-01T00:00:00+00:00"
+  delegate_to: localhost
+  register: list_critical_memory
+  tags:
+    - list_critical_memory
+
+# Export iRMC SystemEventLog to a compressed local file
+- name: Export iRMC SystemEventLog
+  fujitsu.primergy.irmc_eventlog:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "list"
+    eventlog_type: "SystemEventLog"
+    page_size: 100
+    export_path: "{{ playbook_dir }}/{{ inventory_hostname }}_sel.jsonl.gz"
+    export_format: "jsonl"
+    export_compress: true
+  delegate_to: localhost
+  tags:
+    - export_systemeventlog
+
+# Collect new iRMC SystemEventLog entries into a local index and query it
+- block:
+  - name: Collect new iRMC SystemEventLog entries
+    fujitsu.primergy.irmc_eventlog:
+      irmc_url: "{{ inventory_hostname }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+      command: "collect"
+      eventlog_type: "SystemEventLog"
+      page_size: 100
+      index_file: "{{ playbook_dir }}/eventlog_index.db"
+    delegate_to: localhost
+  - name: Show hosts with critical memory events in the last hour
+    debug:
+      msg: "{{ lookup('fujitsu.primergy.irmc_eventlog_query', index_file=playbook_dir + '/eventlog_index.db',
+               min_severity='Critical', alert_group='Memory', since='1h', hosts_only=true) }}"
+    run_once: true
+  tags:
+    - collect_systemeventlog
+
 # Get specific InternalEventLog entry information
 # Add '-e “id=xx”' to the command line argument of Playbook.
 - block:
@@ -162,7 +330,7 @@ details:
     description:
         If command is “get”, the following values are returned.
 
-        If command is "list", list of individual eventlog_entries is returned.
+        If command is "list" and 'export_path' is not set, list of individual eventlog_entries is returned.
 
         For all other commands, the default return value of Ansible (changed, failed, etc.) is returned.
 
@@ -212,15 +380,69 @@ details:
             returned: always
             type: string
             sample: SEL
+
+cursor:
+    description:
+        If command is "list", the newest entry found in the eventlog (Id and Created).
+        This is the value stored in 'cursor_file'.
+    returned: always
+    type: dict
+    sample: { "Id": 20, "Created": "2018-07-24T15:57:40+02:00" }
+
+export:
+    description:
+        If command is "list" and 'export_path' is set, summary of the exported entries.
+    returned: when export_path is set
+    type: dict
+    sample:
+        {
+            "count": 2, "first_id": "21", "last_id": "22", "format": "jsonl",
+            "path": "/tmp/irmc_sel.jsonl.gz", "severities": { "OK": 1, "Warning": 1 }
+        }
+
+collected:
+    description:
+        If command is "collect", number of entries added to 'index_file', number of collections
+        and the newest entry found in the eventlog.
+    returned: when command is "collect"
+    type: dict
+    sample:
+        {
+            "added": 3, "runs": 1, "index_file": "/tmp/eventlog_index.db",
+            "cursor": { "Id": 20, "Created": "2018-07-24T15:57:40+02:00" }
+        }
 '''
 
 
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from urllib.parse import quote
+
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, irmc_redfish_get, irmc_redfish_post
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
+    get_irmc_json,
+    irmc_redfish_get,
+    irmc_redfish_post,
+    irmc_retry_argument_spec,
+)
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_eventlog_index import (
+    add_index_entries,
+    get_index_cursor,
+    open_eventlog_index,
+)
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import read_state, update_state
 
 # Global
 result = dict()
 
+# entries per request for 'export_path' if 'page_size' is not set
+export_page_size = 100
+severity_order = ['OK', 'Warning', 'Critical']
+
 
 def irmc_eventlog(module):
     # initialize result
@@ -236,19 +458,20 @@ def irmc_eventlog(module):
         result['msg'] = "Command 'get' requires 'id' parameter to be set!"
         result['status'] = 10
         module.fail_json(**result)
+    if module.params['page_size'] < 0:
+        result['msg'] = "Parameter 'page_size' must not be negative!"
+        result['status'] = 11
+        module.fail_json(**result)
+    if module.params['command'] == 'collect' and module.params['index_file'] is None:
+        result['msg'] = "Command 'collect' requires 'index_file' parameter to be set!"
+        result['status'] = 14
+        module.fail_json(**result)
+    filters = get_eventlog_filters(module)
 
     if module.params['command'] == 'list':
-        status, data, msg = irmc_redfish_get(module, 'redfish/v1/Managers/iRMC/LogServices/{0}/Entries'.
-                                             format(module.params['eventlog_type']))
-        if status < 100:
-            module.fail_json(msg=msg, status=status, exception=data)
-        elif status not in (200, 202, 204):
-            module.fail_json(msg=msg, status=status)
-
-        eventlogs = get_irmc_json(data.json(), ['Members'])
-        result['eventlog'] = []
-        for item in eventlogs:
-            result['eventlog'].append(get_irmc_eventlog_info(module, item))
+        list_irmc_eventlog(module, filters)
+    elif module.params['command'] == 'collect':
+        collect_irmc_eventlog(module, filters)
     elif module.params['command'] == 'clear':
         url = 'redfish/v1/Managers/iRMC/LogServices/{0}/Actions/LogService.ClearLog'. \
               format(module.params['eventlog_type'])
@@ -271,22 +494,318 @@ def irmc_eventlog(module):
     module.exit_json(**result)
 
 
-def get_irmc_eventlog_info(module, item):
+def list_irmc_eventlog(module, filters):
+    since_id = module.params['since_id']
+    cursor_key = '{0}/{1}'.format(module.params['irmc_url'], module.params['eventlog_type'])
+    use_cursor = module.params['cursor_file'] is not None and since_id is None
+    if use_cursor:
+        since_id = (read_state(module.params['cursor_file'], cursor_key) or {}).get('Id')
+
+    export = None
+    if module.params['export_path'] is not None:
+        export = open_eventlog_export(module)
+        add_entry = lambda entry: write_eventlog_export(export, entry)  # noqa: E731
+    else:
+        result['eventlog'] = []
+        add_entry = result['eventlog'].append
+
+    try:
+        cursor = get_irmc_eventlog_entries(module, since_id, filters, add_entry)
+        if use_cursor and since_id is not None and (cursor['Id'] is None or cursor['Id'] < since_id):
+            # eventlog has been cleared since the cursor was stored, IDs start again
+            cursor = get_irmc_eventlog_entries(module, None, filters, add_entry)
+    except BaseException:
+        # also on fail_json, which exits with SystemExit
+        if export is not None:
+            discard_eventlog_export(export)
+        raise
+
+    if export is not None:
+        result['export'] = close_eventlog_export(module, export)
+        result['changed'] = True
+    if module.params['cursor_file'] is not None:
+        update_state(module.params['cursor_file'], cursor_key, cursor if cursor['Id'] is not None else None)
+    result['cursor'] = cursor
+
+
+def collect_irmc_eventlog(module, filters):
+    try:
+        index = open_eventlog_index(module.params['index_file'])
+    except Exception as e:
+        result['msg'] = "Could not open eventlog index at '{0}': {1}".format(module.params['index_file'], str(e))
+        result['status'] = 15
+        module.fail_json(**result)
+
+    host = module.params['irmc_url']
+    eventlog_type = module.params['eventlog_type']
+    collected = {'index_file': module.params['index_file'], 'added': 0, 'runs': 0, 'cursor': None}
+    deadline = time.time() + module.params['watch_duration']
+    try:
+        while True:
+            since_id = (get_index_cursor(index, host, eventlog_type) or {}).get('Id')
+            entries = []
+            cursor = get_irmc_eventlog_entries(module, since_id, filters, entries.append)
+            if since_id is not None and (cursor['Id'] is None or cursor['Id'] < since_id):
+                # eventlog has been cleared since the cursor was stored, IDs start again
+                entries = []
+                cursor = get_irmc_eventlog_entries(module, None, filters, entries.append)
+            collected['added'] += add_index_entries(index, host, eventlog_type, entries, cursor)
+            collected['runs'] += 1
+            collected['cursor'] = cursor
+
+            if time.time() + module.params['watch_interval'] >= deadline:
+                break
+            time.sleep(module.params['watch_interval'])
+    finally:
+        index.close()
+
+    result['collected'] = collected
+    result['changed'] = collected['added'] > 0
+
+
+def open_eventlog_export(module):
+    # write to a temporary file next to the target, so an aborted run never replaces an export with a partial one
+    tmpname = '{0}.tmp{1}'.format(module.params['export_path'], os.getpid())
+    opener = gzip.open if module.params['export_compress'] else open
+    try:
+        handle = opener(tmpname, 'wt', encoding='utf-8', newline='')
+    except Exception as e:
+        result['msg'] = "Could not write file at '{0}': {1}".format(tmpname, str(e))
+        result['status'] = 13
+        module.fail_json(**result)
+
+    export = {'tmpname': tmpname, 'handle': handle, 'writer': None,
+              'summary': {'path': module.params['export_path'], 'format': module.params['export_format'],
+                          'count': 0, 'severities': {}, 'first_id': None, 'last_id': None}}
+    if module.params['export_format'] == 'csv':
+        fields = ['Id', 'Created', 'Severity', 'Type', 'AlertGroup']
+        if module.params['eventlog_type'] == 'SystemEventLog':
+            fields += ['EventSource', 'Message', 'Cause', 'Resolutions']
+        else:
+            fields += ['MessageId', 'Message']
+        export['writer'] = csv.DictWriter(handle, fieldnames=fields, extrasaction='ignore')
+        export['writer'].writeheader()
+    return export
+
+
+def write_eventlog_export(export, entry):
+    if export['writer'] is not None:
+        export['writer'].writerow(dict((key, value if value is None or isinstance(value, str) else json.dumps(value))
+                                       for key, value in entry.items()))
+    else:
+        export['handle'].write(json.dumps(entry, sort_keys=True) + '\n')
+
+    summary = export['summary']
+    summary['count'] += 1
+    summary['severities'][entry['Severity']] = summary['severities'].get(entry['Severity'], 0) + 1
+    if summary['first_id'] is None:
+        summary['first_id'] = entry['Id']
+    summary['last_id'] = entry['Id']
+
+
+def close_eventlog_export(module, export):
+    try:
+        export['handle'].close()
+        os.replace(export['tmpname'], module.params['export_path'])
+    except Exception as e:
+        discard_eventlog_export(export)
+        result['msg'] = "Could not write file at '{0}': {1}".format(module.params['export_path'], str(e))
+        result['status'] = 13
+        module.fail_json(**result)
+    return export['summary']
+
+
+def discard_eventlog_export(export):
+    try:
+        export['handle'].close()
+    except Exception:
+        pass
+    try:
+        os.unlink(export['tmpname'])
+    except OSError:
+        pass
+
+
+def get_eventlog_filters(module):
+    filters = {}
+    for param in ('since_time', 'until_time'):
+        filters[param] = None
+        if module.params[param] is not None:
+            filters[param] = parse_eventlog_time(module.params[param])
+            if filters[param] is None:
+                result['msg'] = "Parameter '{0}' is no valid ISO 8601 time: '{1}'".format(param, module.params[param])
+                result['status'] = 12
+                module.fail_json(**result)
+    filters['severities'] = None
+    if module.params['min_severity'] is not None:
+        filters['severities'] = set(severity_order[severity_order.index(module.params['min_severity']):])
+    filters['entry_types'] = set(module.params['entry_type']) if module.params['entry_type'] else None
+    filters['alert_groups'] = set(module.params['alert_group']) if module.params['alert_group'] else None
+    filters['event_sources'] = set(module.params['event_source']) if module.params['event_source'] else None
+
+    # the server-side filter hides the newest entries from the cursor, so it is not used with 'cursor_file'
+    filters['query'] = None
+    if module.params['filter_pushdown'] and module.params['cursor_file'] is None and \
+       module.params['command'] != 'collect':
+        filters['query'] = get_eventlog_query_filter(module, filters)
+    return filters
+
+
+def get_eventlog_query_filter(module, filters):
+    terms = []
+    if filters['severities'] is not None and len(filters['severities']) < len(severity_order):
+        terms.append(' or '.join("Severity eq '{0}'".format(severity)
+                                 for severity in severity_order if severity in filters['severities']))
+    if filters['entry_types'] is not None:
+        terms.append(' or '.join("EntryType eq '{0}'".format(entry_type)
+                                 for entry_type in sorted(filters['entry_types'])))
+    if module.params['since_time'] is not None:
+        terms.append("Created gt '{0}'".format(module.params['since_time']))
+    if module.params['until_time'] is not None:
+        terms.append("Created lt '{0}'".format(module.params['until_time']))
+    if len(terms) == 0:
+        return None
+    if len(terms) == 1:
+        return terms[0]
+    return ' and '.join('({0})'.format(term) for term in terms)
+
+
+def get_irmc_eventlog_entries(module, since_id, filters, add_entry):
+    uri = 'redfish/v1/Managers/iRMC/LogServices/{0}/Entries'.format(module.params['eventlog_type'])
+    page_size = module.params['page_size']
+    if page_size == 0 and module.params['export_path'] is not None and module.params['command'] == 'list':
+        page_size = export_page_size
+    query = filters['query']
+    skip = 0
+    cursor = {'Id': None, 'Created': None}
+
+    next_uri = get_eventlog_page_uri(uri, page_size, skip, query)
+    while next_uri is not None:
+        status, data, msg = irmc_redfish_get(module, next_uri)
+        if query is not None and skip == 0 and status in (400, 501):
+            # iRMC does not support '$filter' on this collection, filter locally only
+            query = None
+            next_uri = get_eventlog_page_uri(uri, page_size, skip, query)
+            continue
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=data)
+        elif status not in (200, 202, 204):
+            module.fail_json(msg=msg, status=status)
+
+        data = data.json()
+        members = data.get('Members') or []
+        for item in members:
+            item_id = get_eventlog_id(item)
+            if cursor['Id'] is None or item_id > cursor['Id']:
+                cursor = {'Id': item_id, 'Created': item.get('Created')}
+            if is_new_eventlog_entry(item, item_id, since_id, filters):
+                oem = get_eventlog_oem(item)
+                if match_eventlog_filters(item, oem, filters):
+                    add_entry(get_irmc_eventlog_info(module, item, oem))
+
+        # entries are listed newest first: the rest of the eventlog has already been seen
+        if len(members) > 1 and get_eventlog_id(members[0]) > get_eventlog_id(members[-1]) and \
+           not is_new_eventlog_entry(members[-1], get_eventlog_id(members[-1]), since_id, filters):
+            break
+
+        skip += len(members)
+        if data.get('Members@odata.nextLink'):
+            next_uri = data['Members@odata.nextLink'].lstrip('/')
+        elif page_size > 0 and len(members) == page_size and skip < data.get('Members@odata.count', skip + 1):
+            next_uri = get_eventlog_page_uri(uri, page_size, skip, query)
+        else:
+            next_uri = None
+    return cursor
+
+
+def get_eventlog_page_uri(uri, page_size, skip, query=None):
+    params = []
+    if page_size > 0:
+        params.append('$top={0}&$skip={1}'.format(page_size, skip))
+    if query is not None:
+        params.append('$filter={0}'.format(quote(query)))
+    if len(params) == 0:
+        return uri
+    return '{0}?{1}'.format(uri, '&'.join(params))
+
+
+def get_eventlog_id(item):
+    try:
+        return int(item['Id'])
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def get_eventlog_oem(item):
+    try:
+        oem = item['Oem']['ts_fujitsu']
+    except (KeyError, TypeError):
+        return {}
+    return oem if isinstance(oem, dict) else {}
+
+
+def parse_eventlog_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def compare_eventlog_time(created, reference):
+    try:
+        return (created > reference) - (created < reference)
+    except TypeError:  # offset-naive and offset-aware times cannot be compared
+        created = created.replace(tzinfo=None)
+        reference = reference.replace(tzinfo=None)
+        return (created > reference) - (created < reference)
+
+
+def is_new_eventlog_entry(item, item_id, since_id, filters):
+    if since_id is not None and item_id <= since_id:
+        return False
+    if filters['since_time'] is not None:
+        created = parse_eventlog_time(item.get('Created'))
+        if created is None or compare_eventlog_time(created, filters['since_time']) <= 0:
+            return False
+    return True
+
+
+def match_eventlog_filters(item, oem, filters):
+    if filters['severities'] is not None and item.get('Severity') not in filters['severities']:
+        return False
+    if filters['entry_types'] is not None and item.get('EntryType') not in filters['entry_types']:
+        return False
+    if filters['alert_groups'] is not None and oem.get('AlertGroup') not in filters['alert_groups']:
+        return False
+    if filters['event_sources'] is not None and oem.get('EventSource') not in filters['event_sources']:
+        return False
+    if filters['until_time'] is not None:
+        created = parse_eventlog_time(item.get('Created'))
+        if created is None or compare_eventlog_time(created, filters['until_time']) >= 0:
+            return False
+    return True
+
+
+def get_irmc_eventlog_info(module, item, oem=None):
+    if oem is None:
+        oem = get_eventlog_oem(item)
     eventlog = {}
     eventlog['Id'] = item['Id']
     eventlog['Severity'] = item['Severity']
     eventlog['Created'] = item['Created']
     eventlog['Type'] = item['EntryType']
-    eventlog['AlertGroup'] = get_irmc_json(item, ['Oem', 'ts_fujitsu', 'AlertGroup'])
+    eventlog['AlertGroup'] = get_irmc_json(oem, 'AlertGroup')
     if module.params['eventlog_type'] == 'SystemEventLog':
-        eventlog['EventSource'] = get_irmc_json(item, ['Oem', 'ts_fujitsu', 'EventSource'])
-        eventlog['Message'] = get_irmc_json(item, ['Oem', 'ts_fujitsu', 'MessageOEM', 'en'])[0]
-        if get_irmc_json(item, ['Oem', 'ts_fujitsu', 'Cause']) is not None:
-            eventlog['Cause'] = get_irmc_json(item, ['Oem', 'ts_fujitsu', 'Cause', 'en'])[0]
+        eventlog['EventSource'] = get_irmc_json(oem, 'EventSource')
+        eventlog['Message'] = get_irmc_json(oem, ['MessageOEM', 'en'])[0]
+        if get_irmc_json(oem, 'Cause') is not None:
+            eventlog['Cause'] = get_irmc_json(oem, ['Cause', 'en'])[0]
         else:
             eventlog['Cause'] = None
-        if get_irmc_json(item, ['Oem', 'ts_fujitsu', 'Resolutions']) is not None:
-            eventlog['Resolutions'] = get_irmc_json(item, ['Oem', 'ts_fujitsu', 'Resolutions', 'en'])[0]
+        if get_irmc_json(oem, 'Resolutions') is not None:
+            eventlog['Resolutions'] = get_irmc_json(oem, ['Resolutions', 'en'])[0]
         else:
             eventlog['Resolutions'] = None
     else:
@@ -295,25 +814,51 @@ def get_irmc_eventlog_info(module, item):
     return eventlog
 
 
-def main():
-    # import pdb; pdb.set_trace()
-    module_args = dict(
+def get_module_args():
+    return dict(
         irmc_url=dict(required=True, type='str'),
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='list',
-                     choices=['list', 'get', 'clear']),
+                     choices=['list', 'get', 'clear', 'collect']),
         eventlog_type=dict(required=False, type='str', default='SystemEventLog',
                            choices=['SystemEventLog', 'InternalEventLog']),
         id=dict(required=False, type='int'),
+        page_size=dict(required=False, type='int', default=0),
+        since_id=dict(required=False, type='int'),
+        since_time=dict(required=False, type='str'),
+        until_time=dict(required=False, type='str'),
+        min_severity=dict(required=False, type='str', choices=['OK', 'Warning', 'Critical']),
+        entry_type=dict(required=False, type='list', elements='str'),
+        alert_group=dict(required=False, type='list', elements='str'),
+        event_source=dict(required=False, type='list', elements='str'),
+        filter_pushdown=dict(required=False, type='bool', default=True),
+        cursor_file=dict(required=False, type='path'),
+        export_path=dict(required=False, type='path'),
+        export_format=dict(required=False, type='str', default='jsonl', choices=['jsonl', 'csv']),
+        export_compress=dict(required=False, type='bool', default=False),
+        index_file=dict(required=False, type='path'),
+        watch_duration=dict(required=False, type='int', default=0),
+        watch_interval=dict(required=False, type='int', default=60),
     )
+
+
+def run_module(module):
+    # also called by the action plugin with the module of plugins/plugin_utils/irmc_action.py,
+    # which runs it more than once in the same process
+    result.clear()
+    irmc_eventlog(module)
+
+
+def main():
     module = AnsibleModule(
-        argument_spec=module_args,
+        argument_spec=get_module_args(),
         supports_check_mode=False,
     )
 
-    irmc_eventlog(module)
+    run_module(module)
 
 
 if __name__ == '__main__':
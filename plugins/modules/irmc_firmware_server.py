@@ -0,0 +1,337 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+
+DOCUMENTATION = r'''
+---
+module: irmc_firmware_server
+
+short_description: serve iRMC firmware and BIOS images from the controller via TFTP
+
+description:
+    - Ansible module to start, query or stop a local read-only TFTP server which serves
+      iRMC firmware or BIOS images, so that many iRMCs pull the image concurrently
+      with 'fujitsu.primergy.irmc_fwbios_update' and update_source='tftp'.
+    - The images are memory-mapped and shared by all transfers.
+    - The server runs in the background until command 'stop' or until no request was received
+      for 'idle_timeout' seconds.
+    - On command 'stop' the server answers no further requests and lets the running transfers finish
+      for up to 'stop_timeout' seconds, then aborts the remaining transfers.
+    - Module Version V1.3.0.
+
+requirements:
+    - The module needs to run locally, once per play (e.g. with 'run_once').
+    - Binding the default TFTP port 69 requires root privileges.
+    - Python >= 3.10
+
+version_added: "2.1.0"
+
+author:
+    - Fsas Technologies Inc.
+
+options:
+    command:
+        description: Start, query or stop the TFTP server.
+        required:    false
+        default:     status
+        choices:     ['start', 'status', 'stop']
+    state_file:
+        description: Local file which keeps address, process ID and transfer statistics of the server.
+        required:    true
+    path:
+        description: Image file or directory with images to be served.
+                     A single image is requested by its file name, images of a directory by their path relative to it.
+                     Required for command='start'.
+        required:    false
+    listen_address:
+        description: Local IP address the server listens on.
+        required:    false
+        default:     0.0.0.0
+    server_name:
+        description: Name or IP address of the controller as seen by the iRMCs, returned for 'irmc_fwbios_update'.
+                     Defaults to 'listen_address' if set to a specific address,
+                     otherwise to the FQDN of the controller.
+        required:    false
+    port:
+        description: UDP port the server listens on. The iRMC requests TFTP servers on port 69.
+        required:    false
+        default:     69
+    max_transfers:
+        description: Maximum number of concurrent transfers. Further requests are repeated by the iRMC later.
+        required:    false
+        default:     8
+    transfer_timeout:
+        description: Time in seconds to wait for the acknowledgement of a data block before it is sent again.
+        required:    false
+        default:     5
+    idle_timeout:
+        description: Time in seconds after which the server stops itself if no request was received.
+                     '0' means the server runs until command 'stop'.
+        required:    false
+        default:     3600
+    stop_timeout:
+        description: Time in seconds command 'stop' waits for running transfers to finish before they are aborted.
+        required:    false
+        default:     600
+'''
+
+EXAMPLES = r'''
+# Serve the BIOS image to all iRMCs of the play and stop the server afterwards
+- block:
+  - name: Start TFTP server for BIOS image
+    fujitsu.primergy.irmc_firmware_server:
+      command: "start"
+      state_file: "{{ playbook_dir }}/firmware_server.json"
+      path: "{{ bios_filename }}"
+      max_transfers: 16
+    run_once: true
+    delegate_to: localhost
+    register: firmware_server
+  - name: Update server BIOS via TFTP from the controller
+    fujitsu.primergy.irmc_fwbios_update:
+      irmc_url: "{{ inventory_hostname }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+      command: "update"
+      update_source: "tftp"
+      update_type: "bios"
+      server_name: "{{ firmware_server.server.server_name }}"
+      file_name: "{{ firmware_server.server.file_name }}"
+    delegate_to: localhost
+  always:
+  - name: Stop TFTP server
+    fujitsu.primergy.irmc_firmware_server:
+      command: "stop"
+      state_file: "{{ playbook_dir }}/firmware_server.json"
+    run_once: true
+    delegate_to: localhost
+    register: firmware_server_stats
+  - name: Show transfer statistics
+    debug:
+      var: firmware_server_stats.stats
+    run_once: true
+  tags:
+    - update_bios_from_controller
+'''
+
+RETURN = r'''
+server:
+    description: Address and state of the TFTP server.
+    returned: always
+    type: dict
+    sample:
+        {
+            "address": "0.0.0.0",
+            "file_name": "D3279-B1x.R1.20.0.UPC",
+            "path": "/data/firmware/D3279-B1x.R1.20.0.UPC",
+            "pid": 12345,
+            "port": 69,
+            "running": true,
+            "server_name": "controller.example.com"
+        }
+
+stats:
+    description:
+        Transfer statistics of the TFTP server. 'deferred' counts requests
+        which were not answered because 'max_transfers' transfers were running.
+    returned: always
+    type: dict
+    sample:
+        {
+            "active": 0,
+            "bytes_sent": 33554432,
+            "clients": {
+                "192.0.2.101": {"bytes_sent": 16777216, "completed": 1, "failed": 0, "rejected": 0,
+                                "seconds": 41.2, "started": 1}
+            },
+            "completed": 2,
+            "deferred": 3,
+            "failed": 0,
+            "rejected": 0,
+            "started": 2
+        }
+'''
+
+
+import os
+import signal
+import socket
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import read_state, update_state
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_tftp_server import TftpServer
+
+# Global
+result = dict()
+
+
+def irmc_firmware_server(module):
+    # initialize result
+    result['changed'] = False
+    result['status'] = 0
+
+    if module.check_mode:
+        result['msg'] = 'module was not run'
+        module.exit_json(**result)
+
+    server = read_state(module.params['state_file'], 'server', {})
+    if server:
+        server['running'] = is_server_running(server.get('pid'))
+
+    if module.params['command'] == 'start':
+        if module.params['path'] is None:
+            result['msg'] = "Command 'start' requires 'path' parameter to be set!"
+            result['status'] = 10
+            module.fail_json(**result)
+        path = os.path.realpath(os.path.expanduser(module.params['path']))
+        if server.get('running'):
+            if server.get('path') != path or server.get('port') != module.params['port']:
+                result['msg'] = "TFTP server of '{0}' is already running for '{1}' on port {2}.". \
+                                format(module.params['state_file'], server.get('path'), server.get('port'))
+                result['status'] = 11
+                module.fail_json(**result)
+        else:
+            server = start_firmware_server(module, path)
+            result['changed'] = True
+    elif module.params['command'] == 'stop' and server.get('running'):
+        stop_firmware_server(module, server)
+        server['running'] = False
+        result['changed'] = True
+
+    result['server'] = server
+    result['stats'] = read_state(module.params['state_file'], 'stats', {})
+    module.exit_json(**result)
+
+
+def is_server_running(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def start_firmware_server(module, path):
+    if not os.path.exists(path):
+        result['msg'] = "Could not find '{0}'.".format(path)
+        result['status'] = 12
+        module.fail_json(**result)
+
+    # bind in the module process, so an address or permission problem is reported as failure
+    try:
+        tftp = TftpServer(path, address=module.params['listen_address'], port=module.params['port'],
+                          max_transfers=module.params['max_transfers'], timeout=module.params['transfer_timeout'],
+                          on_stats=lambda stats: update_state(module.params['state_file'], 'stats', stats))
+    except (socket.error, OSError) as e:
+        result['msg'] = "Could not start TFTP server on {0}:{1}: {2}". \
+                        format(module.params['listen_address'], module.params['port'], str(e))
+        result['status'] = 12
+        module.fail_json(**result)
+
+    server_name = module.params['server_name']
+    if server_name is None:
+        server_name = module.params['listen_address'] if module.params['listen_address'] != '0.0.0.0' \
+            else socket.getfqdn()
+    update_state(module.params['state_file'], 'stats', {})
+    pid = start_daemon(tftp, module.params['idle_timeout'])
+    tftp.socket.close()
+
+    server = {
+        'path': path,
+        'file_name': None if os.path.isdir(path) else os.path.basename(path),
+        'address': module.params['listen_address'],
+        'server_name': server_name,
+        'port': tftp.port,
+        'pid': pid,
+        'running': True,
+    }
+    update_state(module.params['state_file'], 'server', server)
+    return server
+
+
+def start_daemon(tftp, idle_timeout):
+    # double fork, so the server survives the module process and does not block Ansible
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid > 0:
+        os.close(write_fd)
+        os.waitpid(pid, 0)
+        with os.fdopen(read_fd, 'r') as pipe:
+            return int(pipe.read())
+
+    os.close(read_fd)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    with os.fdopen(write_fd, 'w') as pipe:
+        pipe.write(str(os.getpid()))
+    os.chdir('/')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    # the first SIGTERM lets the running transfers finish, a second one aborts them
+    signal.signal(signal.SIGTERM, lambda signum, frame: tftp.abort() if tftp.stop_event.is_set() else tftp.shutdown())
+    try:
+        tftp.serve_forever(idle_timeout=idle_timeout)
+    finally:
+        os._exit(0)
+
+
+def stop_firmware_server(module, server):
+    try:
+        os.kill(server['pid'], signal.SIGTERM)
+    except OSError:
+        return
+    if not wait_for_server_stop(server['pid'], module.params['stop_timeout']):
+        try:
+            os.kill(server['pid'], signal.SIGTERM)
+        except OSError:
+            pass
+        # aborted transfers end after their current wait for an acknowledgement
+        if not wait_for_server_stop(server['pid'], module.params['transfer_timeout'] * 6 + 5):
+            result['msg'] = "TFTP server with pid {0} did not stop.".format(server['pid'])
+            result['status'] = 13
+            module.fail_json(**result)
+    server['running'] = False
+    update_state(module.params['state_file'], 'server', server)
+
+
+def wait_for_server_stop(pid, timeout):
+    deadline = time.time() + timeout
+    while is_server_running(pid):
+        if time.time() > deadline:
+            return False
+        time.sleep(0.2)
+    return True
+
+
+def main():
+    # import pdb; pdb.set_trace()
+    module_args = dict(
+        command=dict(required=False, type='str', default='status', choices=['start', 'status', 'stop']),
+        state_file=dict(required=True, type='path'),
+        path=dict(required=False, type='path'),
+        listen_address=dict(required=False, type='str', default='0.0.0.0'),
+        server_name=dict(required=False, type='str'),
+        port=dict(required=False, type='int', default=69),
+        max_transfers=dict(required=False, type='int', default=8),
+        transfer_timeout=dict(required=False, type='int', default=5),
+        idle_timeout=dict(required=False, type='int', default=3600),
+        stop_timeout=dict(required=False, type='int', default=600),
+    )
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False,
+    )
+
+    irmc_firmware_server(module)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+
+DOCUMENTATION = r'''
+---
+module: irmc_firmware_version
+
+short_description: get server model and BIOS and iRMC firmware versions
+
+description:
+    - Ansible module to get server model, power state and BIOS and iRMC firmware versions via iRMC RedFish interface.
+    - Only two requests are sent, in parallel, compared to the full 'fujitsu.primergy.irmc_facts'.
+    - The result uses the keys of the 'system' and 'irmc' facts of 'fujitsu.primergy.irmc_facts'.
+    - Module Version V1.3.0.
+
+requirements:
+    - The module needs to run locally.
+    - iRMC S6.
+    - Python >= 3.10
+    - Python modules 'requests', 'urllib3'
+
+version_added: "2.1.0"
+
+author:
+    - Fsas Technologies Inc.
+
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
+options:
+    irmc_url:
+        description: IP address of the iRMC to be requested for data.
+        required:    true
+    irmc_username:
+        description: iRMC user for basic authentication.
+        required:    true
+    irmc_password:
+        description: Password for iRMC user for basic authentication.
+        required:    true
+    validate_certs:
+        description: Evaluate SSL certificate (set to false for self-signed certificate).
+        required:    false
+        default:     true
+'''
+
+EXAMPLES = r'''
+# Get server model and firmware versions
+- block:
+  - name: Get server model and firmware versions
+    fujitsu.primergy.irmc_firmware_version:
+      irmc_url: "{{ inventory_hostname }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+    register: firmware_version
+    delegate_to: localhost
+  - name: Show server model and firmware versions
+    debug:
+      msg: "{{ firmware_version.facts.system.model }}: BIOS {{ firmware_version.facts.system.bios_version }},
+            iRMC {{ firmware_version.facts.irmc.fw_version }}"
+  tags:
+    - get_firmware_version
+'''
+
+RETURN = r'''
+facts:
+    description: Server model and firmware versions.
+    returned: always
+    type: dict
+    sample:
+        {
+            "irmc": {
+                "fw_builddate": "2019-04-10T11:29:36",
+                "fw_running": "LowFWImage",
+                "fw_version": "2.08P",
+                "sdrr_version": "3.73"
+            },
+            "system": {
+                "bios_version": "V5.0.0.11 R1.20.0 for D3279-B1x",
+                "manufacturer": "FUJITSU",
+                "model": "PRIMERGY RX1330 M6S",
+                "power_state": "Off",
+                "serial_number": "YLVT000098"
+            }
+        }
+'''
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_firmware import get_irmc_firmware_versions
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import irmc_retry_argument_spec
+
+
+def irmc_firmware_version(module):
+    result = dict(
+        changed=False,
+        status=0,
+    )
+
+    if module.check_mode:
+        result['msg'] = 'module was not run'
+        module.exit_json(**result)
+
+    status, data, msg = get_irmc_firmware_versions(module)
+    if status < 100:
+        module.fail_json(msg=msg, status=status, exception=data)
+    elif status != 200:
+        module.fail_json(msg=msg, status=status)
+
+    result['facts'] = data
+    module.exit_json(**result)
+
+
+def main():
+    # import pdb; pdb.set_trace()
+    module_args = dict(
+        irmc_url=dict(required=True, type='str'),
+        irmc_username=dict(required=True, type='str'),
+        irmc_password=dict(required=True, type='str', no_log=True),
+        validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
+    )
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False,
+    )
+
+    irmc_firmware_version(module)
+
+
+if __name__ == '__main__':
+    main()
@@ -33,6 +33,9 @@ known_bugs:
     - To update iRMC via file,
       parameter `irmc_flash_selector` and `irmc_boot_selector` will not work correctly.
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -85,6 +88,42 @@ options:
         description: Which iRMC FW image is to be started after iRMC reboot.
         required:    false
         choices:     ['Auto', 'LowFWImage', 'HighFWImage']
+    skip_if_current:
+        description: Do not upload and flash the image if the server already runs its version.
+                     The iRMC firmware version is compared with 'BMCFirmware' of the FirmwareInventory,
+                     the BIOS version with 'BiosVersion' of the system.
+                     If the version of the image cannot be determined, the update is run.
+        required:    false
+        default:     false
+    image_version:
+        description: Version of the image, e.g. '9.09F' for iRMC firmware or 'R1.20.0' for BIOS.
+                     If not set, the version is read from the manifest or from the image file name.
+                     A version is only taken from the file name if the name contains exactly one version in
+                     the format of the images ('R1.20.0' for BIOS, '9.09F' for iRMC firmware).
+        required:    false
+    image_manifest:
+        description: Local JSON file with keys 'version' and optionally 'sha256' describing the image.
+                     Defaults to '<file_name>.json' if that file exists.
+                     If 'sha256' is set and does not match the image, the module fails.
+                     Only evaluated for update_source='file'.
+        required:    false
+    image_cache_file:
+        description: Local file which keeps size, modification time, sha256 and version of the images,
+                     so unchanged images are not read again on the next run.
+                     Only evaluated for update_source='file'.
+        required:    false
+    upload_block_size:
+        description: Size in bytes of the blocks read from the image while it is uploaded.
+                     If not set, the block size of the HTTP library is used.
+                     Only evaluated for update_source='file'.
+        required:    false
+    upload_timeout:
+        description: Time in seconds the upload of the image may take.
+                     Also used as timeout for every single network operation of the upload.
+                     '0' means no limit.
+                     Only evaluated for update_source='file'.
+        required:    false
+        default:     0
 '''
 
 EXAMPLES = r'''
@@ -168,6 +207,50 @@ EXAMPLES = r'''
       var: irmc_update_tftp
   tags:
     - update_irmc_tftp
+
+# Update server BIOS from local file unless it already runs the image version
+- block:
+  - name: Update server BIOS from local file unless it already runs the image version
+    fujitsu.primergy.irmc_fwbios_update:
+      irmc_url: "{{ inventory_hostname }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+      command: "update"
+      update_source: "file"
+      update_type: "bios"
+      file_name: "{{ bios_filename }}"
+      skip_if_current: true
+      image_cache_file: "{{ playbook_dir }}/firmware_image_cache.json"
+    delegate_to: localhost
+    register: bios_update_current
+  - name: Show bios update result
+    debug:
+      var: bios_update_current
+  tags:
+    - update_bios_current
+
+# Update server BIOS from local file within 10 minutes upload time
+- block:
+  - name: Update server BIOS from local file within 10 minutes upload time
+    fujitsu.primergy.irmc_fwbios_update:
+      irmc_url: "{{ inventory_hostname }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+      command: "update"
+      update_source: "file"
+      update_type: "bios"
+      file_name: "{{ bios_filename }}"
+      upload_block_size: 262144
+      upload_timeout: 600
+    delegate_to: localhost
+    register: bios_update_upload
+  - name: Show upload statistics
+    debug:
+      var: bios_update_upload.upload
+  tags:
+    - update_bios_upload
 '''
 
 RETURN = r'''
@@ -176,6 +259,8 @@ details:
         If command is “get”, the following values are returned.
 
         For update command, the default return value of Ansible (changed, failed, etc.) is returned.
+        If 'skip_if_current' is set, 'image' and 'current_version' are returned as well.
+        If update_source is 'file', 'upload' is returned as well.
 
     contains:
         bios_file_name:
@@ -248,16 +333,60 @@ details:
             returned: always
             type: string
             sample: tftpserver.local
+
+image:
+    description: Version and, for update_source='file', size and sha256 of the image.
+    returned: when skip_if_current is set
+    type: dict
+    sample:
+        {
+            "file_name": "/data/firmware/D3279-B1x.R1.20.0.UPC",
+            "sha256": "5e0b1d3cbd6a6a4ee8e3be5e5a3b9c5d2a2c4f5a8b3c2d1e0f9a8b7c6d5e4f3a",
+            "size": 16777216,
+            "version": "R1.20.0",
+            "version_source": "file_name"
+        }
+
+current_version:
+    description: Version of iRMC firmware or BIOS running before the update.
+    returned: when skip_if_current is set
+    type: string
+    sample: V5.0.0.11 R1.20.0 for D3279-B1x
+
+upload:
+    description:
+        Statistics of the image upload, to tell slow uploads apart from slow flashing.
+        'bytes_read' is the number of bytes of the request read by the HTTP connection for sending,
+        'upload_time' the time in seconds until all of them were read, 'response_time' the time
+        the iRMC took to answer afterwards, 'flash_time' the time in seconds until the update finished.
+    returned: when update_source is 'file'
+    type: dict
+    sample:
+        {
+            "block_size": 65536,
+            "bytes_per_second": 1398101,
+            "bytes_read": 16777426,
+            "bytes_total": 16777426,
+            "flash_time": 312.4,
+            "response_time": 1.2,
+            "upload_time": 12.0
+        }
 '''
 
 
-import json
+import os
 import time
 from datetime import datetime
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, irmc_redfish_get, irmc_redfish_patch, irmc_redfish_post
-from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_upload_file import irmc_redfish_post_file
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
+    get_irmc_json,
+    irmc_redfish_get,
+    irmc_retry_argument_spec,
+)
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_firmware import IrmcTaskPoll, \
+    check_update_tasks_finished, get_image_info, get_image_version_from_name, is_current_firmware, poll_update_task, \
+    set_update_settings, start_update, update_url
 
 # Global
 result = dict()
@@ -286,7 +415,6 @@ def irmc_fwbios_update(module):
         module.fail_json(msg=msg, status=status)
 
     # Get iRMC FW Update data
-    update_url = 'redfish/v1/Managers/iRMC/Oem/ts_fujitsu/iRMCConfiguration/FWUpdate/'
     status, fwdata, msg = irmc_redfish_get(module, update_url)
     if status < 100:
         module.fail_json(msg=msg, status=status, exception=fwdata)
@@ -297,14 +425,17 @@ def irmc_fwbios_update(module):
         result['fw_update_configuration'] = setup_resultdata(fwdata, sysdata)
         module.exit_json(**result)
     elif module.params['update_source'] == 'tftp':
-        patch_update_data(module, update_url, get_irmc_json(fwdata.json(), '@odata.etag'))
+        status, patch, msg = set_update_settings(module, module.params, get_irmc_json(fwdata.json(), '@odata.etag'))
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=patch)
+        elif status != 200:
+            module.fail_json(msg=msg, status=status)
 
-    if module.params['update_source'] == 'file':
-        status, udata, msg = irmc_redfish_post_file(module, get_update_url(module), module.params['file_name'])
-    elif module.params['update_source'] == 'tftp':
-        status, udata, msg = irmc_redfish_post(module, get_update_url(module), body='')
-    else:
+    if module.params['update_source'] not in ('file', 'tftp'):
         module.fail_json(msg=f'{module.params["update_source"]}: unknown update_source')
+    if module.params['update_source'] == 'file':
+        result['upload'] = {}
+    status, udata, msg = start_update(module, module.params, stats=result.get('upload'))
 
     if status < 100:
         module.fail_json(msg=msg, status=status, exception=udata)
@@ -315,23 +446,13 @@ def irmc_fwbios_update(module):
             msg = f'{msg} This message might be due to the binary file being invalid for the server.'
         module.fail_json(msg=msg, status=status)
 
+    flash_start = time.time()
     wait_for_update_to_finish(module, udata.headers['Location'], get_irmc_json(sysdata.json(), 'PowerState'))
+    if 'upload' in result:
+        result['upload']['flash_time'] = round(time.time() - flash_start, 1)
     module.exit_json(**result)
 
 
-def get_update_url(module):
-    if module.params['update_source'] == 'tftp':
-        if module.params['update_type'] == 'irmc':
-            url = 'redfish/v1/Managers/iRMC/Actions/FTSManager.FWTFTPUpdate'
-        else:
-            url = 'redfish/v1/Systems/0/Bios/Actions/Oem/FTSBios.BiosTFTPUpdate'
-    elif module.params['update_type'] == 'irmc':
-        url = 'redfish/v1/Managers/iRMC/Actions/FTSManager.FWUpdate'
-    else:
-        url = 'redfish/v1/Systems/0/Bios/Actions/Oem/FTSBios.BiosUpdate'
-    return url
-
-
 def preliminary_parameter_check(module):
     if module.params['command'] == 'update':
         if module.params['update_source'] is None or module.params['update_type'] is None or \
@@ -343,6 +464,14 @@ def preliminary_parameter_check(module):
             result['msg'] = "TFTP update requires 'server_name' parameter to be set!"
             result['status'] = 11
             module.fail_json(**result)
+        if (module.params['upload_block_size'] is not None and module.params['upload_block_size'] < 1) or \
+           module.params['upload_timeout'] < 0:
+            result['msg'] = "Parameter 'upload_block_size' must be positive, 'upload_timeout' must not be negative!"
+            result['status'] = 13
+            module.fail_json(**result)
+
+        if module.params['skip_if_current']:
+            check_image_is_current(module)
 
         if module.params['ignore_power_on'] is False:
             # Get server power state
@@ -358,8 +487,52 @@ def preliminary_parameter_check(module):
                 module.exit_json(**result)
 
 
+def check_image_is_current(module):
+    if module.params['update_source'] == 'file':
+        try:
+            image = get_image_info(module.params['file_name'], module.params['update_type'],
+                                   cache_file=module.params['image_cache_file'],
+                                   manifest=module.params['image_manifest'], version=module.params['image_version'])
+        except (IOError, OSError, ValueError) as e:
+            result['msg'] = "Could not read image '{0}': {1}".format(module.params['file_name'], str(e))
+            result['status'] = 12
+            module.fail_json(**result)
+    else:
+        # the image is on the TFTP server, so only the given version or the file name can be evaluated
+        image = {'file_name': module.params['file_name'], 'version': module.params['image_version'],
+                 'version_source': 'parameter'}
+        if image['version'] is None:
+            image['version'] = get_image_version_from_name(module.params['file_name'], module.params['update_type'])
+            image['version_source'] = 'file_name' if image['version'] is not None else None
+    result['image'] = image
+
+    if module.params['update_type'] == 'irmc':
+        status, fwdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/Oem/ts_fujitsu/FirmwareInventory')
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=fwdata)
+        elif status != 200:
+            module.fail_json(msg=msg, status=status)
+        result['current_version'] = get_irmc_json(fwdata.json(), 'BMCFirmware')
+    else:
+        status, sysdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/')
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=sysdata)
+        elif status != 200:
+            module.fail_json(msg=msg, status=status)
+        result['current_version'] = get_irmc_json(sysdata.json(), 'BiosVersion')
+
+    if image['version'] is None:
+        result['warnings'] = "Version of image '{0}' is unknown. Running update.". \
+                             format(os.path.basename(module.params['file_name']))
+    elif is_current_firmware(image['version'], result['current_version']):
+        result['msg'] = "Server already runs {0} version '{1}'. Update skipped.". \
+                        format('iRMC firmware' if module.params['update_type'] == 'irmc' else 'BIOS', image['version'])
+        module.exit_json(**result)
+
+
 def wait_for_update_to_finish(module, location, power_state):
     rebootDone = None
+    poll = IrmcTaskPoll(module)
     start_time = time.time()
     while True:
         time.sleep(5)
@@ -370,99 +543,28 @@ def wait_for_update_to_finish(module, location, power_state):
             msg = 'Timeout of {0} minutes exceeded. Abort.'.format(module.params['timeout'])
             module.fail_json(msg=msg, status=20)
 
-        status, sdata, msg = irmc_redfish_get(module, f'{location[1:]}')
-        if status == 99:
-            time.sleep(55)
-            continue
-        elif status == 404:
-            if rebootDone is True:
-                result['changed'] = True
-                break
-            continue
-        elif status == 503:
-            if rebootDone is None:
-                rebootDone = False      # just in case we miss the 'complete' message
-            else:
-                rebootDone = True
-            time.sleep(25)
-            continue
-        elif status < 100 or (status not in (200, 202, 204)):
-            time.sleep(5)
+        state, rebootDone, msg, delay = poll_update_task(poll, location, power_state,
+                                                         module.params['update_type'], rebootDone)
+        if state == 'running':
+            time.sleep(delay)
             continue
-
-        if 'Key' in get_irmc_json(sdata.json(), 'error'):
-            rebootDone = False
-            oemstate = get_irmc_json(sdata.json(), ['Oem', 'ts_fujitsu', 'StatusOEM'])
-            state = get_irmc_json(sdata.json(), 'TaskState')
-            # make sure the process ran through
-            if power_state == 'On' and oemstate == 'Pending':
-                msg = 'A BIOS firmware update has been started and a system reboot is required to continue the update.'
-                result['warnings'] = msg
-                break
-            if power_state == 'On' and oemstate == 'FlashImageDownloadedSuccessfully':
-                msg = 'A BIOS firmware update has been started. A system reboot is required to continue the update.'
-                result['warnings'] = msg
-                break
-            if power_state == 'On' and oemstate == 'FlashingFinishedSuccessfullyRebootRequired':
-                msg = 'A iRMC firmware update has finished. A system reboot is required to activate the update.'
-                result['warnings'] = msg
-                break
-            if state == 'Exception':
-                msg = f'{now}: Update failed.'
-                module.fail_json(msg=msg, status=21)
-            # for BIOS we are done here, for iRMC we need to wait for iRMC shutdown and reboot
-            if module.params['update_type'] == 'bios' and state == 'Completed':
-                result['changed'] = True
-                break
-        else:
-            break
-
-
-def patch_update_data(module, update_url, etag):
-    body = {}
-    if module.params['update_source'] == 'tftp':
-        body['ServerName'] = module.params['server_name']
-        if module.params['update_type'] == 'irmc':
-            body['iRMCFileName'] = module.params['file_name']
-        else:
-            body['BiosFileName'] = module.params['file_name']
-    if module.params['irmc_flash_selector'] is not None:
-        body['iRMCFlashSelector'] = module.params['irmc_flash_selector']
-    if module.params['irmc_boot_selector'] is not None:
-        body['iRMCBootSelector'] = module.params['irmc_boot_selector']
-
-    if body != {}:
-        status, patch, msg = irmc_redfish_patch(module, update_url, json.dumps(body), etag)
-        if status < 100:
-            module.fail_json(msg=msg, status=status, exception=patch)
-        elif status != 200:
-            module.fail_json(msg=msg, status=status)
+        if state == 'failed':
+            module.fail_json(msg=f'{now}: {msg}', status=21)
+        if state == 'finished':
+            result['changed'] = True
+        elif state == 'reboot_required':
+            result['warnings'] = msg
+        break
 
 
 def check_all_tasks_are_finished(module):
-    status, taskdata, msg = irmc_redfish_get(module, 'redfish/v1/TaskService/Tasks')
-    if status < 100:
-        module.fail_json(msg=msg, status=status, exception=taskdata)
+    status, data, msg = check_update_tasks_finished(module)
+    if status in (30, 31):
+        module.fail_json(msg=msg, status=status)
+    elif status < 100:
+        module.fail_json(msg=msg, status=status, exception=data)
     elif status not in (200, 202, 204):
         module.fail_json(msg=msg, status=status)
-    tasks = get_irmc_json(taskdata.json(), ['Members'])
-    for task in tasks:
-        url = get_irmc_json(task, '@odata.id')
-        status, sdata, msg = irmc_redfish_get(module, f'{url[1:]}')
-        if status < 100:
-            module.fail_json(msg=msg, status=status, exception=sdata)
-        elif status not in (200, 202, 204):
-            module.fail_json(msg=msg, status=status)
-
-        task_state = get_irmc_json(sdata.json(), ['Oem', 'ts_fujitsu', 'StatusOEM'])
-        if task_state in ('Pending', 'FlashImageDownloadedSuccessfully'):
-            msg = 'Firmware update has already been started, system reboot is required. Cannot continue new update.'
-            module.fail_json(msg=msg, status=30)
-        task_progress = get_irmc_json(sdata.json(), ['Oem', 'ts_fujitsu', 'TotalProgressPercent'])
-        if str(task_progress) != '100':
-            msg = "Task '{0}' is still in progress. Cannot continue new update.". \
-                  format(get_irmc_json(sdata.json(), 'Name'))
-            module.fail_json(msg=msg, status=31)
 
 
 def setup_resultdata(data, sysdata):
@@ -487,6 +589,7 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'update']),
         ignore_power_on=dict(required=False, type='bool', default=False),
         update_source=dict(required=False, type='str', choices=['tftp', 'file']),
@@ -496,6 +599,12 @@ def main():
         file_name=dict(required=False, type='str'),
         irmc_flash_selector=dict(required=False, type='str', choices=['Auto', 'LowFWImage', 'HighFWImage']),
         irmc_boot_selector=dict(required=False, type='str', choices=['Auto', 'LowFWImage', 'HighFWImage']),
+        skip_if_current=dict(required=False, type='bool', default=False),
+        image_version=dict(required=False, type='str'),
+        image_manifest=dict(required=False, type='path'),
+        image_cache_file=dict(required=False, type='path'),
+        upload_block_size=dict(required=False, type='int'),
+        upload_timeout=dict(required=False, type='int', default=0),
     )
     module = AnsibleModule(
         argument_spec=module_args,
@@ -25,6 +25,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -147,7 +150,8 @@ details:
 
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, irmc_redfish_get
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, irmc_redfish_get, \
+    irmc_retry_argument_spec
 
 
 def irmc_getvirtualmedia(module):
@@ -218,21 +222,29 @@ def irmc_getvirtualmedia(module):
     module.exit_json(**result)
 
 
-def main():
-    # import pdb; pdb.set_trace()
-    module_args = dict(
+def get_module_args():
+    return dict(
         irmc_url=dict(required=True, type='str'),
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         vm_type=dict(required=False, type='str', default='CDImage', choices=['CDImage', 'HDImage']),
     )
+
+
+def run_module(module):
+    # also called by the action plugin with the module of plugins/plugin_utils/irmc_action.py
+    irmc_getvirtualmedia(module)
+
+
+def main():
     module = AnsibleModule(
-        argument_spec=module_args,
+        argument_spec=get_module_args(),
         supports_check_mode=False,
     )
 
-    irmc_getvirtualmedia(module)
+    run_module(module)
 
 
 if __name__ == '__main__':
@@ -23,6 +23,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -132,6 +135,7 @@ details_for_set:
 
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import irmc_retry_argument_spec
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_scci_utils import (
     add_scci_command,
     get_key_for_value,
@@ -239,6 +243,7 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'set']),
         time_mode=dict(required=False, type='str', choices=['System RTC', 'NTP', 'MMB NTP']),
         rtc_mode=dict(required=False, type='str', choices=['local time', 'UTC/GMT']),
@@ -26,6 +26,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -52,6 +55,32 @@ options:
         required:    false
         choices:     ['PowerOn', 'PowerOff', 'PowerCycle', 'GracefulPowerOff', 'ImmediateReset', 'GracefulReset',
                       'PulseNmi', 'PressPowerButton']
+    wait:
+        description: Wait for command 'set' until the server reached the new power state.
+                     Ignored for 'PowerCycle', 'ImmediateReset', 'GracefulReset' and 'PulseNmi', which end in the
+                     power state the server had before, so reaching it does not tell that the command has been
+                     executed.
+        required:    false
+        default:     false
+    timeout:
+        description: Timeout in seconds for 'wait' and for getting a token from 'token_file'.
+        required:    false
+        default:     600
+    token_file:
+        description: Local file shared by all tasks on the controller to limit how many servers change their
+                     power state at the same time ('max_concurrent') and how fast they start ('stagger'),
+                     e.g. to avoid inrush current peaks when powering on a rack.
+        required:    false
+    max_concurrent:
+        description: Maximum number of servers changing their power state at the same time, with 'token_file'.
+                     A server counts until it reached the new power state, so this requires 'wait'.
+                     '0' means no limit.
+        required:    false
+        default:     0
+    stagger:
+        description: Minimum time in seconds between the power state changes of two servers, with 'token_file'.
+        required:    false
+        default:     0
 '''
 
 EXAMPLES = r'''
@@ -83,6 +112,23 @@ EXAMPLES = r'''
   delegate_to: localhost
   tags:
     - set
+
+- name: Power on servers of a rack, at most 4 at a time and 5 seconds apart, and wait until they are on
+  fujitsu.primergy.irmc_powerstate:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "set"
+    state: "PowerOn"
+    wait: true
+    timeout: 300
+    token_file: "{{ playbook_dir }}/power_tokens.json"
+    max_concurrent: 4
+    stagger: 5
+  delegate_to: localhost
+  tags:
+    - power_on_rack
 '''
 
 RETURN = r'''
@@ -95,17 +141,46 @@ details:
 
     contains:
         power_state:
-            description: server power state
+            description: server power state, for command 'set' with 'wait' the new power state
             returned: always
             type: string
             sample: "On"
+        wait_time:
+            description: seconds waited for the new power state
+            returned: for command 'set' with 'wait'
+            type: float
+            sample: 42.3
+        token_wait_time:
+            description: seconds waited for a token from 'token_file'
+            returned: for command 'set' with 'token_file'
+            type: float
+            sample: 10.0
 '''
 
 
 import json
+import time
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, irmc_redfish_get, irmc_redfish_post
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
+    get_irmc_json,
+    irmc_redfish_get,
+    irmc_redfish_keepalive,
+    irmc_redfish_post,
+    irmc_retry_argument_spec,
+)
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import acquire_token, release_token
+
+# power state after a successful 'set', None: power state does not change
+expected_power_states = {
+    'PowerOn': 'On',
+    'PowerOff': 'Off',
+    'PowerCycle': None,
+    'GracefulPowerOff': 'Off',
+    'ImmediateReset': None,
+    'GracefulReset': None,
+    'PulseNmi': None,
+}
 
 
 def irmc_powerstate(module: AnsibleModule) -> None:
@@ -123,7 +198,16 @@ def irmc_powerstate(module: AnsibleModule) -> None:
         result['msg'] = "Command 'set' requires 'state' parameter to be set!"
         result['status'] = 10
         module.fail_json(**result)
+    if module.params['max_concurrent'] > 0 and not module.params['wait']:
+        result['msg'] = "Parameter 'max_concurrent' requires 'wait' to be set!"
+        result['status'] = 12
+        module.fail_json(**result)
 
+    with irmc_redfish_keepalive(module):
+        handle_powerstate(module, result)
+
+
+def handle_powerstate(module: AnsibleModule, result: dict) -> None:
     # Get iRMC system data
     status, sysdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/')
     if status < 100:
@@ -154,40 +238,102 @@ def irmc_powerstate(module: AnsibleModule) -> None:
         result['status'] = 11
         module.fail_json(**result)
 
-    # Set iRMC system data
-    body = {'FTSResetType': module.params['state']}
-    status, sysdata, msg = irmc_redfish_post(
-        module,
-        'redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.Reset',
-        json.dumps(body),
-    )
-    if status < 100:
-        module.fail_json(msg=msg, status=status, exception=sysdata)
-    elif status not in (200, 202, 204):
-        module.fail_json(msg=msg, status=status)
+    if module.params['state'] == 'PressPowerButton':
+        expected_state = 'Off' if power_state == 'On' else 'On'
+    else:
+        expected_state = expected_power_states[module.params['state']]
+
+    token_file = module.params['token_file']
+    if token_file is not None:
+        token_wait_time = acquire_token(token_file, module.params['irmc_url'], module.params['max_concurrent'],
+                                        module.params['stagger'], lease=module.params['timeout'] + 60,
+                                        timeout=module.params['timeout'])
+        if token_wait_time is None:
+            result['msg'] = f"No token from '{token_file}' within {module.params['timeout']} seconds."
+            result['status'] = 20
+            module.fail_json(**result)
+        result['token_wait_time'] = round(token_wait_time, 1)
+
+    try:
+        # Set iRMC system data
+        body = {'FTSResetType': module.params['state']}
+        status, sysdata, msg = irmc_redfish_post(
+            module,
+            'redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.Reset',
+            json.dumps(body),
+        )
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=sysdata)
+        elif status not in (200, 202, 204):
+            module.fail_json(msg=msg, status=status)
+
+        result['changed'] = True
+        if module.params['wait'] and expected_state is not None:
+            wait_for_powerstate(module, result, expected_state)
+    finally:
+        if token_file is not None:
+            release_token(token_file, module.params['irmc_url'])
 
-    result['changed'] = True
     module.exit_json(**result)
 
 
-def main() -> None:
-    # breakpoint()
-    module_args = dict(
+def wait_for_powerstate(module: AnsibleModule, result: dict, expected_state: str) -> None:
+    # power on takes from seconds to minutes, so the poll interval grows up to 10 seconds
+    start = time.time()
+    deadline = start + module.params['timeout']
+    delay = 1.0
+    while True:
+        time.sleep(max(0, min(delay, deadline - time.time())))
+        status, sysdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/')
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=sysdata)
+        elif status != 200:
+            module.fail_json(msg=msg, status=status)
+        result['power_state'] = get_irmc_json(sysdata.json(), 'PowerState')
+        result['wait_time'] = round(time.time() - start, 1)
+        if result['power_state'] == expected_state:
+            return
+        if time.time() >= deadline:
+            result['msg'] = (
+                f"Server did not reach power state '{expected_state}' "
+                f"within {module.params['timeout']} seconds."
+            )
+            result['status'] = 21
+            module.fail_json(**result)
+        delay = min(delay * 1.5, 10)
+
+
+def get_module_args() -> dict:
+    return dict(
         irmc_url=dict(required=True, type='str'),
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'set']),
         state=dict(required=False, type='str', choices=['PowerOn', 'PowerOff', 'PowerCycle', 'GracefulPowerOff',
                                                         'ImmediateReset', 'GracefulReset', 'PulseNmi',
                                                         'PressPowerButton']),
+        wait=dict(required=False, type='bool', default=False),
+        timeout=dict(required=False, type='int', default=600),
+        token_file=dict(required=False, type='path'),
+        max_concurrent=dict(required=False, type='int', default=0),
+        stagger=dict(required=False, type='float', default=0),
     )
+
+
+def run_module(module: AnsibleModule) -> None:
+    # also called by the action plugin with the module of plugins/plugin_utils/irmc_action.py
+    irmc_powerstate(module)
+
+
+def main() -> None:
     module = AnsibleModule(
-        argument_spec=module_args,
+        argument_spec=get_module_args(),
         supports_check_mode=False,
     )
 
-    irmc_powerstate(module)
+    run_module(module)
 
 
 if __name__ == '__main__':
@@ -26,6 +26,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -63,6 +66,26 @@ options:
         description: Wait for raid session to finish.
         required:    false
         default:     true
+    max_age:
+        description: Maximum age in seconds of the RAIDAdapter profile to be reused.
+                     If the profile was generated at most 'max_age' seconds ago, the snapshot in 'cache_file'
+                     is used and the profile is not generated again.
+                     '0' means the profile is always generated again. Requires 'cache_file'.
+        required:    false
+        default:     0
+    cache_file:
+        description: Local file which keeps a snapshot of the RAIDAdapter profile per iRMC together with the time
+                     it was generated. The snapshot is removed after RAID arrays were created or deleted.
+        required:    false
+    operations:
+        description: List of create and delete operations, possibly on different adapters.
+                     Each operation has the keys 'command' ('create' or 'delete'), 'adapter', and 'level' and
+                     'name' for 'create' or 'array' for 'delete'.
+                     All operations are checked against the current configuration and applied in one RAID session.
+                     If set, 'command', 'adapter', 'array', 'level' and 'name' are ignored.
+        required:    false
+        type:        list
+        elements:    dict
 '''
 
 EXAMPLES = r'''
@@ -83,6 +106,20 @@ EXAMPLES = r'''
       ansible.builtin.debug:
         var: raid.configuration
 
+- name: Get RAID configuration, reuse RAIDAdapter profile generated within the last hour
+  fujitsu.primergy.irmc_raid:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "get"
+    max_age: 3600
+    cache_file: "{{ playbook_dir }}/raid_cache.json"
+  register: raid
+  delegate_to: localhost
+  tags:
+    - get_cached
+
 - name: Create RAID array
   fujitsu.primergy.irmc_raid:
     irmc_url: "{{ inventory_hostname }}"
@@ -109,6 +146,28 @@ EXAMPLES = r'''
   delegate_to: localhost
   tags:
     - delete
+
+- name: Create and delete RAID arrays on several adapters in one session
+  fujitsu.primergy.irmc_raid:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    operations:
+      - command: "delete"
+        adapter: "0"
+        array: "-1"
+      - command: "create"
+        adapter: "0"
+        level: "1"
+        name: "system"
+      - command: "create"
+        adapter: "1"
+        level: "5"
+        name: "data"
+  delegate_to: localhost
+  tags:
+    - batch
 '''
 
 RETURN = r'''
@@ -144,6 +203,11 @@ details_for_all:
     description: For all commands, the following value is returned.
 
     contains:
+        profile_age:
+            description: Age in seconds of the RAIDAdapter profile, '0' if it was generated by this run.
+            returned: always
+            type: int
+            sample: 1250
         log:
             description: detailed log data of RAID session
             returned: in case of error
@@ -166,6 +230,7 @@ details_for_all:
 
 
 import json
+import time
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
@@ -173,12 +238,17 @@ from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
     irmc_redfish_delete,
     irmc_redfish_get,
     irmc_redfish_post,
+    irmc_retry_argument_spec,
     waitForSessionToFinish,
 )
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_state import read_state, update_state
 
 # Global
 result = dict()
 
+# disks used at least by an array of this RAID level, the array is created from the un-used disks
+raid_level_disks = {'0': 1, '1': 2, '1E': 3, '5': 3, '6': 4, '10': 4, '50': 6, '60': 8}
+
 
 def irmc_raid(module):
     # initialize result
@@ -196,20 +266,17 @@ def irmc_raid(module):
     irmc_profile = get_raid_data(module)
     raid_configuration = get_raid_configuration(module, irmc_profile)
 
-    if module.params['command'] == 'get':
+    if module.params['command'] == 'get' and not module.params['operations']:
         result['configuration'] = raid_configuration
 
-    if module.params['command'] == 'create':
-        create_array(module, raid_configuration)
-
-    if module.params['command'] == 'delete':
-        delete_array(module, raid_configuration)
+    if module.params['command'] != 'get' or module.params['operations']:
+        apply_operations(module, raid_configuration, get_operations(module))
 
     module.exit_json(**result)
 
 
 def preliminary_parameter_check(module):
-    if module.params['command'] != 'get':
+    if module.params['command'] != 'get' or module.params['operations']:
         # Get server power state
         status, sysdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/')
         if status < 100:
@@ -220,6 +287,20 @@ def preliminary_parameter_check(module):
             result['msg'] = 'Server is powered on. Cannot continue.'
             result['status'] = 10
             module.fail_json(**result)
+    for operation in module.params['operations'] or []:
+        if operation['command'] == 'create' and operation['level'] is None or \
+           operation['command'] == 'delete' and operation['array'] is None:
+            result['msg'] = "Operation '{0}' on adapter {1} requires '{2}' to be set.". \
+                            format(operation['command'], operation['adapter'],
+                                   'level' if operation['command'] == 'create' else 'array')
+            result['status'] = 13
+            module.fail_json(**result)
+    if module.params['max_age'] > 0 and module.params['cache_file'] is None:
+        result['msg'] = "Parameter 'max_age' requires 'cache_file' to be set."
+        result['status'] = 12
+        module.fail_json(**result)
+    if module.params['operations']:
+        return
     if module.params['command'] == 'create' and \
        module.params['adapter'] is None and module.params['level'] is None:
         result['msg'] = "Command 'create' requires 'adapter' and 'level' to be set."
@@ -231,121 +312,120 @@ def preliminary_parameter_check(module):
         module.fail_json(**result)
 
 
-def create_array(module, raid_configuration):
-    for adapter in raid_configuration:
-        if adapter['id'].replace('RAIDAdapter', '') != module.params['adapter']:
-            continue
+def get_operations(module):
+    if module.params['operations']:
+        return module.params['operations']
+    return [dict((key, module.params[key]) for key in ('command', 'adapter', 'array', 'level', 'name'))]
+
+
+def apply_operations(module, raid_configuration, operations):
+    # all operations are checked against the same configuration and sent with one profile
+    adapters = dict((adapter['id'].replace('RAIDAdapter', ''), adapter) for adapter in raid_configuration)
+    actions = {}
+    free_disks = {}
+    for operation in operations:
+        adapter = adapters.get('{0}'.format(operation['adapter']))
+        if adapter is None:
+            result['msg'] = 'Specified adapter {0} does not exist.'.format(operation['adapter'])
+            result['status'] = 40
+            module.fail_json(**result)
+        lds = actions.setdefault(adapter['id'], [])
+        free_disks.setdefault(adapter['id'], len(adapter['unused_disks']))
+        if operation['command'] == 'create':
+            lds.append(create_array(module, adapter, operation, free_disks[adapter['id']]))
+            free_disks[adapter['id']] -= raid_level_disks.get(operation['level'], 1)
         else:
-            disk_data = adapter['unused_disks']
-            if not disk_data:
-                result['msg'] = 'No un-used disks available on controller {0}'.format(module.params['adapter'])
-                result['status'] = 41
-                module.fail_json(**result)
-
-            if module.params['level'] not in adapter['level']:
-                result['msg'] = 'Adapter {0} does not support RAID level {1}. Supported: {2}'. \
-                                format(module.params['adapter'], module.params['level'], adapter['level'])
-                result['status'] = 42
-                module.fail_json(**result)
-
-            if module.params['name'] is not None:
-                raid_array = {'@Action': 'Create', 'Name': module.params['name'],
-                              'RaidLevel': module.params['level']}
-            else:
-                raid_array = {'@Action': 'Create', 'RaidLevel': module.params['level']}
-
-            body = {
-                'Server': {
-                    'HWConfigurationIrmc': {
-                        '@Processing': 'execute',
-                        'Adapters': {
-                            'RAIDAdapter': [{
-                                '@AdapterId': adapter['id'],
-                                '@ConfigurationType': 'Addressing',
-                                'LogicalDrives': {
-                                    'LogicalDrive': [raid_array],
-                                },
-                            }],
-                        },
-                        '@Version': '1.00',
-                    },
-                    '@Version': '1.01',
+            deleted = [ld.get('@Number') for ld in lds if ld['@Action'] == 'Delete']
+            for ld in delete_array(module, adapter, operation):
+                disks = ld.pop('disks')
+                if ld['@Number'] not in deleted:
+                    lds.append(ld)
+                    free_disks[adapter['id']] += len(disks)
+
+    raid_adapters = []
+    for adapter_id, lds in actions.items():
+        if lds:
+            raid_adapters.append({
+                '@AdapterId': adapter_id,
+                '@ConfigurationType': 'Addressing',
+                'LogicalDrives': {
+                    'LogicalDrive': lds,
                 },
-            }
+            })
+    if not raid_adapters:
+        result['skipped'] = True
+        module.exit_json(**result)
 
-            # Set new configuration
-            apply_raid_configuration(module, body)
-            return
+    body = {
+        'Server': {
+            'HWConfigurationIrmc': {
+                '@Processing': 'execute',
+                'Adapters': {
+                    'RAIDAdapter': raid_adapters,
+                },
+                '@Version': '1.00',
+            },
+            '@Version': '1.01',
+        },
+    }
+
+    # Set new configuration
+    commands = set(operation['command'] for operation in operations)
+    apply_raid_configuration(module, body, commands.pop() if len(commands) == 1 else 'change')
+
+
+def create_array(module, adapter, operation, free_disks):
+    if operation['level'] is None or operation['level'] not in adapter['level']:
+        result['msg'] = 'Adapter {0} does not support RAID level {1}. Supported: {2}'. \
+                        format(operation['adapter'], operation['level'], adapter['level'])
+        result['status'] = 42
+        module.fail_json(**result)
 
-    result['msg'] = 'Specified adapter {0} does not exist.'.format(module.params['adapter'])
-    result['status'] = 40
-    module.fail_json(**result)
+    if free_disks <= 0:
+        result['msg'] = 'No un-used disks available on controller {0}'.format(operation['adapter'])
+        result['status'] = 41
+        module.fail_json(**result)
+    if free_disks < raid_level_disks.get(operation['level'], 1):
+        result['msg'] = 'Not enough un-used disks on controller {0} for RAID level {1}: {2}'. \
+                        format(operation['adapter'], operation['level'], free_disks)
+        result['status'] = 41
+        module.fail_json(**result)
 
+    if operation['name'] is not None:
+        return {'@Action': 'Create', 'Name': operation['name'], 'RaidLevel': operation['level']}
+    return {'@Action': 'Create', 'RaidLevel': operation['level']}
 
-def delete_array(module, raid_configuration):
-    for adapter in raid_configuration:
-        if adapter['id'].replace('RAIDAdapter', '') != module.params['adapter']:
-            continue
-        else:
-            logical_drives = adapter['logical_drives']
-
-            if not logical_drives:
-                result['msg'] = 'There are no logical drives on adapter {0}.'.format(module.params['adapter'])
-                if module.params['array'] == '-1':
-                    result['skipped'] = True
-                    module.exit_json(**result)
-                else:
-                    result['status'] = 51
-                    module.fail_json(**result)
-
-            lds = []
-            for array in logical_drives:
-                if module.params['array'] != '-1' and '{0}'.format(array['id']) != module.params['array']:
-                    ld = {'@Number': array['id'], '@Action': 'None'}
-                    continue
-                else:
-                    ld = {'@Number': array['id'], '@Action': 'Delete'}
-                lds.append(ld)
-
-            if not lds:
-                result['msg'] = 'Specified array {0} does not exist.'.format(module.params['array'])
-                result['status'] = 52
-                module.fail_json(**result)
-
-            body = {
-                'Server': {
-                    'HWConfigurationIrmc': {
-                        '@Processing': 'execute',
-                        'Adapters': {
-                            'RAIDAdapter': [{
-                                '@AdapterId': adapter['id'],
-                                '@ConfigurationType': 'Addressing',
-                                'LogicalDrives': {
-                                    'LogicalDrive': lds,
-                                },
-                            }],
-                        },
-                        '@Version': '1.00',
-                    },
-                    '@Version': '1.01',
-                },
-            }
 
-            # Set new configuration
-            apply_raid_configuration(module, body)
-            return
+def delete_array(module, adapter, operation):
+    array_id = '{0}'.format(operation['array'])
+    logical_drives = adapter['logical_drives']
+
+    if not logical_drives:
+        result['msg'] = 'There are no logical drives on adapter {0}.'.format(operation['adapter'])
+        if array_id == '-1':
+            return []
+        result['status'] = 51
+        module.fail_json(**result)
 
-    result['msg'] = 'Specified adapter {0} does not exist.'.format(module.params['adapter'])
-    result['status'] = 40
-    module.fail_json(**result)
+    # the disks are only used to count the disks which become available
+    lds = []
+    for array in logical_drives:
+        if array_id == '-1' or '{0}'.format(array['id']) == array_id:
+            lds.append({'@Number': array['id'], '@Action': 'Delete', 'disks': array['disks']})
 
+    if not lds:
+        result['msg'] = 'Specified array {0} does not exist.'.format(operation['array'])
+        result['status'] = 52
+        module.fail_json(**result)
+    return lds
 
-def apply_raid_configuration(module, body):
+
+def apply_raid_configuration(module, body, command):
     status, sysdata, msg = irmc_redfish_post(module, 'rest/v1/Oem/eLCM/ProfileManagement/set', json.dumps(body))
     if status < 100:
         module.fail_json(msg=msg, status=status, exception=sysdata)
     elif status == 406:
-        result['msg'] = 'Raid Configuration cannot be {0}d.'.format(module.params['command'])
+        result['msg'] = 'Raid Configuration cannot be {0}d.'.format(command)
         module.fail_json(msg=msg, status=status)
     elif status not in (200, 202, 204):
         module.fail_json(msg=msg, status=status)
@@ -359,10 +439,22 @@ def apply_raid_configuration(module, body):
             module.fail_json(msg=msg, log=data, status=status)
 
     result['changed'] = True
+    # RAIDAdapter profile does not match the configuration any more
+    if module.params['cache_file'] is not None:
+        update_state(module.params['cache_file'], module.params['irmc_url'], None)
 
 
 def get_raid_data(module):
+    # the iRMC does not report when a profile was generated, so the age is kept with the local snapshot
+    if module.params['cache_file'] is not None and module.params['max_age'] > 0:
+        snapshot = read_state(module.params['cache_file'], module.params['irmc_url']) or {}
+        age = time.time() - snapshot.get('generated', 0)
+        if 'profile' in snapshot and 0 <= age <= module.params['max_age']:
+            result['profile_age'] = int(age)
+            return snapshot['profile']
+
     # make sure RAIDAdapter profile is up-to-date
+    generated = time.time()
     status, sysdata, msg = irmc_redfish_delete(module, '/rest/v1/Oem/eLCM/ProfileManagement/RAIDAdapter')
     if status < 100:
         module.fail_json(msg=msg, status=status, exception=sysdata)
@@ -399,57 +491,78 @@ def get_raid_data(module):
     elif status != 200:
         module.fail_json(msg=msg, status=status)
 
+    result['profile_age'] = 0
+    if module.params['cache_file'] is not None:
+        update_state(module.params['cache_file'], module.params['irmc_url'],
+                     {'generated': generated, 'profile': sysdata.json()})
     return sysdata.json()
 
 
 def get_raid_configuration(module, irmc_profile):
+    controllers = get_storage_controllers(module)
     raid_configuration = []
-    for adapter in get_irmc_json(irmc_profile, ['Server', 'HWConfigurationIrmc', 'Adapters', 'RAIDAdapter']):
-        adapter_list = get_adapter(module, adapter)
-        disk_data = get_irmc_json(adapter, ['PhysicalDisks', 'PhysicalDisk'])
-        ld_data = get_irmc_json(adapter, ['LogicalDrives', 'LogicalDrive'])
-        for pd in disk_data:
-            disk_list = get_disk(pd)
-            adapter_list['unused_disks'].append(disk_list)
-        if 'Key' not in ld_data:
-            for ld in ld_data:
-                array_list = get_logicaldrive(ld)
-                for ref in get_irmc_json(ld, ['ArrayRefs', 'ArrayRef']):
-                    for array in get_irmc_json(adapter, ['Arrays', 'Array']):
-                        if get_irmc_json(ref, ['@Number']) == get_irmc_json(array, ['@Number']):
-                            for disk in get_irmc_json(array, ['PhysicalDiskRefs', 'PhysicalDiskRef']):
-                                for pd in disk_data:
-                                    if get_irmc_json(disk, ['@Number']) == get_irmc_json(pd, ['@Number']):
-                                        break
-                                disk_list = get_disk(pd)
-                                array_list['disks'].append(disk_list)
-                                adapter_list['unused_disks'].remove(disk_list)
-                adapter_list['logical_drives'].append(array_list)
+    for adapter in get_profile_list(irmc_profile, ['Server', 'HWConfigurationIrmc', 'Adapters', 'RAIDAdapter']):
+        adapter_list = get_adapter(adapter, controllers)
+        disk_data = get_profile_list(adapter, ['PhysicalDisks', 'PhysicalDisk'])
+        disks = dict((get_irmc_json(pd, ['@Number']), pd) for pd in disk_data)
+        arrays = dict((get_irmc_json(array, ['@Number']), array)
+                      for array in get_profile_list(adapter, ['Arrays', 'Array']))
+        used_disks = set()
+        for ld in get_profile_list(adapter, ['LogicalDrives', 'LogicalDrive']):
+            array_list = get_logicaldrive(ld)
+            for ref in get_profile_list(ld, ['ArrayRefs', 'ArrayRef']):
+                array = arrays.get(get_irmc_json(ref, ['@Number']))
+                if array is None:
+                    continue
+                for disk in get_profile_list(array, ['PhysicalDiskRefs', 'PhysicalDiskRef']):
+                    number = get_irmc_json(disk, ['@Number'])
+                    if number in disks:
+                        array_list['disks'].append(get_disk(disks[number]))
+                        used_disks.add(number)
+            adapter_list['logical_drives'].append(array_list)
+        adapter_list['unused_disks'] = [get_disk(pd) for pd in disk_data
+                                        if get_irmc_json(pd, ['@Number']) not in used_disks]
         raid_configuration.append(adapter_list)
     return raid_configuration
 
 
-def get_adapter(module, adapter):
+def get_profile_list(data, keys):
+    # profile lists with a single element may be returned as object, missing lists as 'Key ... does not exist'
+    value = get_irmc_json(data, keys)
+    if isinstance(value, dict):
+        return [value]
+    if isinstance(value, list):
+        return value
+    return []
+
+
+def get_storage_controllers(module):
+    status, hwdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/Storage?$expand=Members')
+    if status < 100:
+        module.fail_json(msg=msg, status=status, exception=hwdata)
+    elif status != 200:
+        module.fail_json(msg=msg, status=status)
+    controllers = {}
+    for member in get_profile_list(hwdata.json(), ['Members']):
+        # iRMC has each StorageController with its own Storage
+        for sc in get_profile_list(member, ['StorageControllers']):
+            controllers.setdefault(get_irmc_json(sc, ['MemberId']), sc)
+    return controllers
+
+
+def get_adapter(adapter, controllers):
     ctrl = {}
     ctrl['id'] = get_irmc_json(adapter, ['@AdapterId'])
     ctrl['name'] = ctrl['id']
     ctrl['level'] = get_irmc_json(adapter, ['Features', 'RaidLevel'])
     ctrl['logical_drives'] = []
     ctrl['unused_disks'] = []
-    status, hwdata, msg = irmc_redfish_get(module, 'redfish/v1/Systems/0/Storage?$expand=Members')
-    if status < 100:
-        module.fail_json(msg=msg, status=status, exception=hwdata)
-    elif status != 200:
-        module.fail_json(msg=msg, status=status)
-    for member in get_irmc_json(hwdata.json(), 'Members'):
-        # iRMC has each StroageController with its own Storage
-        for sc in get_irmc_json(member, 'StorageControllers'):
-            if get_irmc_json(adapter, ['@AdapterId']).replace('RAIDAdapter', '') == get_irmc_json(sc, ['MemberId']):
-                ctrl['name'] = get_irmc_json(sc, ['Model'])
-                ctrl['firmware'] = get_irmc_json(sc, ['FirmwareVersion'])
-                ctrl['drives'] = get_irmc_json(sc, ['Oem', 'ts_fujitsu', 'DriveCount'])
-                ctrl['volumes'] = get_irmc_json(sc, ['Oem', 'ts_fujitsu', 'VolumeCount'])
-                break
+    sc = controllers.get(ctrl['id'].replace('RAIDAdapter', ''))
+    if sc is not None:
+        ctrl['name'] = get_irmc_json(sc, ['Model'])
+        ctrl['firmware'] = get_irmc_json(sc, ['FirmwareVersion'])
+        ctrl['drives'] = get_irmc_json(sc, ['Oem', 'ts_fujitsu', 'DriveCount'])
+        ctrl['volumes'] = get_irmc_json(sc, ['Oem', 'ts_fujitsu', 'VolumeCount'])
     return(ctrl)
 
 
@@ -478,13 +591,23 @@ def main():
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
-        command=dict(required=False, type='str', default='list',
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
+        command=dict(required=False, type='str', default='get',
                      choices=['get', 'create', 'delete']),
         adapter=dict(required=False, type='str'),
         array=dict(required=False, type='str'),
         level=dict(required=False, type='str'),
         name=dict(required=False, type='str'),
         wait_for_finish=dict(required=False, type='bool', default=True),
+        max_age=dict(required=False, type='int', default=0),
+        cache_file=dict(required=False, type='path'),
+        operations=dict(required=False, type='list', elements='dict', options=dict(
+            command=dict(required=True, type='str', choices=['create', 'delete']),
+            adapter=dict(required=True, type='str'),
+            array=dict(required=False, type='str'),
+            level=dict(required=False, type='str'),
+            name=dict(required=False, type='str'),
+        )),
     )
     module = AnsibleModule(
         argument_spec=module_args,
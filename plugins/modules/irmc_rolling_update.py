@@ -0,0 +1,294 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+
+DOCUMENTATION = r'''
+---
+module: irmc_rolling_update
+
+short_description: update iRMC Firmware or server BIOS of many servers in waves
+
+description:
+    - Ansible module to update iRMC Firmware or BIOS of many servers from one task via iRMC RedFish interface.
+    - Servers are grouped into waves by model. Within a wave at most 'max_in_flight' updates run at the same time,
+      and all running updates are polled together.
+    - No further updates are started once more than 'max_failures' servers failed.
+    - With 'state_file', an interrupted rollout continues with the servers which are not done yet.
+    - Module Version V1.3.0.
+
+requirements:
+    - The module needs to run locally, once per play (e.g. with 'run_once').
+    - iRMC S6.
+    - Python >= 3.10
+    - Python modules 'requests', 'urllib3', 'requests_toolbelt'
+
+version_added: "2.1.0"
+
+author:
+    - Fsas Technologies Inc.
+
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
+options:
+    irmc_hosts:
+        description: IP addresses or DNS names of the iRMCs to be updated.
+        required:    true
+        type:        list
+        elements:    str
+    irmc_username:
+        description: iRMC user for basic authentication, the same for all iRMCs.
+        required:    true
+    irmc_password:
+        description: Password for iRMC user for basic authentication.
+        required:    true
+    validate_certs:
+        description: Evaluate SSL certificate (set to false for self-signed certificate).
+        required:    false
+        default:     true
+    update_source:
+        description: Where to get the FW or BIOS update file.
+        required:    true
+        choices:     ['tftp', 'file']
+    update_type:
+        description: Whether to update iRMC FW or server BIOS.
+        required:    true
+        choices:     ['irmc', 'bios']
+    server_name:
+        description: TFTP server name or IP, e.g. returned by 'fujitsu.primergy.irmc_firmware_server'.
+                     Required for update_source='tftp'.
+        required:    false
+    file_name:
+        description: Path to file containing correct iRMC FW or server BIOS image,
+                     for update_source='tftp' the path on the TFTP server.
+                     Used for servers whose model is not in 'file_name_mapping'.
+        required:    false
+    file_name_mapping:
+        description: Image per model name of the server (e.g. 'PRIMERGY_RX1330_M6S'), same format as 'file_name'.
+                     Servers without image are skipped.
+        required:    false
+        type:        dict
+    irmc_flash_selector:
+        description: Which iRMC image to replace with the new firmware.
+        required:    false
+        choices:     ['Auto', 'LowFWImage', 'HighFWImage']
+    irmc_boot_selector:
+        description: Which iRMC FW image is to be started after iRMC reboot.
+        required:    false
+        choices:     ['Auto', 'LowFWImage', 'HighFWImage']
+    skip_if_current:
+        description: Skip servers which already run the version in the image file name.
+        required:    false
+        default:     false
+    ignore_power_on:
+        description: Ignore that server is powered on. Otherwise powered on servers are skipped.
+        required:    false
+        default:     false
+    wave_size:
+        description: Maximum number of servers per wave. '0' means one wave per model.
+        required:    false
+        default:     0
+    max_in_flight:
+        description: Maximum number of updates running at the same time.
+        required:    false
+        default:     4
+    max_failures:
+        description: Number of failed servers which is tolerated. No further updates are started once it is exceeded.
+        required:    false
+        default:     0
+    timeout:
+        description: Timeout for BIOS/iRMC FW flash process of each server in minutes.
+        required:    false
+        default:     30
+    poll_interval:
+        description: Time in seconds between two polls of the running updates.
+        required:    false
+        default:     10
+    state_file:
+        description: Local file which keeps the state of every server.
+                     Servers which finished or already run the version are not updated again,
+                     updates which were running when the rollout was interrupted are polled again.
+        required:    false
+'''
+
+EXAMPLES = r'''
+# Update BIOS of all servers in waves of 10, two updates at a time, served by a controller-side TFTP server
+- block:
+  - name: Start TFTP server for BIOS images
+    fujitsu.primergy.irmc_firmware_server:
+      command: "start"
+      state_file: "{{ playbook_dir }}/firmware_server.json"
+      path: "/data/firmware"
+    register: firmware_server
+  - name: Update BIOS of all servers in waves
+    fujitsu.primergy.irmc_rolling_update:
+      irmc_hosts: "{{ ansible_play_hosts }}"
+      irmc_username: "{{ irmc_user }}"
+      irmc_password: "{{ irmc_password }}"
+      validate_certs: "{{ validate_certificate }}"
+      update_source: "tftp"
+      update_type: "bios"
+      server_name: "{{ firmware_server.server.server_name }}"
+      file_name_mapping:
+        PRIMERGY_RX1330_M5R: "RX1330_M5R/bios/D3929-A1x.R1.41.0.UPC"
+        PRIMERGY_RX1330_M6S: "RX1330_M6/bios/D4133-A1x.R1.1.0.UPC"
+      skip_if_current: true
+      wave_size: 10
+      max_in_flight: 2
+      max_failures: 1
+      state_file: "{{ playbook_dir }}/rolling_update.json"
+    register: rolling_update
+  - name: Show rolling update result
+    debug:
+      var: rolling_update.summary
+  always:
+  - name: Stop TFTP server
+    fujitsu.primergy.irmc_firmware_server:
+      command: "stop"
+      state_file: "{{ playbook_dir }}/firmware_server.json"
+  run_once: true
+  delegate_to: localhost
+  tags:
+    - rolling_update_bios
+'''
+
+RETURN = r'''
+hosts:
+    description:
+        State of every server, one of 'finished', 'reboot_required', 'stopped', 'current',
+        'skipped', 'failed' or 'not_started', with model, versions and message.
+    returned: always
+    type: dict
+    sample:
+        {
+            "192.0.2.101": {
+                "current_version": "V5.0.0.11 R1.20.0 for D3279-B1x",
+                "file_name": "RX1330_M6/bios/D4133-A1x.R1.1.0.UPC",
+                "finished": "2024-07-24 16:02:11",
+                "image_version": "R1.1.0",
+                "model": "PRIMERGY RX1330 M6S",
+                "msg": null,
+                "power_state": "Off",
+                "started": "2024-07-24 15:57:40",
+                "state": "finished"
+            }
+        }
+
+waves:
+    description: Servers grouped into waves in the order of the rollout.
+    returned: always
+    type: list
+    sample: [["192.0.2.101", "192.0.2.102"], ["192.0.2.103"]]
+
+summary:
+    description: Number of servers per state.
+    returned: always
+    type: dict
+    sample: { "current": 1, "failed": 0, "finished": 2 }
+
+aborted:
+    description: Whether the rollout stopped because more than 'max_failures' servers failed.
+    returned: always
+    type: bool
+'''
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_rolling_update import IrmcHost, RollingUpdate
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_retry_policy, \
+    irmc_retry_argument_spec
+
+# Global
+result = dict()
+
+
+def irmc_rolling_update(module):
+    # initialize result
+    result['changed'] = False
+    result['status'] = 0
+
+    if module.check_mode:
+        result['msg'] = 'module was not run'
+        module.exit_json(**result)
+
+    preliminary_parameter_check(module)
+
+    retry_policy = get_irmc_retry_policy(module)
+    connections = dict((host, IrmcHost(host, module.params['irmc_username'], module.params['irmc_password'],
+                                       module.params['validate_certs'], retry_policy))
+                       for host in module.params['irmc_hosts'])
+    rollout = RollingUpdate(connections, module.params, state_file=module.params['state_file'])
+    result['hosts'] = rollout.run()
+    result['waves'] = rollout.waves
+    result['aborted'] = rollout.aborted
+    result['summary'] = {}
+    for host in result['hosts'].values():
+        result['summary'][host['state']] = result['summary'].get(host['state'], 0) + 1
+        host.pop('location', None)
+        host.pop('reboot_done', None)
+        host.pop('started_ts', None)
+    result['changed'] = any(host['state'] in ('finished', 'reboot_required') for host in result['hosts'].values())
+
+    if rollout.aborted:
+        result['msg'] = '{0} servers failed, more than {1} tolerated. Rollout stopped.'. \
+                        format(rollout.get_failures(), module.params['max_failures'])
+        result['status'] = 40
+        module.fail_json(**result)
+    if rollout.get_failures():
+        result['warnings'] = '{0} servers failed.'.format(rollout.get_failures())
+    module.exit_json(**result)
+
+
+def preliminary_parameter_check(module):
+    if module.params['update_source'] == 'tftp' and module.params['server_name'] is None:
+        result['msg'] = "TFTP update requires 'server_name' parameter to be set!"
+        result['status'] = 11
+        module.fail_json(**result)
+    if module.params['file_name'] is None and not module.params['file_name_mapping']:
+        result['msg'] = "Parameter 'file_name' or 'file_name_mapping' is required!"
+        result['status'] = 10
+        module.fail_json(**result)
+    if module.params['max_in_flight'] < 1 or module.params['max_failures'] < 0 or module.params['wave_size'] < 0 or \
+       module.params['poll_interval'] < 1:
+        result['msg'] = "Parameters 'max_in_flight' and 'poll_interval' must be positive, " \
+                        "'max_failures' and 'wave_size' must not be negative!"
+        result['status'] = 12
+        module.fail_json(**result)
+
+
+def main():
+    # import pdb; pdb.set_trace()
+    module_args = dict(
+        irmc_hosts=dict(required=True, type='list', elements='str'),
+        irmc_username=dict(required=True, type='str'),
+        irmc_password=dict(required=True, type='str', no_log=True),
+        validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
+        update_source=dict(required=True, type='str', choices=['tftp', 'file']),
+        update_type=dict(required=True, type='str', choices=['irmc', 'bios']),
+        server_name=dict(required=False, type='str'),
+        file_name=dict(required=False, type='str'),
+        file_name_mapping=dict(required=False, type='dict'),
+        irmc_flash_selector=dict(required=False, type='str', choices=['Auto', 'LowFWImage', 'HighFWImage']),
+        irmc_boot_selector=dict(required=False, type='str', choices=['Auto', 'LowFWImage', 'HighFWImage']),
+        skip_if_current=dict(required=False, type='bool', default=False),
+        ignore_power_on=dict(required=False, type='bool', default=False),
+        wave_size=dict(required=False, type='int', default=0),
+        max_in_flight=dict(required=False, type='int', default=4),
+        max_failures=dict(required=False, type='int', default=0),
+        timeout=dict(required=False, type='int', default=30),
+        poll_interval=dict(required=False, type='int', default=10),
+        state_file=dict(required=False, type='path'),
+    )
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False,
+    )
+
+    irmc_rolling_update(module)
+
+
+if __name__ == '__main__':
+    main()
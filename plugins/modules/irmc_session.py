@@ -25,6 +25,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -41,12 +44,30 @@ options:
         default:     true
     command:
         description: Handle iRMC sessions.
+                     'removeterminated' removes all terminated sessions which are not owned by iRMC.
         required:    false
         default:     list
-        choices:     ['list', 'get', 'remove', 'terminate', 'clearall']
+        choices:     ['list', 'get', 'remove', 'terminate', 'clearall', 'removeterminated']
     id:
         description: Specific session to get, remove or terminate.
         required:    false
+    session_state:
+        description: Only handle sessions in this state.
+                     Only evaluated for command='list'.
+        required:    false
+        default:     all
+        choices:     ['all', 'active', 'terminated']
+    work_sequence:
+        description: Only handle sessions whose work sequence contains one of these strings
+                     (e.g. 'Profile', 'Update'). Sessions are filtered before their status is read.
+                     Only evaluated for command='list' and command='removeterminated'.
+        required:    false
+        type:        list
+        elements:    str
+    max_workers:
+        description: Maximum number of session requests which are sent in parallel.
+        required:    false
+        default:     8
 '''
 
 EXAMPLES = r'''
@@ -106,6 +127,35 @@ EXAMPLES = r'''
       ansible.builtin.debug:
         var: result
 
+# List active iRMC profile sessions
+- name: List active iRMC profile sessions
+  fujitsu.primergy.irmc_session:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "list"
+    session_state: "active"
+    work_sequence:
+      - "Profile"
+  delegate_to: localhost
+  register: result
+  tags:
+    - list_active
+
+# Remove all terminated sessions
+- name: Remove all terminated sessions
+  fujitsu.primergy.irmc_session:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    command: "removeterminated"
+  delegate_to: localhost
+  register: result
+  tags:
+    - removeterminated
+
 # Clear all sessions information
 - name: Clear all sessions information
   fujitsu.primergy.irmc_session:
@@ -197,6 +247,15 @@ details_for_get:
             type: string
             sample: terminated regularly
 
+details_for_removeterminated:
+    description: If command is “removeterminated”, the following values are returned.
+    contains:
+        removed_sessions:
+            description: IDs of the removed sessions
+            returned: always
+            type: list
+            sample: [3, 4]
+
 otherwise:
     description: >
         For other commands ("remove", "terminate", etc.),
@@ -207,7 +266,14 @@ otherwise:
 from typing import Any
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, irmc_redfish_delete, irmc_redfish_get
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
+    get_irmc_json,
+    irmc_redfish_delete,
+    irmc_redfish_delete_parallel,
+    irmc_redfish_get,
+    irmc_redfish_get_parallel,
+    irmc_retry_argument_spec,
+)
 
 # Global
 result = dict()
@@ -225,26 +291,22 @@ def irmc_session(module: AnsibleModule) -> None:
     # preliminary parameter check
     preliminary_parameter_check(module)
 
-    sessions = get_irmc_sessions(module)
-    if module.params['command'] == 'list':
-        result['sessions'] = {}
+    sessions = [item for _key, session in get_irmc_sessions(module).items() for item in session]
     id_found = 0
 
-    for _key, session in sessions.items():
-        for item in session:
-            if module.params['command'] == 'clearall':
-                id_found += 1
-                if 'Profile' not in item['#text']:
-                    continue
-                handle_irmc_session(module, 'remove', item)
-            elif module.params['command'] == 'list':
-                id_found += 1
-                result['sessions']['session{0}'.format(item['@Id'])] = get_irmc_session_info(module, item)
-            elif item['@Id'] == module.params['id']:
+    if module.params['command'] == 'list':
+        result['sessions'] = {}
+        for session in get_irmc_session_infos(module, filter_work_sequence(module, sessions)):
+            if match_session_state(module, session['Status']):
+                result['sessions']['session{0}'.format(session['Id'])] = session
+    elif module.params['command'] in ('clearall', 'removeterminated'):
+        id_found = len(sessions)
+        remove_terminated_sessions(module, sessions)
+    else:
+        for item in sessions:
+            if item['@Id'] == module.params['id']:
                 id_found += 1
-                if module.params['command'] in ('terminate', 'remove') and \
-                   'Profile' not in item['#text'] and 'Update' not in item['#text'] and \
-                   'Configuration' not in item['#text']:
+                if module.params['command'] in ('terminate', 'remove') and not is_removable_session(item):
                     result['msg'] = "Session '{0}/{1}' is owned by iRMC. It cannot be {2}d.".format(item['@Id'], item['#text'], module.params['command'])
                     result['status'] = 11
                     module.fail_json(**result)
@@ -266,6 +328,28 @@ def preliminary_parameter_check(module: AnsibleModule) -> None:
         result['msg'] = "Command '{0}' requires 'id' parameter to be set!".format(module.params['command'])
         result['status'] = 10
         module.fail_json(**result)
+    if module.params['max_workers'] < 1:
+        result['msg'] = "Parameter 'max_workers' needs to be at least 1!"
+        result['status'] = 13
+        module.fail_json(**result)
+
+
+def is_removable_session(item) -> bool:
+    return 'Profile' in item['#text'] or 'Update' in item['#text'] or 'Configuration' in item['#text']
+
+
+def filter_work_sequence(module: AnsibleModule, sessions) -> list:
+    if not module.params['work_sequence']:
+        return sessions
+    return [item for item in sessions if any(text in item['#text'] for text in module.params['work_sequence'])]
+
+
+def match_session_state(module: AnsibleModule, sstatus) -> bool:
+    if module.params['session_state'] == 'terminated':
+        return 'terminated' in sstatus
+    if module.params['session_state'] == 'active':
+        return 'terminated' not in sstatus
+    return True
 
 
 def get_irmc_sessions(module: AnsibleModule):
@@ -277,21 +361,48 @@ def get_irmc_sessions(module: AnsibleModule):
     return get_irmc_json(sessiondata.json(), ['SessionList'])
 
 
-def get_irmc_session_info(module: AnsibleModule, item) -> dict[str, Any]:
-    status, sdata, msg = irmc_redfish_get(module, 'sessionInformation/{0}/status'.format(item['@Id']))
-    if status < 100:
-        module.fail_json(msg=msg, status=status, exception=sdata)
-    elif status not in (200, 202, 204):
-        module.fail_json(msg=msg, status=status)
+def get_irmc_session_infos(module: AnsibleModule, sessions) -> list[dict[str, Any]]:
+    uris = ['sessionInformation/{0}/status'.format(item['@Id']) for item in sessions]
+    responses = irmc_redfish_get_parallel(module, uris, module.params['max_workers'])
+
+    infos = []
+    for item, (status, sdata, msg) in zip(sessions, responses):
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=sdata)
+        elif status not in (200, 202, 204):
+            module.fail_json(msg=msg, status=status)
+
+        sdata = get_irmc_json(sdata.json(), 'Session')
+        session = {}
+        session['Id'] = item['@Id']
+        session['Text'] = item['#text']
+        session['Tag'] = item['@Tag']
+        session['Status'] = get_irmc_json(sdata, 'Status')
+        session['Start'] = get_irmc_json(sdata, 'Start')
+        session['Duration'] = get_irmc_json(sdata, 'Duration')
+        infos.append(session)
+    return infos
+
+
+def remove_terminated_sessions(module: AnsibleModule, sessions) -> None:
+    if module.params['command'] == 'clearall':
+        sessions = [item for item in sessions if 'Profile' in item['#text']]
+    else:
+        sessions = filter_work_sequence(module, [item for item in sessions if is_removable_session(item)])
 
-    session = {}
-    session['Id'] = item['@Id']
-    session['Text'] = item['#text']
-    session['Tag'] = item['@Tag']
-    session['Status'] = get_irmc_json(sdata.json(), ['Session', 'Status'])
-    session['Start'] = get_irmc_json(sdata.json(), ['Session', 'Start'])
-    session['Duration'] = get_irmc_json(sdata.json(), ['Session', 'Duration'])
-    return session
+    terminated = [session['Id'] for session in get_irmc_session_infos(module, sessions)
+                  if 'terminated' in session['Status']]
+    uris = ['sessionInformation/{0}/remove'.format(session_id) for session_id in terminated]
+    for status, sdata, msg in irmc_redfish_delete_parallel(module, uris, module.params['max_workers']):
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=sdata)
+        elif status not in (200, 202, 204):
+            module.fail_json(msg=msg, status=status)
+
+    if module.params['command'] == 'removeterminated':
+        result['removed_sessions'] = terminated
+    if terminated:
+        result['changed'] = True
 
 
 def handle_irmc_session(module: AnsibleModule, command, item) -> None:
@@ -334,9 +445,14 @@ def main() -> None:
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='list',
-                     choices=['list', 'get', 'remove', 'terminate', 'clearall']),
+                     choices=['list', 'get', 'remove', 'terminate', 'clearall', 'removeterminated']),
         id=dict(required=False, type='int'),
+        session_state=dict(required=False, type='str', default='all',
+                           choices=['all', 'active', 'terminated']),
+        work_sequence=dict(required=False, type='list', elements='str'),
+        max_workers=dict(required=False, type='int', default=8),
     )
     module = AnsibleModule(
         argument_spec=module_args,
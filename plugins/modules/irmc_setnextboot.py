@@ -25,6 +25,9 @@ version_added: "2.4"
 author:
     - Nakamura Takayuki (@nakamura-taka)
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -82,7 +85,12 @@ from http import HTTPStatus
 from typing import Any
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import get_irmc_json, irmc_redfish_get, irmc_redfish_patch
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
+    get_irmc_json,
+    irmc_redfish_get,
+    irmc_redfish_patch,
+    irmc_retry_argument_spec,
+)
 
 
 def irmc_setnextboot(module: AnsibleModule) -> None:
@@ -152,6 +160,7 @@ def main() -> None:
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         bootsource=dict(required=False, type='str', default='BiosSetup',
                         choices=['None', 'Pxe', 'Cd', 'Hdd', 'BiosSetup']),
         bootoverride=dict(required=False, type='str', default='Once', choices=['Once', 'Continuous']),
@@ -44,6 +44,9 @@ unresolved_issues_in_iRMC_S6:
       the display in the iRMC(GUI) does not change.
     - The `email_type` parameter cannot be set to `"REMCS"`.
 
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
 options:
     irmc_url:
         description: IP address of the iRMC to be requested for data.
@@ -461,6 +464,7 @@ details:
 
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import irmc_retry_argument_spec
 from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_scci_utils import (
     add_scci_command,
     get_key_for_value,
@@ -716,6 +720,7 @@ def main() -> None:
         irmc_username=dict(required=True, type='str'),
         irmc_password=dict(required=True, type='str', no_log=True),
         validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
         command=dict(required=False, type='str', default='get', choices=['get', 'change', 'create', 'delete']),
         name=dict(required=True, type='str'),
         password=dict(required=False, type='str', no_log=True),
@@ -0,0 +1,461 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+
+DOCUMENTATION = r'''
+---
+module: irmc_virtualmedia_boot
+
+short_description: boot server from iRMC Virtual Media
+
+description:
+    - Ansible module to boot a PRIMERGY server from an iRMC Virtual Media image via iRMC RedFish interface.
+    - Disconnects the Virtual Media, sets the Virtual Media Data, connects the Virtual Media, sets the next boot
+      source and powers on the server in one task, the same as 'fujitsu.primergy.irmc_connectvm',
+      'fujitsu.primergy.irmc_setvm', 'fujitsu.primergy.irmc_setnextboot' and 'fujitsu.primergy.irmc_powerstate'.
+    - All requests share one connection to the iRMC. Steps whose target state is already reached are skipped.
+    - The password of the share cannot be read from the iRMC, a changed 'vm_password' alone is not detected.
+    - The module will abort by default if the PRIMERGY server is powered on.
+    - Module Version V1.3.0.
+
+requirements:
+    - The module needs to run locally.
+    - iRMC S6.
+    - Python >= 3.10
+    - Python modules 'requests', 'urllib3'
+
+version_added: "2.1.0"
+
+author:
+    - Fsas Technologies Inc.
+
+extends_documentation_fragment:
+    - fujitsu.primergy.irmc_retry
+
+options:
+    irmc_url:
+        description: IP address of the iRMC to be requested for data.
+        required:    true
+    irmc_username:
+        description: iRMC user for basic authentication.
+        required:    true
+    irmc_password:
+        description: Password for iRMC user for basic authentication.
+        required:    true
+    validate_certs:
+        description: Evaluate SSL certificate (set to false for self-signed certificate).
+        required:    false
+        default:     true
+    vm_type:
+        description: The virtual media type to boot from.
+        required:    false
+        default:     CDImage
+        choices:     ['CDImage', 'HDImage']
+    server:
+        description: Remote server (IP or DNS name) where the image is located.
+        required:    true
+    share:
+        description: Path on the remote server where the image is located.
+        required:    true
+    image:
+        description: Name of the remote image.
+        required:    true
+    share_type:
+        description: Share type (NFS share or SMB share).
+        required:    false
+        choices:     ['NFS', 'SMB']
+    vm_domain:
+        description: User domain in case of SMB share.
+        required:    false
+    vm_user:
+        description: User account in case of SMB share.
+        required:    false
+    vm_password:
+        description: User password in case of SMB share.
+        required:    false
+    force_remotemount_enabled:
+        description: Forces iRMC to enable the remote mount feature.
+        required:    false
+        default:     false
+    force_mediatype_active:
+        description: Forces iRMC to activate one of the required remote media types.
+        required:    false
+        default:     false
+    bootsource:
+        description: The source for the next boot.
+        required:    false
+        default:     Cd
+        choices:     ['None', 'Pxe', 'Cd', 'Hdd', 'BiosSetup']
+    bootoverride:
+        description: Boot override type.
+        required:    false
+        default:     Once
+        choices:     ['Once', 'Continuous']
+    bootmode:
+        description: The mode for the next boot.
+        required:    false
+        choices:     ['UEFI', 'Legacy']
+    power_on:
+        description: Power on the server after the Virtual Media is connected.
+        required:    false
+        default:     true
+    ignore_power_on:
+        description: Ignore that server is powered on.
+        required:    false
+        default:     false
+    timeout:
+        description: Timeout in seconds for the Virtual Media to be connected or disconnected.
+        required:    false
+        default:     60
+'''
+
+EXAMPLES = r'''
+# Boot server from virtual CD
+- name: Boot server from virtual CD
+  fujitsu.primergy.irmc_virtualmedia_boot:
+    irmc_url: "{{ inventory_hostname }}"
+    irmc_username: "{{ irmc_user }}"
+    irmc_password: "{{ irmc_password }}"
+    validate_certs: "{{ validate_certificate }}"
+    server: "{{ server }}"
+    share: "{{ share }}"
+    image: "{{ image }}"
+    share_type: "{{ share_type }}"
+    force_remotemount_enabled: true
+    force_mediatype_active: true
+    bootsource: "Cd"
+    bootoverride: "Once"
+    bootmode: "UEFI"
+  register: vmboot
+  delegate_to: localhost
+  tags:
+    - boot
+'''
+
+RETURN = r'''
+steps:
+    description: Steps which were executed, in order.
+    returned: always
+    type: list
+    sample: ["disconnect", "configure", "connect", "next_boot", "power_on"]
+
+power_state:
+    description: Server power state before the server was powered on.
+    returned: always
+    type: string
+    sample: Off
+
+virtual_media_data:
+    description: Virtual Media Data and next boot settings, the same keys as returned by 'fujitsu.primergy.irmc_getvm'.
+    returned: always
+    type: dict
+    sample:
+        {
+            "CDImage": "Connected",
+            "bootmode": "UEFI",
+            "bootoverride": "Once",
+            "bootsource": "Cd",
+            "image_name": "mybootimage.iso",
+            "server": "192.168.2.1",
+            "share_name": "isoimages",
+            "share_type": "NFS"
+        }
+'''
+
+
+import json
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import (
+    get_irmc_json,
+    irmc_redfish_get,
+    irmc_redfish_keepalive,
+    irmc_redfish_patch,
+    irmc_redfish_post,
+    irmc_retry_argument_spec,
+)
+
+# Global
+result = dict()
+
+system_url = 'redfish/v1/Systems/0/'
+vm_url = 'redfish/v1/Systems/0/Oem/ts_fujitsu/VirtualMedia/'
+
+
+def irmc_virtualmedia_boot(module):
+    # initialize result
+    result['changed'] = False
+    result['status'] = 0
+    result['steps'] = []
+
+    if module.check_mode:
+        result['msg'] = 'module was not run'
+        module.exit_json(**result)
+
+    with irmc_redfish_keepalive(module):
+        boot_from_virtualmedia(module)
+
+    result['changed'] = len(result['steps']) > 0
+    module.exit_json(**result)
+
+
+def boot_from_virtualmedia(module):
+    vm_type = module.params['vm_type']
+    vm_device = vm_type.replace('Image', '')
+
+    sysdata = get_data(module, system_url)
+    result['power_state'] = get_irmc_json(sysdata, 'PowerState')
+    if result['power_state'] == 'On' and not module.params['ignore_power_on']:
+        result['msg'] = 'Server is powered on. Cannot continue.'
+        result['status'] = 10
+        module.fail_json(**result)
+
+    vmdata = get_data(module, vm_url)
+    if not is_vm_configured(module, vmdata) or get_vm_state(sysdata, vm_device) != 'Connected':
+        if get_vm_state(sysdata, vm_device) == 'Connected':
+            post_vm_action(module, sysdata, 'Disconnect' + vm_device)
+            sysdata = wait_for_vm_state(module, vm_device, 'Disconnected')
+            result['steps'].append('disconnect')
+
+        if not is_vm_configured(module, vmdata):
+            body = setup_vm_body(module, vmdata)
+            status, patch, msg = irmc_redfish_patch(module, vm_url, json.dumps(body),
+                                                    get_irmc_json(vmdata, '@odata.etag'))
+            if status < 100:
+                module.fail_json(msg=msg, status=status, exception=patch)
+            elif status != 200:
+                module.fail_json(msg=msg, status=status)
+            body[vm_type].pop('Password', None)
+            vmdata = dict(vmdata, **{vm_type: dict(get_irmc_json(vmdata, vm_type), **body[vm_type])})
+            result['steps'].append('configure')
+            # the connect action is only offered once the media type is configured
+            sysdata = get_data(module, system_url)
+
+        post_vm_action(module, sysdata, 'Connect' + vm_device)
+        sysdata = wait_for_vm_state(module, vm_device, 'Connected')
+        result['steps'].append('connect')
+
+    if set_next_boot(module, sysdata):
+        result['steps'].append('next_boot')
+
+    if module.params['power_on'] and result['power_state'] != 'On':
+        allowedparams = get_irmc_json(
+            sysdata,
+            ['Actions', 'Oem', '#FTSComputerSystem.Reset', 'FTSResetType@Redfish.AllowableValues'],
+        )
+        if 'PowerOn' not in allowedparams:
+            result['msg'] = "'PowerOn' is not allowed now. Currently allowed: {0}".format(allowedparams)
+            result['status'] = 13
+            module.fail_json(**result)
+        status, data, msg = irmc_redfish_post(module, 'redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.Reset',
+                                              json.dumps({'FTSResetType': 'PowerOn'}))
+        if status < 100:
+            module.fail_json(msg=msg, status=status, exception=data)
+        elif status not in (200, 202, 204):
+            module.fail_json(msg=msg, status=status)
+        result['steps'].append('power_on')
+
+    result['virtual_media_data'] = get_vm_dict(module, sysdata, vmdata)
+
+
+def get_data(module, uri):
+    status, data, msg = irmc_redfish_get(module, uri)
+    if status < 100:
+        module.fail_json(msg=msg, status=status, exception=data)
+    elif status != 200:
+        module.fail_json(msg=msg, status=status)
+    return data.json()
+
+
+def get_vm_action(sysdata):
+    # name of the action parameter differs between iRMC versions ('VirtualMediaAction', 'FTSVirtualMediaAction')
+    actions = get_irmc_json(sysdata, ['Actions', 'Oem'])
+    if isinstance(actions, dict):
+        for name, action in actions.items():
+            if name.endswith('FTSComputerSystem.VirtualMedia') and isinstance(action, dict):
+                for key, value in action.items():
+                    if key.endswith('VirtualMediaAction@Redfish.AllowableValues'):
+                        return key.replace('@Redfish.AllowableValues', ''), value
+    return 'FTSVirtualMediaAction', []
+
+
+def get_vm_state(sysdata, vm_device):
+    vmaction_type, allowedparams = get_vm_action(sysdata)
+    if 'Connect' + vm_device in allowedparams:
+        return 'Disconnected'
+    if 'Disconnect' + vm_device in allowedparams:
+        return 'Connected'
+    return 'NotConfigured'
+
+
+def post_vm_action(module, sysdata, command):
+    vmaction_type, allowedparams = get_vm_action(sysdata)
+    if command not in allowedparams:
+        result['msg'] = "Parameter '{0}' cannot be used at this time. Allowed: {1}". \
+                        format(command, json.dumps(allowedparams))
+        result['status'] = 21
+        module.fail_json(**result)
+    status, data, msg = irmc_redfish_post(module, 'redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.VirtualMedia',
+                                          json.dumps({vmaction_type: command}))
+    if status < 100:
+        module.fail_json(msg=msg, status=status, exception=data)
+    elif status not in (200, 202, 204):
+        module.fail_json(msg=msg, status=status)
+
+
+def wait_for_vm_state(module, vm_device, state):
+    # the new state is usually reported within seconds, so poll often at first
+    deadline = time.time() + module.params['timeout']
+    delay = 0.5
+    while True:
+        sysdata = get_data(module, system_url)
+        if get_vm_state(sysdata, vm_device) == state:
+            return sysdata
+        if time.time() + delay > deadline:
+            result['msg'] = "Virtual Media '{0}' was not {1} within {2} seconds.". \
+                            format(module.params['vm_type'], state.lower(), module.params['timeout'])
+            result['status'] = 40
+            module.fail_json(**result)
+        time.sleep(delay)
+        delay = min(delay * 2, 5)
+
+
+def is_vm_configured(module, vmdata):
+    vm = get_irmc_json(vmdata, module.params['vm_type'])
+    if not isinstance(vm, dict) or not get_irmc_json(vmdata, 'RemoteMountEnabled') or \
+       get_irmc_json(vm, 'MaximumNumberOfDevices') == 0:
+        return False
+    expected = {
+        'Server': module.params['server'],
+        'ShareName': module.params['share'],
+        'ImageName': module.params['image'],
+        'ShareType': module.params['share_type'],
+        'UserDomain': module.params['vm_domain'],
+        'UserName': module.params['vm_user'],
+    }
+    return all(vm.get(key) == value for key, value in expected.items() if value is not None)
+
+
+def setup_vm_body(module, vmdata):
+    vm_type = module.params['vm_type']
+    maxdevno = get_irmc_json(vmdata, [vm_type, 'MaximumNumberOfDevices'])
+    if maxdevno == 0 and not module.params['force_mediatype_active']:
+        result['msg'] = "No Virtual Media of Type '{0}' is configured!".format(vm_type)
+        result['status'] = 20
+        module.fail_json(**result)
+    if not get_irmc_json(vmdata, 'RemoteMountEnabled') and not module.params['force_remotemount_enabled']:
+        result['msg'] = 'Remote Mount of Virtual Media is not enabled!'
+        result['status'] = 30
+        module.fail_json(**result)
+
+    body = {
+        vm_type: {
+            'Server': module.params['server'],
+            'ShareName': module.params['share'],
+            'ImageName': module.params['image'],
+        },
+    }
+    if module.params['force_remotemount_enabled']:
+        body['RemoteMountEnabled'] = True
+    if maxdevno == 0:
+        body[vm_type]['MaximumNumberOfDevices'] = 1
+    if module.params['share_type'] is not None:
+        body[vm_type]['ShareType'] = module.params['share_type']
+    if module.params['vm_domain'] is not None:
+        body[vm_type]['UserDomain'] = module.params['vm_domain']
+    if module.params['vm_user'] is not None:
+        body[vm_type]['UserName'] = module.params['vm_user']
+    if module.params['vm_password'] is not None:
+        body[vm_type]['Password'] = module.params['vm_password']
+    return body
+
+
+def set_next_boot(module, sysdata):
+    boot = get_irmc_json(sysdata, 'Boot')
+    if get_irmc_json(boot, 'BootSourceOverrideTarget') == module.params['bootsource'] and \
+       (module.params['bootsource'] == 'None' or
+        get_irmc_json(boot, 'BootSourceOverrideEnabled') == module.params['bootoverride'] and
+        module.params['bootmode'] in (None, get_irmc_json(boot, 'BootSourceOverrideMode'))):
+        return False
+
+    bootsourceallowed = get_irmc_json(boot, 'BootSourceOverrideTarget@Redfish.AllowableValues')
+    if module.params['bootsource'] not in bootsourceallowed:
+        result['msg'] = "Invalid parameter '{0}' for function. Allowed: {1}". \
+                        format(module.params['bootsource'], json.dumps(bootsourceallowed))
+        result['status'] = 11
+        module.fail_json(**result)
+    bootoverrideallowed = get_irmc_json(boot, 'BootSourceOverrideEnabled@Redfish.AllowableValues')
+    if module.params['bootoverride'] not in bootoverrideallowed:
+        result['msg'] = "Invalid parameter '{0}' for function. Allowed: {1}". \
+                        format(module.params['bootoverride'], json.dumps(bootoverrideallowed))
+        result['status'] = 12
+        module.fail_json(**result)
+
+    # BootSourceOverrideEnabled and BootSourceOverrideMode cannot be specified with 'None'
+    body = {'Boot': {'BootSourceOverrideTarget': module.params['bootsource']}}
+    if module.params['bootsource'] != 'None':
+        body['Boot']['BootSourceOverrideEnabled'] = module.params['bootoverride']
+        if module.params['bootmode'] is not None:
+            body['Boot']['BootSourceOverrideMode'] = module.params['bootmode']
+
+    status, patch, msg = irmc_redfish_patch(module, system_url, json.dumps(body),
+                                            get_irmc_json(sysdata, '@odata.etag'))
+    if status < 100:
+        module.fail_json(msg=msg, status=status, exception=patch)
+    elif status != 200:
+        module.fail_json(msg=msg, status=status)
+    return True
+
+
+def get_vm_dict(module, sysdata, vmdata):
+    vm_type = module.params['vm_type']
+    vmdict = dict()
+    vmdict[vm_type] = get_vm_state(sysdata, vm_type.replace('Image', ''))
+    vmdict['bootsource'] = module.params['bootsource']
+    vmdict['bootoverride'] = module.params['bootoverride']
+    vmdict['bootmode'] = module.params['bootmode'] or get_irmc_json(sysdata, ['Boot', 'BootSourceOverrideMode'])
+    vmdict['image_name'] = get_irmc_json(vmdata, [vm_type, 'ImageName'])
+    vmdict['server'] = get_irmc_json(vmdata, [vm_type, 'Server'])
+    vmdict['share_name'] = get_irmc_json(vmdata, [vm_type, 'ShareName'])
+    vmdict['share_type'] = get_irmc_json(vmdata, [vm_type, 'ShareType'])
+    return vmdict
+
+
+def main():
+    # import pdb; pdb.set_trace()
+    module_args = dict(
+        irmc_url=dict(required=True, type='str'),
+        irmc_username=dict(required=True, type='str'),
+        irmc_password=dict(required=True, type='str', no_log=True),
+        validate_certs=dict(required=False, type='bool', default=True),
+        retry=dict(required=False, type='dict', options=irmc_retry_argument_spec),
+        vm_type=dict(required=False, type='str', default='CDImage', choices=['CDImage', 'HDImage']),
+        server=dict(required=True, type='str'),
+        share=dict(required=True, type='str'),
+        image=dict(required=True, type='str'),
+        share_type=dict(required=False, type='str', choices=['NFS', 'SMB']),
+        vm_domain=dict(required=False, type='str'),
+        vm_user=dict(required=False, type='str'),
+        vm_password=dict(required=False, type='str', no_log=True),
+        force_remotemount_enabled=dict(required=False, type='bool', default=False),
+        force_mediatype_active=dict(required=False, type='bool', default=False),
+        bootsource=dict(required=False, type='str', default='Cd', choices=['None', 'Pxe', 'Cd', 'Hdd', 'BiosSetup']),
+        bootoverride=dict(required=False, type='str', default='Once', choices=['Once', 'Continuous']),
+        bootmode=dict(required=False, type='str', choices=['UEFI', 'Legacy']),
+        power_on=dict(required=False, type='bool', default=True),
+        ignore_power_on=dict(required=False, type='bool', default=False),
+        timeout=dict(required=False, type='int', default=60),
+    )
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False,
+    )
+
+    irmc_virtualmedia_boot(module)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Base of the action plugins which run read-only iRMC modules inside the controller
+
+Modules of this collection run locally, so for a read-only command the action plugin
+imports the module and calls its run_module() in the controller process instead of transferring it,
+with IrmcControllerModule in place of AnsibleModule.
+Its requests use a session of the process-wide pool of `module_utils/irmc_connection.py`,
+which shares connections and a response cache per `irmc_url` between all threads of the process,
+and between all processes if the connection daemon of module `fujitsu.primergy.irmc_connection` runs.
+Other commands and tasks on remote hosts execute the module as usual.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Any
+
+from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+from ansible.module_utils.common.parameters import remove_values
+from ansible.plugins.action import ActionBase
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc import new_irmc_session
+from ansible_collections.fujitsu.primergy.plugins.module_utils.irmc_connection import irmc_session_pool
+
+# seconds a GET response is reused for the same iRMC, set with variable 'irmc_response_cache_ttl'.
+# Off by default: requests of modules on keepalive or direct sessions (e.g. 'irmc_powerstate' set,
+# or any task with 'retry') do not drop the cached responses.
+default_response_cache_ttl = 0
+
+# some modules collect their result in a global dict, so a module runs in one thread at a time
+module_lock = threading.Lock()
+
+
+def get_no_log_values(argument_spec: dict, params: dict) -> set:
+    """Return the values of the options with 'no_log', including those of sub-options."""
+    no_log_values = set()
+    for name, spec in argument_spec.items():
+        value = params.get(name)
+        if value is None:
+            continue
+        if spec.get('no_log'):
+            no_log_values.add(str(value))
+        elif spec.get('options'):
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, dict):
+                    no_log_values |= get_no_log_values(spec['options'], item)
+    return no_log_values
+
+
+class IrmcModuleExit(Exception):
+    """Raised by exit_json() and fail_json() of IrmcControllerModule with the module result."""
+
+    def __init__(self, result: dict) -> None:  # noqa: D107
+        super().__init__(result.get('msg'))
+        self.result = result
+
+
+class IrmcControllerModule:
+    """Stand-in for AnsibleModule, providing what the iRMC modules use of it."""
+
+    def __init__(self, argument_spec: dict, supports_check_mode: bool = False, *,  # noqa: D107
+                 args: dict, check_mode: bool, cache_ttl: int) -> None:
+        self.check_mode = check_mode
+        validation = ArgumentSpecValidator(argument_spec).validate(args)
+        self.params = validation.validated_parameters
+        self.no_log_values = get_no_log_values(argument_spec, self.params)
+        if validation.error_messages:
+            self.fail_json(msg=', '.join(validation.error_messages))
+        if check_mode and not supports_check_mode:
+            self.exit_json(skipped=True, msg='remote module does not support check mode')
+        self.irmc_session = irmc_session_pool.get_session(self.params, new_irmc_session, cache_ttl)
+
+    def exit_json(self, **kwargs: Any) -> None:  # noqa: ANN401, D102
+        raise IrmcModuleExit(remove_values(kwargs, self.no_log_values))
+
+    def fail_json(self, **kwargs: Any) -> None:  # noqa: ANN401, D102
+        kwargs['failed'] = True
+        raise IrmcModuleExit(remove_values(kwargs, self.no_log_values))
+
+
+class IrmcActionBase(ActionBase):
+    """Run module 'module_name' inside the controller if is_read_only() is true for the task arguments."""
+
+    module_name = ''
+
+    def is_read_only(self, args: dict) -> bool:  # noqa: ARG002, D102
+        return True
+
+    def run(self, tmp: str | None = None, task_vars: dict | None = None) -> dict:  # noqa: D102
+        result = super().run(tmp, task_vars)
+        task_vars = task_vars or {}
+        args = self._task.args
+
+        # a task with its own retry policy does not use the pooled sessions
+        if self._connection.transport != 'local' or not self.is_read_only(args) or args.get('retry'):
+            result.update(self._execute_module(task_vars=task_vars))
+            return result
+
+        cache_ttl = int(task_vars.get('irmc_response_cache_ttl', default_response_cache_ttl))
+        result.update(self.run_on_controller(args, cache_ttl))
+        result.setdefault('changed', False)
+        return result
+
+    def run_on_controller(self, args: dict, cache_ttl: int) -> dict:
+        """Run the module's run_module() with IrmcControllerModule and return its result."""
+        module = importlib.import_module(f'ansible_collections.fujitsu.primergy.plugins.modules.{self.module_name}')
+        with module_lock:
+            try:
+                module.run_module(IrmcControllerModule(module.get_module_args(), args=args,
+                                                       check_mode=self._play_context.check_mode,
+                                                       cache_ttl=cache_ttl))
+            except IrmcModuleExit as e:
+                return e.result
+        return {'failed': True, 'msg': f"Module '{self.module_name}' did not return a result."}
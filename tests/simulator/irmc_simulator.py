@@ -0,0 +1,688 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import argparse
+import base64
+import copy
+import json
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.etree import ElementTree
+
+# Local stand-in for the Redfish, eLCM and SCCI interfaces of an iRMC, so that module_utils, modules
+# and benchmarks can run end-to-end without hardware. It is not a complete iRMC, but implements the
+# requests of this collection:
+#   - GET of the resources of the fixture, with '$expand=Members', '$select', '$top' and '$skip'
+#   - PATCH merging the body into a resource, checking 'If-Match' against '@odata.etag'
+#   - power actions, Virtual Media action, eventlog entries and ClearLog
+#   - firmware and BIOS updates (file upload or TFTP) as tasks in the TaskService,
+#     an iRMC update reboots the iRMC
+#   - eLCM profiles ('ProfileManagement/get', 'set', delete) and their sessions in 'sessionInformation'
+#   - SCCI 'CMDSEQ' at '/config' with ConfigSpace read/write and power commands
+#
+# The state is built from a JSON fixture (fixtures/irmc_s6.json by default) and changed by the requests.
+# Each request can be delayed ('latency' plus up to 'jitter' seconds) and answered with 500 ('error_rate')
+# or 503 with 'Retry-After' ('busy_rate'). While the iRMC reboots, all requests get 503.
+#
+# Usage:
+#   python tests/simulator/irmc_simulator.py --port 8443 --count 4 --latency 0.05 --busy-rate 0.01
+# and use 'irmc_url: 127.0.0.1:8443' (to 8446) with 'validate_certs: false'.
+
+default_fixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'irmc_s6.json')
+
+power_states = {
+    'PowerOn': 'On',
+    'PowerOff': 'Off',
+    'GracefulPowerOff': 'Off',
+    'PowerCycle': 'On',
+    'ImmediateReset': 'On',
+    'GracefulReset': 'On',
+    'PulseNmi': None,
+}
+scci_power_states = {
+    '0111': 'On',  # Power-On
+    '0112': 'Off',  # Power-Off
+    '0113': 'On',  # Power Cycle
+    '0204': 'On',  # Hard Reset
+    '0205': 'Off',  # Graceful Shutdown
+    '0206': 'On',  # Graceful Reboot
+}
+update_urls = {
+    'redfish/v1/Managers/iRMC/Actions/FTSManager.FWUpdate': 'irmc',
+    'redfish/v1/Managers/iRMC/Actions/FTSManager.FWTFTPUpdate': 'irmc',
+    'redfish/v1/Systems/0/Bios/Actions/Oem/FTSBios.BiosUpdate': 'bios',
+    'redfish/v1/Systems/0/Bios/Actions/Oem/FTSBios.BiosTFTPUpdate': 'bios',
+}
+profile_url = 'rest/v1/Oem/eLCM/ProfileManagement'
+
+
+def get_timestamp(seconds=None):
+    return datetime.fromtimestamp(time.time() if seconds is None else seconds, timezone.utc). \
+        strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+def merge(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+def create_certificate(directory):
+    """Create a self-signed certificate for 'localhost' with openssl, return certificate and key file."""
+    certfile = os.path.join(directory, 'irmc_simulator.crt')
+    keyfile = os.path.join(directory, 'irmc_simulator.key')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '2',
+                    '-subj', '/CN=localhost', '-keyout', keyfile, '-out', certfile],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return certfile, keyfile
+
+
+class IrmcSimulatorState(object):
+    """Resources, tasks, eLCM profiles and sessions and ConfigSpace of one simulated iRMC."""
+
+    def __init__(self, fixture, eventlog_entries=0, task_duration=2.0, session_duration=1.0, reboot_time=5.0):
+        self.lock = threading.RLock()
+        self.resources = copy.deepcopy(fixture.get('resources', {}))
+        self.profile_templates = fixture.get('profiles', {})
+        self.configspace = dict(fixture.get('configspace', {}))
+        self.task_duration = task_duration
+        self.session_duration = session_duration
+        self.reboot_time = reboot_time
+        self.busy_until = 0
+        self.tasks = {}
+        self.profiles = {}
+        self.sessions = {}
+        self.applied_profile = None
+        self.virtual_media = {'CD': False, 'HD': False}
+        self.ids = {'task': 0, 'session': 0}
+        self.eventlog = {}
+        for name, entries in fixture.get('eventlog', {}).items():
+            self.eventlog[name] = []
+            for entry in entries:
+                self.add_eventlog_entry(name, entry)
+        for i in range(eventlog_entries):
+            self.add_eventlog_entry('SystemEventLog', {
+                'Severity': ('OK', 'Warning', 'Critical')[i % 3],
+                'EntryType': 'Oem',
+                'Message': 'Simulated event {0}'.format(i),
+                'Oem': {'ts_fujitsu': {'AlertGroup': 'System', 'EventSource': 'iRMC',
+                                       'MessageOEM': {'en': ['Simulated event {0}'.format(i)]}}},
+            })
+
+    def add_eventlog_entry(self, name, entry):
+        entries = self.eventlog.setdefault(name, [])
+        entry = dict(entry)
+        entry['Id'] = str(len(entries) + 1)
+        entry['@odata.id'] = '/redfish/v1/Managers/iRMC/LogServices/{0}/Entries/{1}'.format(name, entry['Id'])
+        entry.setdefault('Created', get_timestamp())
+        entries.append(entry)
+
+    def get_resource(self, path):
+        resource = self.resources.get(path)
+        if resource is None:
+            return None
+        resource = copy.deepcopy(resource)
+        if path == 'redfish/v1/Systems/0':
+            # the allowed actions depend on the state of the server
+            resource['Actions'] = {'Oem': {
+                '#FTSComputerSystem.Reset': {
+                    'target': '/redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.Reset',
+                    'FTSResetType@Redfish.AllowableValues': self.get_allowed_reset_types(),
+                },
+                '#FTSComputerSystem.VirtualMedia': {
+                    'target': '/redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.VirtualMedia',
+                    'FTSVirtualMediaAction@Redfish.AllowableValues': self.get_allowed_virtual_media_actions(),
+                },
+            }}
+        return resource
+
+    def get_allowed_reset_types(self):
+        if self.get_power_state() == 'On':
+            return [reset_type for reset_type, power_state in power_states.items() if reset_type != 'PowerOn']
+        return ['PowerOn']
+
+    def get_allowed_virtual_media_actions(self):
+        return [('Disconnect' if connected else 'Connect') + media
+                for media, connected in sorted(self.virtual_media.items())]
+
+    def get_power_state(self):
+        return self.resources['redfish/v1/Systems/0']['PowerState']
+
+    def set_power_state(self, power_state):
+        if power_state is not None:
+            self.resources['redfish/v1/Systems/0']['PowerState'] = power_state
+
+    def reboot_irmc(self):
+        # tasks and sessions are lost, requests get 503 until the iRMC is up again
+        self.busy_until = time.time() + self.reboot_time
+        self.tasks = {}
+        self.sessions = {}
+
+    def add_task(self, name, update_type):
+        self.ids['task'] += 1
+        task_id = str(self.ids['task'])
+        self.tasks[task_id] = {'name': name, 'update_type': update_type, 'start': time.time(), 'done': False}
+        return task_id
+
+    def get_task(self, task_id):
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        progress = min(100, int((time.time() - task['start']) * 100 / max(self.task_duration, 0.001)))
+        state = 'Completed' if progress >= 100 else 'Running'
+        if state == 'Completed' and not task['done']:
+            task['done'] = True
+            task['end'] = time.time()
+            if task['update_type'] == 'irmc':
+                self.reboot_irmc()
+                return None
+        return {
+            '@odata.id': '/redfish/v1/TaskService/Tasks/{0}'.format(task_id),
+            'Id': task_id,
+            'Name': task['name'],
+            'TaskState': state,
+            'StartTime': get_timestamp(task['start']),
+            'EndTime': get_timestamp(task['end']) if task['done'] else None,
+            'Oem': {'ts_fujitsu': {
+                'StatusOEM': 'FlashingFinishedSuccessfully' if task['done'] else 'Flashing',
+                'StateProgressPercent': progress,
+                'TotalProgressPercent': progress,
+            }},
+        }
+
+    def add_session(self, text, action):
+        # 'action' is called when the session terminates
+        self.ids['session'] += 1
+        session_id = self.ids['session']
+        self.sessions[session_id] = {'text': text, 'start': time.time(), 'status': 'activated', 'action': action,
+                                     'log': ['Session {0} started'.format(text)]}
+        return session_id
+
+    def get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if session['status'] in ('activated', 'running') and \
+           time.time() - session['start'] >= self.session_duration:
+            error = session['action']()
+            session['status'] = 'terminated with error' if error else 'terminated regularly'
+            session['log'].append(error or 'Session {0} finished'.format(session['text']))
+        elif session['status'] == 'activated':
+            session['status'] = 'running'
+        return session
+
+    def get_profile_template(self, path):
+        # 'path' below 'Server/', e.g. 'SystemConfig/BiosConfig/BiosBootOrder' or 'HWConfigurationIrmc'
+        profile = {}
+        for template_path, template in self.profile_templates.items():
+            if template_path == path or template_path.startswith(path + '/'):
+                merge(profile, template)
+        return profile or None
+
+
+class IrmcRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # irmc_connectvm tells iRMC S4 and newer apart by the 'Server' header
+    server_version = 'iRMC S6 Webserver'
+
+    def version_string(self):
+        return self.server_version
+
+    def log_message(self, *args):
+        if self.server.simulator.verbose:
+            BaseHTTPRequestHandler.log_message(self, *args)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PATCH(self):
+        self.handle_request('PATCH')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+    def handle_request(self, method):
+        simulator = self.server.simulator
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length > 0 else b''
+        url = urlsplit(self.path)
+        path = unquote(url.path).strip('/')
+        query = dict((key, values[0]) for key, values in parse_qs(url.query).items())
+        simulator.count('requests')
+        simulator.count(method)
+
+        delay = simulator.latency + simulator.random.uniform(0, simulator.jitter) if simulator.jitter > 0 \
+            else simulator.latency
+        if delay > 0:
+            time.sleep(delay)
+        if not simulator.is_authorized(self.headers.get('Authorization')):
+            return self.send_error_json(401, 'Unauthorized')
+
+        state = simulator.state
+        wait = state.busy_until - time.time()
+        if wait > 0:
+            simulator.count('rebooting')
+            return self.send_error_json(503, 'iRMC is rebooting', {'Retry-After': str(int(wait) + 1)})
+        if simulator.busy_rate > 0 and simulator.random.random() < simulator.busy_rate:
+            simulator.count('busy')
+            return self.send_error_json(503, 'iRMC is busy', {'Retry-After': str(simulator.retry_after)})
+        if simulator.error_rate > 0 and simulator.random.random() < simulator.error_rate:
+            simulator.count('errors')
+            return self.send_error_json(500, 'Internal error (injected)')
+
+        with state.lock:
+            if path == 'config' and method == 'POST':
+                return self.handle_scci(state, body)
+            if path == 'sessionInformation' or path.startswith('sessionInformation/'):
+                return self.handle_session(state, method, path)
+            if path == profile_url or path.startswith(profile_url + '/'):
+                return self.handle_profile(state, method, path, query, body)
+            if path in update_urls and method == 'POST':
+                return self.handle_update(state, path, body)
+            if path.startswith('redfish/v1/TaskService/Tasks'):
+                return self.handle_task(state, method, path)
+            if path.startswith('redfish/v1/Managers/iRMC/LogServices/'):
+                result = self.handle_eventlog(state, method, path, query)
+                if result is not False:
+                    return result
+            if method == 'POST':
+                return self.handle_action(state, path, body)
+            if method == 'PATCH':
+                return self.handle_patch(state, path, body)
+            if method == 'GET':
+                return self.handle_get(state, path, query)
+        return self.send_error_json(405, 'Method {0} is not allowed for {1}'.format(method, path))
+
+    def send_json(self, status, data, headers=None):
+        # no body for 204, the client would read it as start of the next response
+        body = json.dumps(data).encode('utf-8') if status != 204 else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message, headers=None):
+        self.send_json(status, {'error': {'code': 'Base.1.0.GeneralError', 'message': message,
+                                          '@Message.ExtendedInfo': []}}, headers)
+
+    def get_json_body(self, body):
+        try:
+            return json.loads(body.decode('utf-8')) if body else {}
+        except ValueError:
+            return None
+
+    def handle_get(self, state, path, query):
+        resource = state.get_resource(path)
+        if resource is None:
+            return self.send_error_json(404, 'Resource {0} not found'.format(path))
+        if '$filter' in query:
+            return self.send_error_json(501, "Query parameter '$filter' is not supported")
+        if query.get('$expand') in ('Members', '*', '.') and 'Members' in resource:
+            resource['Members'] = [state.get_resource(member['@odata.id'].strip('/')) or member
+                                   for member in resource['Members']]
+        if 'Members' in resource:
+            self.page_members(resource, resource['Members'], query)
+        if '$select' in query:
+            keys = set(query['$select'].split(','))
+            resource = dict((key, value) for key, value in resource.items() if key in keys or key.startswith('@'))
+        self.send_json(200, resource)
+
+    def page_members(self, resource, members, query):
+        resource['Members@odata.count'] = len(members)
+        skip = int(query.get('$skip', 0))
+        top = int(query['$top']) if '$top' in query else len(members)
+        resource['Members'] = members[skip:skip + top]
+
+    def handle_patch(self, state, path, body):
+        resource = state.resources.get(path)
+        if resource is None:
+            return self.send_error_json(404, 'Resource {0} not found'.format(path))
+        data = self.get_json_body(body)
+        if not isinstance(data, dict):
+            return self.send_error_json(400, 'Invalid JSON body')
+        etag = resource.get('@odata.etag')
+        if etag is not None and self.headers.get('If-Match') not in (etag, '*'):
+            return self.send_error_json(412, 'ETag {0} does not match {1}'.format(self.headers.get('If-Match'), etag))
+        merge(resource, data)
+        if etag is not None:
+            resource['@odata.etag'] = str(int(etag) + 1)
+        self.send_json(200, resource)
+
+    def handle_action(self, state, path, body):
+        data = self.get_json_body(body)
+        if data is None:
+            return self.send_error_json(400, 'Invalid JSON body')
+        if path == 'redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.Reset':
+            reset_type = data.get('FTSResetType')
+            if reset_type not in state.get_allowed_reset_types():
+                return self.send_error_json(400, 'FTSResetType {0} is not allowed now'.format(reset_type))
+            state.set_power_state(power_states[reset_type])
+            return self.send_json(204, {})
+        if path == 'redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.VirtualMedia':
+            action = data.get('FTSVirtualMediaAction', data.get('VirtualMediaAction'))
+            if action not in state.get_allowed_virtual_media_actions():
+                return self.send_error_json(400, 'FTSVirtualMediaAction {0} is not allowed now'.format(action))
+            state.virtual_media[action.replace('Disconnect', '').replace('Connect', '')] = action.startswith('Connect')
+            return self.send_json(204, {})
+        return self.send_error_json(404, 'Action {0} not found'.format(path))
+
+    def handle_eventlog(self, state, method, path, query):
+        # returns False if 'path' is no eventlog entries URL
+        parts = path.split('/')
+        if len(parts) < 7 or parts[6] not in ('Entries', 'Actions'):
+            return False
+        entries = state.eventlog.get(parts[5])
+        if entries is None:
+            return self.send_error_json(404, 'Log service {0} not found'.format(parts[5]))
+        if parts[6] == 'Actions' and method == 'POST' and parts[-1] == 'LogService.ClearLog':
+            del entries[:]
+            return self.send_json(204, {})
+        if method != 'GET':
+            return self.send_error_json(405, 'Method {0} is not allowed for {1}'.format(method, path))
+        if len(parts) == 8:
+            for entry in entries:
+                if entry['Id'] == parts[7]:
+                    return self.send_json(200, entry)
+            return self.send_error_json(404, 'Entry {0} not found'.format(parts[7]))
+        if '$filter' in query:
+            return self.send_error_json(501, "Query parameter '$filter' is not supported")
+        # newest entries first
+        resource = {'@odata.id': '/' + path, 'Name': 'Log Entry Collection'}
+        self.page_members(resource, list(reversed(entries)), query)
+        return self.send_json(200, resource)
+
+    def handle_update(self, state, path, body):
+        update_type = update_urls[path]
+        if 'TFTP' not in path and len(body) == 0:
+            return self.send_error_json(400, 'No firmware image uploaded')
+        self.server.simulator.count('uploaded_bytes', len(body))
+        task_id = state.add_task('{0} update'.format('iRMC' if update_type == 'irmc' else 'BIOS'), update_type)
+        location = '/redfish/v1/TaskService/Tasks/{0}'.format(task_id)
+        self.send_json(202, {'@odata.id': location}, {'Location': location})
+
+    def handle_task(self, state, method, path):
+        if method != 'GET':
+            return self.send_error_json(405, 'Method {0} is not allowed for {1}'.format(method, path))
+        task_id = path[len('redfish/v1/TaskService/Tasks'):].strip('/')
+        if task_id == '':
+            members = [{'@odata.id': '/redfish/v1/TaskService/Tasks/{0}'.format(task_id)} for task_id in state.tasks]
+            return self.send_json(200, {'@odata.id': '/redfish/v1/TaskService/Tasks', 'Name': 'Task Collection',
+                                        'Members': members, 'Members@odata.count': len(members)})
+        task = state.get_task(task_id)
+        if task is None:
+            if state.busy_until > time.time():
+                return self.send_error_json(503, 'iRMC is rebooting', {'Retry-After': str(int(state.reboot_time))})
+            return self.send_error_json(404, 'Task {0} not found'.format(task_id))
+        return self.send_json(200, task)
+
+    def handle_profile(self, state, method, path, query, body):
+        name = path[len(profile_url):].strip('/')
+        if name == '' and method == 'GET':
+            links = [{'@odata.id': '{0}/{1}'.format(profile_url, profile)} for profile in state.profiles]
+            return self.send_json(200, {'Links': {'profileStore': links}})
+        if name == 'get' and method == 'POST':
+            param_path = query.get('PARAM_PATH', '')
+            if not param_path.startswith('Server/'):
+                return self.send_error_json(400, 'Invalid PARAM_PATH {0}'.format(param_path))
+            param_path = param_path[len('Server/'):]
+            profile_name = param_path.split('/')[-1]
+            if profile_name in state.profiles:
+                return self.send_error_json(409, 'Profile {0} already exists'.format(profile_name))
+            template = state.get_profile_template(param_path)
+            if template is None:
+                return self.send_error_json(404, 'Profile {0} cannot be created'.format(param_path))
+
+            def create_profile():
+                state.profiles[profile_name] = template
+
+            session_id = state.add_session('ObtainProfileParameters', create_profile)
+            return self.send_json(202, {'Session': {'Id': session_id, 'Status': 'activated'}},
+                                  {'Location': '/sessionInformation/{0}/status'.format(session_id)})
+        if name == 'set' and method == 'POST':
+            data = self.get_json_body(body)
+            if not isinstance(data, dict) or 'Server' not in data:
+                return self.send_error_json(400, 'Invalid profile')
+
+            def apply_profile():
+                state.applied_profile = data
+
+            session_id = state.add_session('ApplyProfileParameters', apply_profile)
+            return self.send_json(202, {'Session': {'Id': session_id, 'Status': 'activated'}},
+                                  {'Location': '/sessionInformation/{0}/status'.format(session_id)})
+        if name not in state.profiles:
+            return self.send_error_json(404, 'Profile {0} not found'.format(name))
+        if method == 'GET':
+            return self.send_json(200, state.profiles[name])
+        if method == 'DELETE':
+            del state.profiles[name]
+            return self.send_json(200, {})
+        return self.send_error_json(405, 'Method {0} is not allowed for {1}'.format(method, path))
+
+    def handle_session(self, state, method, path):
+        parts = path.split('/')
+        if len(parts) == 1 and method == 'GET':
+            sessions = [{'@Id': session_id, '#text': session['text'], '@Tag': ''}
+                        for session_id, session in state.sessions.items()]
+            return self.send_json(200, {'SessionList': sessions})
+        try:
+            session_id = int(parts[1])
+        except (IndexError, ValueError):
+            return self.send_error_json(400, 'Invalid session {0}'.format(path))
+        session = state.get_session(session_id)
+        if session is None or len(parts) != 3:
+            return self.send_error_json(404, 'Session {0} not found'.format(path))
+        terminated = 'terminated' in session['status']
+        if method == 'GET' and parts[2] == 'status':
+            return self.send_json(200, {'Session': {
+                'Id': session_id, 'Tag': '', 'Status': session['status'], 'Start': get_timestamp(session['start']),
+                'Duration': int(time.time() - session['start'])}})
+        if method == 'GET' and parts[2] == 'log':
+            entries = [{'@date': get_timestamp(session['start']), '#text': text} for text in session['log']]
+            return self.send_json(200, {'SessionLog': {'Id': session_id, 'Tag': '', 'Entries': {'Entry': entries}}})
+        if method == 'DELETE' and parts[2] == 'remove':
+            if not terminated:
+                return self.send_error_json(409, 'Session {0} is not terminated'.format(session_id))
+            del state.sessions[session_id]
+            return self.send_json(200, {})
+        if method == 'DELETE' and parts[2] == 'terminate':
+            session['status'] = 'terminated by user'
+            return self.send_json(200, {})
+        return self.send_error_json(405, 'Method {0} is not allowed for {1}'.format(method, path))
+
+    def handle_scci(self, state, body):
+        try:
+            root = ElementTree.fromstring(body)
+        except ElementTree.ParseError:
+            return self.send_xml(400, '<Status><Value>1</Value><Severity>Error</Severity>'
+                                      '<Message>Invalid XML</Message></Status>')
+        results = []
+        for cmd in root:
+            if cmd.tag.upper() != 'CMD':
+                continue
+            opcode = cmd.attrib.get('OC', '').upper()
+            opcodeext = format(int(cmd.attrib.get('OE', '0'), 16), 'X')
+            index = format(int(cmd.attrib.get('OI', '0'), 16), 'X')
+            key = '{0}:{1}'.format(opcodeext, index)
+            status, data, error = 0, None, None
+            if opcode == 'E001':
+                data = state.configspace.get(key)
+                if data is None:
+                    status, error = 46, 'ConfigSpace value {0} does not exist'.format(key)
+            elif opcode == 'E002':
+                value = None
+                for item in cmd:
+                    if item.tag.upper() == 'DATA':
+                        value = item.text or ''
+                state.configspace[key] = value
+            elif opcode == '0203':
+                state.reboot_irmc()
+            elif opcode in scci_power_states:
+                state.set_power_state(scci_power_states[opcode])
+            elif opcode not in ('020C', '0209', '0250'):
+                status, error = 9, 'Unknown opcode {0}'.format(opcode)
+            result = '<CMD Context="SCCI" OC="{0}" OE="{1}" OI="{2}" Type="{3}"><STATUS>{4}</STATUS>'. \
+                     format(opcode, opcodeext, index, cmd.attrib.get('Type', 'SET'), status)
+            if data is not None:
+                result += '<DATA Type="xsd::string">{0}</DATA>'.format(xml_escape(data))
+            if error is not None:
+                result += '<ERROR>{0}</ERROR>'.format(xml_escape(error))
+            results.append(result + '</CMD>')
+        self.send_xml(200, '<?xml version="1.0" encoding="UTF-8" standalone="yes" ?>\n<Status><Value>0</Value>'
+                           '<Severity>Information</Severity><Message>No Error</Message>{0}</Status>'.
+                      format(''.join(results)))
+
+    def send_xml(self, status, data):
+        body = data.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def xml_escape(text):
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+class IrmcSimulator(object):
+    """Simulated iRMC at 'address':'port' (port 0 selects a free port), see module comment."""
+
+    def __init__(self, fixture=None, address='127.0.0.1', port=0, certfile=None, keyfile=None, username='admin',
+                 password='admin', latency=0.0, jitter=0.0, error_rate=0.0, busy_rate=0.0, retry_after=1,
+                 task_duration=2.0, session_duration=1.0, reboot_time=5.0, eventlog_entries=0, seed=None,
+                 verbose=False):
+        if fixture is None or isinstance(fixture, str):
+            with open(fixture or default_fixture) as f:
+                fixture = json.load(f)
+        self.state = IrmcSimulatorState(fixture, eventlog_entries, task_duration, session_duration, reboot_time)
+        self.credentials = 'Basic ' + base64.b64encode('{0}:{1}'.format(username, password).encode()).decode()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.busy_rate = busy_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+        self.tmpdir = None
+        self.thread = None
+
+        if certfile is None:
+            self.tmpdir = tempfile.mkdtemp()
+            certfile, keyfile = create_certificate(self.tmpdir)
+        self.server = ThreadingHTTPServer((address, port), IrmcRequestHandler)
+        self.server.daemon_threads = True
+        self.server.simulator = self
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        # the TLS handshake runs in the thread of the connection, not in the accepting thread
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True, do_handshake_on_connect=False)
+
+    @property
+    def irmc_url(self):
+        """Value for the module option 'irmc_url'."""
+        return '{0}:{1}'.format(*self.server.server_address[:2])
+
+    def count(self, key, value=1):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + value
+
+    def is_authorized(self, authorization):
+        return authorization == self.credentials
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.1})
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.server.server_close()
+        if self.tmpdir is not None:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+            self.tmpdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local iRMC Redfish/SCCI simulator')
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443, help='port of the first iRMC')
+    parser.add_argument('--count', type=int, default=1, help='number of iRMCs on consecutive ports')
+    parser.add_argument('--fixture', default=default_fixture)
+    parser.add_argument('--certfile', help='server certificate, a self-signed one is created if not set')
+    parser.add_argument('--keyfile')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay of each response in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random delay added to latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 500')
+    parser.add_argument('--busy-rate', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--retry-after', type=int, default=1, help="'Retry-After' of injected 503 responses")
+    parser.add_argument('--task-duration', type=float, default=2.0, help='duration of update tasks in seconds')
+    parser.add_argument('--session-duration', type=float, default=1.0, help='duration of eLCM sessions in seconds')
+    parser.add_argument('--reboot-time', type=float, default=5.0, help='duration of an iRMC reboot in seconds')
+    parser.add_argument('--eventlog-entries', type=int, default=0, help='additional SystemEventLog entries')
+    parser.add_argument('--seed', type=int, help='seed of the random error injection')
+    parser.add_argument('--verbose', action='store_true', help='log each request')
+    args = parser.parse_args(argv)
+
+    simulators = []
+    try:
+        for i in range(args.count):
+            simulator = IrmcSimulator(args.fixture, args.address, args.port + i, args.certfile, args.keyfile,
+                                      args.username, args.password, args.latency, args.jitter, args.error_rate,
+                                      args.busy_rate, args.retry_after, args.task_duration, args.session_duration,
+                                      args.reboot_time, args.eventlog_entries,
+                                      None if args.seed is None else args.seed + i, args.verbose)
+            simulators.append(simulator.start())
+            print('iRMC simulator listening on https://{0}/'.format(simulator.irmc_url))
+        sys.stdout.flush()
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for simulator in simulators:
+            simulator.stop()
+            print('{0}: {1}'.format(simulator.irmc_url, json.dumps(simulator.stats, sort_keys=True)))
+
+
+if __name__ == '__main__':
+    main()
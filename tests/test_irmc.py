@@ -54,6 +54,19 @@ class TestIrmc(unittest.TestCase):
         self.mockdata.dispose()
         self.mockdata = None
 
+    def test__get_irmc_retry_policy(self):
+        self.assertIsNone(irmc.get_irmc_retry_policy(self.mod))
+        exit_json = self.mod.exit_json
+        self.mod.params['retry'] = dict(attempts=2, backoff_factor=0.1, backoff_max=1.0, jitter=None,
+                                        statuses=[503], methods=['get'])
+        policy = irmc.get_irmc_retry_policy(self.mod)
+        self.assertIs(policy, irmc.get_irmc_retry_policy(self.mod))
+        self.assertEqual(frozenset(['GET']), policy.methods)
+        self.assertEqual(2, irmc.get_irmc_retry(self.mod).total)
+        policy.count_retry(response=mock.Mock(status=503))
+        self.mod.exit_json(changed=False)
+        exit_json.assert_called_with(changed=False, retries={'count': 1, 'reasons': {'503': 1}})
+
     @patch.object(requests.Session, 'get')
     def test__irmc_redfish_get__all_is_well(self, get):
         requests.Session.get.return_value = self.mockdata
@@ -204,6 +217,34 @@ class TestIrmc(unittest.TestCase):
         self.assertIn("Traceback", str(data))
         self.assertIn("POST request encountered exception (" + self.url + ")", msg)
 
+    @patch.object(requests.Session, 'get')
+    def test__irmc_redfish_get_parallel__all_is_well(self, get):
+        requests.Session.get.return_value = self.mockdata
+        results = irmc.irmc_redfish_get_parallel(self.mod, ["path1", "path2", "path3"], 2)
+        self.assertEqual(3, len(results))
+        self.assertEqual(3, requests.Session.get.call_count)
+        for status, data, msg in results:
+            self.assertEqual(self.mockdata.status_code, status)
+            self.assertEqual(self.mockdata.json.return_value, data.json.return_value)
+            self.assertEqual("OK", msg)
+
+    @patch.object(requests.Session, 'get')
+    def test__irmc_redfish_get_parallel__keeps_order(self, get):
+        requests.Session.get.side_effect = lambda url, **kwargs: mock.Mock(status_code=200, url=url)
+        results = irmc.irmc_redfish_get_parallel(self.mod, ["path{0}".format(i) for i in range(10)], 4)
+        self.assertEqual(["https://{0}/path{1}".format(self.mod.params['irmc_url'], i) for i in range(10)],
+                         [data.url for status, data, msg in results])
+
+    @patch.object(requests.Session, 'delete')
+    def test__irmc_redfish_delete_parallel__all_is_well(self, delete):
+        requests.Session.delete.return_value = self.mockdata
+        results = irmc.irmc_redfish_delete_parallel(self.mod, ["path1", "path2"], 2)
+        self.assertEqual(2, requests.Session.delete.call_count)
+        self.assertEqual([(200, self.mockdata, "OK")] * 2, results)
+
+    def test__irmc_redfish_get_parallel__no_uris(self):
+        self.assertEqual([], irmc.irmc_redfish_get_parallel(self.mod, []))
+
     def test__get_irmc_json__all_is_well(self):
         result0 = irmc.get_irmc_json(self.mockjson, "Level0Key")
         result1 = irmc.get_irmc_json(self.mockjson, ["Level1", "Level1Key"])
@@ -249,6 +290,24 @@ class TestIrmc(unittest.TestCase):
 
     # Cannot test actually waiting for a session to finish ...
 
+    @patch.object(requests.Session, 'close')
+    def test__irmc_redfish_keepalive__one_session(self, close):
+        sessions = []
+
+        def session_get(session, *args, **kwargs):
+            sessions.append(session)
+            return self.mockdata
+        with patch.object(requests.Session, 'get', autospec=True, side_effect=session_get):
+            with irmc.irmc_redfish_keepalive(self.mod) as session:
+                irmc.irmc_redfish_get(self.mod, "redfish_path")
+                irmc.irmc_redfish_get(self.mod, "redfish_path")
+            irmc.irmc_redfish_get(self.mod, "redfish_path")
+        self.assertIs(session, sessions[0])
+        self.assertIs(session, sessions[1])
+        self.assertIsNot(session, sessions[2])
+        self.assertEqual(1, self.mockdata.connection.close.call_count)
+        self.assertEqual(1, close.call_count)
+
 
 if __name__ == '__main__':
     unittest.main()
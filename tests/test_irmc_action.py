@@ -0,0 +1,70 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import types
+
+import mock
+
+from ansible.compat.tests import unittest
+from ansible.compat.tests.mock import patch
+
+from plugin_utils import irmc_action
+
+
+class TestIrmcAction(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.argument_spec = dict(
+            irmc_url=dict(required=True, type='str'),
+            irmc_password=dict(required=True, type='str', no_log=True),
+            retry=dict(required=False, type='dict', options=dict(
+                total=dict(required=False, type='int', default=3),
+                token=dict(required=False, type='str', no_log=True),
+            )),
+        )
+        self.args = dict(irmc_url="irmc1", irmc_password="secret1", retry=dict(token="secret2"))
+        self.modules = []
+
+        def run_module(module):
+            self.modules.append(module)
+            module.exit_json(msg="login secret1 with secret2", url=module.params['irmc_url'])
+
+        self.module = types.SimpleNamespace(get_module_args=lambda: self.argument_spec, run_module=run_module)
+        self.action = irmc_action.IrmcActionBase.__new__(irmc_action.IrmcActionBase)
+        self.action.module_name = 'irmc_test'
+        self.action._play_context = mock.Mock(check_mode=False)
+        self.patches = [
+            patch.object(irmc_action.importlib, 'import_module', return_value=self.module),
+            patch.object(irmc_action.irmc_session_pool, 'get_session', return_value=mock.Mock()),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    # ending the test
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+
+    def test__run_on_controller__no_log_values_masked(self):
+        result = self.action.run_on_controller(self.args, 0)
+        self.assertEqual("irmc1", result['url'])
+        self.assertNotIn("secret1", result['msg'])
+        self.assertNotIn("secret2", result['msg'])
+        self.assertIsInstance(self.modules[0], irmc_action.IrmcControllerModule)
+
+    def test__run_on_controller__invalid_args_masked(self):
+        self.args['irmc_url'] = None
+        self.args['retry']['total'] = "secret1"
+        result = self.action.run_on_controller(self.args, 0)
+        self.assertTrue(result['failed'])
+        self.assertNotIn("secret1", result['msg'])
+        self.assertEqual([], self.modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
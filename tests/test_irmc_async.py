@@ -0,0 +1,97 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import asyncio
+import threading
+import time
+
+import mock
+import requests
+
+from ansible.compat.tests import unittest
+from ansible.compat.tests.mock import patch
+
+from module_utils import irmc_async
+
+
+def irmc_host(name):
+    return mock.Mock(params=dict(irmc_url=name, irmc_username="admin", irmc_password="admin", validate_certs=False))
+
+
+class TestIrmcAsync(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.sessions = set()
+        self.timeouts = []
+
+        def get(session, url, **kwargs):
+            host = url.split('/')[2]
+            with self.lock:
+                self.timeouts.append(kwargs.get('timeout'))
+                self.sessions.add((host, id(session)))
+                self.in_flight[host] = self.in_flight.get(host, 0) + 1
+                total = sum(self.in_flight.values())
+                self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+                self.max_in_flight['total'] = max(self.max_in_flight.get('total', 0), total)
+            time.sleep(0.02)
+            with self.lock:
+                self.in_flight[host] -= 1
+            data = mock.Mock(status_code=200 if host != "irmc_bad" else 404)
+            data.json.return_value = {"Host": host}
+            return data
+
+        self.patcher = patch.object(requests.Session, 'get', autospec=True, side_effect=get)
+        self.patcher.start()
+
+    # ending the test
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test__irmc_redfish_get_many__limits(self):
+        hosts = [irmc_host("irmc{0}".format(i)) for i in range(4)]
+        calls = [(host, "redfish/v1/Systems/0/") for host in hosts for i in range(6)]
+        results = irmc_async.irmc_redfish_get_many(calls, limit=6, limit_per_host=2)
+        self.assertEqual(24, len(results))
+        for (host, uri), (status, data, msg) in zip(calls, results):
+            self.assertEqual(200, status)
+            self.assertEqual(host.params['irmc_url'], data.json()["Host"])
+        self.assertLessEqual(self.max_in_flight['total'], 6)
+        for host in hosts:
+            self.assertLessEqual(self.max_in_flight[host.params['irmc_url']], 2)
+        # one pooled session per iRMC
+        self.assertEqual(4, len(self.sessions))
+
+    def test__irmc_run_async__same_contract(self):
+        async def main(transport):
+            return await asyncio.gather(
+                transport.redfish_get(irmc_host("irmc_bad"), "redfish/v1/Systems/0/"),
+                transport.redfish_post(irmc_host("irmc1"), "redfish/v1/Systems/0/", "{ no json"),
+                transport.redfish_patch(irmc_host("irmc1"), "redfish/v1/Systems/0/", "{}", "no etag"),
+                transport.scci_post(irmc_host("irmc1"), "<no xml"),
+            )
+
+        results = irmc_async.irmc_run_async(main)
+        self.assertEqual([404, 98, 97, 98], [status for status, data, msg in results])
+        self.assertIn("GET request was not successful", results[0][2])
+
+    def test__irmc_async_transport__timeout(self):
+        async def main():
+            async with irmc_async.IrmcAsyncTransport(timeout=2.5) as transport:
+                return await transport.redfish_get(irmc_host("irmc1"), "redfish/v1/")
+
+        self.assertEqual(200, asyncio.run(main())[0])
+        self.assertEqual([2.5], self.timeouts)
+        irmc_async.irmc_redfish_get_many([(irmc_host("irmc1"), "redfish/v1/")])
+        self.assertEqual([2.5, None], self.timeouts)
+
+
+if __name__ == '__main__':
+    unittest.main()
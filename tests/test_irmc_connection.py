@@ -0,0 +1,192 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import mock
+import requests
+from requests.auth import HTTPBasicAuth
+
+from ansible.compat.tests import unittest
+
+from module_utils import irmc_connection
+
+
+class TestIrmcConnection(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "irmc_connection.sock")
+        self.sessions = []
+
+        def session_factory():
+            session = mock.Mock()
+            response = requests.models.Response()
+            response.status_code = 200
+            response.reason = "OK"
+            response.headers = {"Content-Type": "application/json"}
+            response._content = b'{"PowerState": "On"}'
+            session.request.return_value = response
+            self.sessions.append(session)
+            return session
+
+        self.server = irmc_connection.IrmcConnectionServer(self.path, session_factory, session_idle_timeout=300)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    # ending the test
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        shutil.rmtree(self.tmpdir)
+
+    def test__daemon_session__pooled_per_irmc(self):
+        session = irmc_connection.IrmcDaemonSession(self.path, mock.Mock())
+        auth = HTTPBasicAuth("admin", "admin")
+        for i in range(3):
+            data = session.get("https://irmc1/redfish/v1/Systems/0", headers={}, verify=False, auth=auth)
+            self.assertEqual(200, data.status_code)
+            self.assertEqual("On", data.json()["PowerState"])
+        session.post("https://irmc2/redfish/v1/Systems/0", headers={}, data='{}', verify=False, auth=auth)
+        self.assertEqual(2, len(self.sessions))
+        self.assertEqual(3, self.sessions[0].request.call_count)
+
+        status = irmc_connection.send_daemon_request(self.path, {"command": "status"})
+        self.assertEqual(4, status["requests"])
+        self.assertEqual(2, len(status["sessions"]))
+        self.assertNotIn("admin", [value for entry in status["sessions"] for key, value in entry.items()
+                                   if key != "username"])
+
+    def test__daemon_session__idle_eviction(self):
+        session = irmc_connection.IrmcDaemonSession(self.path, mock.Mock())
+        session.get("https://irmc1/redfish/v1/Systems/0", headers={}, verify=False, auth=HTTPBasicAuth("a", "b"))
+        self.server.session_idle_timeout = 0
+        self.server.evict_sessions()
+        self.assertEqual(1, self.sessions[0].close.call_count)
+        status = irmc_connection.send_daemon_request(self.path, {"command": "status"})
+        self.assertEqual([], status["sessions"])
+        self.assertEqual(1, status["sessions_evicted"])
+
+    def test__daemon_session__error(self):
+        session = irmc_connection.IrmcDaemonSession(self.path, mock.Mock())
+        self.server.session_factory = mock.Mock(return_value=mock.Mock(**{"request.side_effect": ValueError("boom")}))
+        with self.assertRaises(requests.exceptions.RequestException):
+            session.get("https://irmc3/redfish/v1/Systems/0", headers={}, verify=False, auth=HTTPBasicAuth("a", "b"))
+
+    def test__daemon_session__fallback(self):
+        fallback = mock.Mock()
+        session = irmc_connection.IrmcDaemonSession(os.path.join(self.tmpdir, "missing.sock"), lambda: fallback)
+        session.get("https://irmc1/redfish/v1/Systems/0", headers={}, verify=False, auth=HTTPBasicAuth("a", "b"))
+        self.assertEqual(1, fallback.request.call_count)
+
+        with mock.patch.dict(os.environ, {irmc_connection.IRMC_CONNECTION_SOCKET_ENV: self.path + ".missing"}):
+            self.assertIsNone(irmc_connection.get_irmc_daemon_session(mock.Mock()))
+        with mock.patch.dict(os.environ, {irmc_connection.IRMC_CONNECTION_SOCKET_ENV: self.path}):
+            self.assertIsNotNone(irmc_connection.get_irmc_daemon_session(mock.Mock()))
+
+    def test__daemon_session__no_reply(self):
+        # a stub daemon which reads the request and closes the connection without reply
+        path = os.path.join(self.tmpdir, "stub.sock")
+        stub = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stub.bind(path)
+        stub.listen(4)
+
+        def serve():
+            for i in range(2):
+                conn = stub.accept()[0]
+                conn.recv(65536)
+                conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        fallback = mock.Mock()
+        session = irmc_connection.IrmcDaemonSession(path, lambda: fallback)
+        auth = HTTPBasicAuth("a", "b")
+        try:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                session.post("https://irmc1/redfish/v1/Systems/0/Actions/ComputerSystem.Reset", headers={},
+                             data='{}', verify=False, auth=auth)
+            self.assertEqual(0, fallback.request.call_count)
+            session.get("https://irmc1/redfish/v1/Systems/0", headers={}, verify=False, auth=auth)
+            self.assertEqual(1, fallback.request.call_count)
+        finally:
+            thread.join()
+            stub.close()
+
+    def test__server__drain(self):
+        release = threading.Event()
+
+        def request(*args, **kwargs):
+            release.wait(5)
+            return self.sessions[0].request.return_value
+
+        session = irmc_connection.IrmcDaemonSession(self.path, mock.Mock())
+        session.get("https://irmc1/redfish/v1/Systems/0", headers={}, verify=False, auth=HTTPBasicAuth("a", "b"))
+        self.sessions[0].request.side_effect = request
+        replies = []
+        client = threading.Thread(target=lambda: replies.append(session.post(
+            "https://irmc1/redfish/v1/Systems/0/Actions", headers={}, data='{}', verify=False,
+            auth=HTTPBasicAuth("a", "b"))))
+        client.start()
+        while self.sessions[0].request.call_count < 2:
+            time.sleep(0.01)
+        self.server.shutdown()
+        time.sleep(1.5)
+        # the socket is kept until the running request is finished
+        self.assertTrue(os.path.exists(self.path))
+        release.set()
+        client.join()
+        self.thread.join()
+        self.assertEqual(200, replies[0].status_code)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test__daemon_session__cache(self):
+        session = irmc_connection.IrmcDaemonSession(self.path, mock.Mock(), cache_ttl=60)
+        auth = HTTPBasicAuth("admin", "admin")
+        for i in range(2):
+            session.get("https://irmc1/redfish/v1/Systems/0", headers={}, verify=False, auth=auth)
+        self.assertEqual(1, self.sessions[0].request.call_count)
+        session.post("https://irmc1/redfish/v1/Systems/0/Actions", headers={}, data='{}', verify=False, auth=auth)
+        session.get("https://irmc1/redfish/v1/Systems/0", headers={}, verify=False, auth=auth)
+        self.assertEqual(3, self.sessions[0].request.call_count)
+        status = irmc_connection.send_daemon_request(self.path, {"command": "status"})
+        self.assertEqual(1, status["cached"])
+
+
+class TestIrmcSessionPool(unittest.TestCase):
+
+    def test__session_pool__shared_cache(self):
+        base = mock.Mock()
+        base.request.return_value = mock.Mock(status_code=200)
+        pool = irmc_connection.IrmcSessionPool()
+        params = dict(irmc_url="irmc1", irmc_username="admin", validate_certs=False)
+        with mock.patch.object(irmc_connection, "get_irmc_daemon_session", return_value=None):
+            session = pool.get_session(params, lambda: base, cache_ttl=60)
+            self.assertIs(session, pool.get_session(params, lambda: base, cache_ttl=60))
+        auth = HTTPBasicAuth("admin", "admin")
+        session.get("https://irmc1/redfish/v1/Systems/0", auth=auth)
+        session.get("https://irmc1/redfish/v1/Systems/0", auth=auth)
+        self.assertEqual(1, base.request.call_count)
+        session.get("https://irmc1/redfish/v1/Systems/0", auth=HTTPBasicAuth("admin", "wrong"))
+        self.assertEqual(2, base.request.call_count)
+        session.patch("https://irmc1/redfish/v1/Systems/0", auth=auth)
+        session.get("https://irmc1/redfish/v1/Systems/0", auth=auth)
+        self.assertEqual(4, base.request.call_count)
+
+        session.cache_ttl = 0
+        session.get("https://irmc1/redfish/v1/Systems/0", auth=auth)
+        self.assertEqual(5, base.request.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
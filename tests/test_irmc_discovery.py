@@ -0,0 +1,94 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import mock
+
+from ansible.compat.tests import unittest
+from ansible.compat.tests.mock import patch
+
+from module_utils import irmc_discovery
+
+
+class TestIrmcDiscovery(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.open_ports = {"192.0.2.1", "192.0.2.2", "192.0.2.3"}
+        self.redfish = {"192.0.2.1", "192.0.2.2"}
+        self.probed = []
+
+        async def is_port_open(address, port=443, timeout=1.0):
+            return address in self.open_ports
+
+        def redfish_get(host, uri):
+            self.probed.append(host.params['irmc_url'])
+            if host.params['irmc_url'] in self.redfish:
+                return 200, mock.Mock(), "OK"
+            return 404, mock.Mock(), "GET request was not successful"
+
+        def firmware_versions(host):
+            if host.params['irmc_url'] == "192.0.2.2":
+                return 401, mock.Mock(), "GET request was not successful"
+            return 200, {"system": {"model": "PRIMERGY RX1330 M6S"}, "irmc": {"fw_version": "2.08P"}}, "OK"
+
+        self.patches = [
+            patch.object(irmc_discovery, 'is_port_open', side_effect=is_port_open),
+            patch.object(irmc_discovery, 'irmc_redfish_get', side_effect=redfish_get),
+            patch.object(irmc_discovery, 'get_irmc_firmware_versions', side_effect=firmware_versions),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    # ending the test
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+
+    def test__expand_targets(self):
+        targets = irmc_discovery.expand_targets(["irmc1", "192.0.2.1"], ["192.0.2.0/29", "198.51.100.7/32"],
+                                                ["192.0.2.4/30"])
+        self.assertEqual(["irmc1", "192.0.2.1", "192.0.2.2", "192.0.2.3", "198.51.100.7"], targets)
+
+    def test__discovery__cache(self):
+        targets = irmc_discovery.expand_targets(networks=["192.0.2.0/28"])
+        discovery = irmc_discovery.IrmcDiscovery("admin", "admin", cache_ttl=3600, negative_cache_ttl=3600)
+        entries = discovery.run(targets)
+        self.assertEqual(14, len(entries))
+        self.assertTrue(entries["192.0.2.1"]["found"])
+        self.assertEqual("PRIMERGY RX1330 M6S", entries["192.0.2.1"]["system"]["model"])
+        self.assertFalse(entries["192.0.2.2"]["found"])
+        self.assertTrue(entries["192.0.2.2"]["redfish"])
+        self.assertEqual(401, entries["192.0.2.2"]["status"])
+        self.assertFalse(entries["192.0.2.3"]["redfish"])
+        self.assertFalse(entries["192.0.2.4"]["found"])
+        self.assertEqual(3, discovery.stats["probed"])
+
+        # the second run only checks addresses which are not in the cache
+        self.probed = []
+        targets = irmc_discovery.expand_targets(networks=["192.0.2.0/27"])
+        discovery = irmc_discovery.IrmcDiscovery("admin", "admin", cache_ttl=3600, negative_cache_ttl=3600)
+        entries = discovery.run(targets, entries)
+        self.assertEqual(14, discovery.stats["cached"])
+        self.assertEqual(16, discovery.stats["scanned"])
+        self.assertEqual([], self.probed)
+        self.assertEqual(1, discovery.stats["found"])
+
+        # addresses without iRMC found expire first
+        discovery = irmc_discovery.IrmcDiscovery("admin", "admin", cache_ttl=3600, negative_cache_ttl=0)
+        discovery.run(targets, entries)
+        self.assertEqual(["192.0.2.2", "192.0.2.3"], sorted(self.probed))
+        self.assertEqual(1, discovery.stats["cached"])
+
+        # expired entries are checked again
+        self.probed = []
+        discovery = irmc_discovery.IrmcDiscovery("admin", "admin", cache_ttl=0)
+        discovery.run(targets, entries)
+        self.assertEqual(3, len(self.probed))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from ansible.compat.tests import unittest
+
+from module_utils import irmc_eventlog_index
+
+
+class TestIrmcEventlogIndex(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.index = irmc_eventlog_index.open_eventlog_index(os.path.join(self.tmpdir, "index.db"))
+        self.entries = [
+            {"Id": "1", "Severity": "OK", "Created": "2024-07-24T10:00:00+02:00", "Type": "SEL",
+             "AlertGroup": "Fan", "Message": "Fan ok"},
+            {"Id": "2", "Severity": "Critical", "Created": "2024-07-24T11:00:00+02:00", "Type": "SEL",
+             "AlertGroup": "Memory", "Message": "DIMM error"},
+        ]
+        self.cursor = {"Id": 2, "Created": "2024-07-24T11:00:00+02:00"}
+
+    # ending the test
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test__get_index_timestamp(self):
+        self.assertEqual(1721811600, irmc_eventlog_index.get_index_timestamp("2024-07-24T11:00:00+02:00"))
+        self.assertEqual(1721818800, irmc_eventlog_index.get_index_timestamp("2024-07-24T11:00:00Z"))
+        self.assertEqual(1721818800, irmc_eventlog_index.get_index_timestamp("2024-07-24T11:00:00"))
+        self.assertIsNone(irmc_eventlog_index.get_index_timestamp("no time"))
+        self.assertIsNone(irmc_eventlog_index.get_index_timestamp(None))
+
+    def test__add_index_entries__all_is_well(self):
+        self.assertIsNone(irmc_eventlog_index.get_index_cursor(self.index, "irmc1", "SystemEventLog"))
+        added = irmc_eventlog_index.add_index_entries(self.index, "irmc1", "SystemEventLog", self.entries, self.cursor)
+        self.assertEqual(2, added)
+        self.assertEqual(self.cursor, irmc_eventlog_index.get_index_cursor(self.index, "irmc1", "SystemEventLog"))
+
+    def test__add_index_entries__duplicates_are_ignored(self):
+        irmc_eventlog_index.add_index_entries(self.index, "irmc1", "SystemEventLog", self.entries, self.cursor)
+        added = irmc_eventlog_index.add_index_entries(self.index, "irmc1", "SystemEventLog", self.entries, self.cursor)
+        self.assertEqual(0, added)
+
+    def test__query_eventlog_index__filters(self):
+        irmc_eventlog_index.add_index_entries(self.index, "irmc1", "SystemEventLog", self.entries, self.cursor)
+        irmc_eventlog_index.add_index_entries(self.index, "irmc2", "SystemEventLog", self.entries[:1],
+                                              {"Id": 1, "Created": "2024-07-24T10:00:00+02:00"})
+        rows = irmc_eventlog_index.query_eventlog_index(self.index)
+        self.assertEqual(3, len(rows))
+        self.assertEqual("2", rows[0]["Id"])
+
+        rows = irmc_eventlog_index.query_eventlog_index(self.index, severities=["Critical"], alert_groups=["Memory"])
+        self.assertEqual(1, len(rows))
+        self.assertEqual("irmc1", rows[0]["host"])
+        self.assertEqual("DIMM error", rows[0]["Message"])
+
+        rows = irmc_eventlog_index.query_eventlog_index(self.index, since_ts=1721811600)
+        self.assertEqual(["2"], [row["Id"] for row in rows])
+        rows = irmc_eventlog_index.query_eventlog_index(self.index, until_ts=1721811600, hosts=["irmc2"])
+        self.assertEqual(["1"], [row["Id"] for row in rows])
+
+    def test__query_eventlog_index__hosts_only(self):
+        irmc_eventlog_index.add_index_entries(self.index, "irmc1", "SystemEventLog", self.entries, self.cursor)
+        irmc_eventlog_index.add_index_entries(self.index, "irmc2", "SystemEventLog", self.entries[:1],
+                                              {"Id": 1, "Created": "2024-07-24T10:00:00+02:00"})
+        rows = irmc_eventlog_index.query_eventlog_index(self.index, hosts_only=True)
+        self.assertEqual([{"host": "irmc1", "count": 2, "last_created": "2024-07-24T11:00:00+02:00"},
+                          {"host": "irmc2", "count": 1, "last_created": "2024-07-24T10:00:00+02:00"}], rows)
+
+
+    def test__open_eventlog_index_readonly(self):
+        irmc_eventlog_index.add_index_entries(self.index, "irmc1", "SystemEventLog", self.entries, self.cursor)
+        index = irmc_eventlog_index.open_eventlog_index_readonly(os.path.join(self.tmpdir, "index.db"))
+        try:
+            self.assertEqual(2, len(irmc_eventlog_index.query_eventlog_index(index)))
+            with self.assertRaises(sqlite3.OperationalError):
+                irmc_eventlog_index.add_index_entries(index, "irmc2", "SystemEventLog", self.entries, self.cursor)
+        finally:
+            index.close()
+
+    def test__open_eventlog_index_readonly__missing(self):
+        path = os.path.join(self.tmpdir, "missing", "index.db")
+        with self.assertRaises(sqlite3.OperationalError):
+            irmc_eventlog_index.open_eventlog_index_readonly(path).execute('SELECT 1 FROM eventlog')
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
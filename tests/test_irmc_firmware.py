@@ -0,0 +1,127 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from ansible.compat.tests import unittest
+from ansible.compat.tests.mock import patch
+
+from module_utils import irmc_firmware
+
+
+class TestIrmcFirmware(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.image = os.path.join(self.tmpdir, "D3279-B1x.R1.20.0.UPC")
+        with open(self.image, "wb") as image:
+            image.write(b"bios image")
+        self.sha256 = hashlib.sha256(b"bios image").hexdigest()
+        self.cache_file = os.path.join(self.tmpdir, "cache.json")
+        self.mod = mock.Mock()
+
+    # ending the test
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test__get_image_version_from_name(self):
+        self.assertEqual("R1.20.0", irmc_firmware.get_image_version_from_name("/x/D3279-B1x.R1.20.0.UPC", "bios"))
+        self.assertEqual("09.09F", irmc_firmware.get_image_version_from_name("D3279_09.09F_sdr03.12.bin", "irmc"))
+        self.assertIsNone(irmc_firmware.get_image_version_from_name("bios.upc", "bios"))
+        # dates, tool versions and ambiguous names do not give a version
+        self.assertIsNone(irmc_firmware.get_image_version_from_name("irmc_2024.10_tool-1.2.bin", "irmc"))
+        self.assertIsNone(irmc_firmware.get_image_version_from_name("D3279_09.09F_to_09.10A.bin", "irmc"))
+        self.assertIsNone(irmc_firmware.get_image_version_from_name("D3279.R1.20.0_R1.21.0.UPC", "bios"))
+
+    def test__is_current_firmware(self):
+        self.assertTrue(irmc_firmware.is_current_firmware("R1.20.0", "V5.0.0.11 R1.20.0 for D3279-B1x"))
+        self.assertTrue(irmc_firmware.is_current_firmware("09.09F", "9.09F"))
+        self.assertFalse(irmc_firmware.is_current_firmware("R1.21.0", "V5.0.0.11 R1.20.0 for D3279-B1x"))
+        self.assertFalse(irmc_firmware.is_current_firmware("9.09F", "9.09G"))
+        self.assertFalse(irmc_firmware.is_current_firmware(None, "9.09F"))
+        self.assertFalse(irmc_firmware.is_current_firmware("9.09F", "Key 'BMCFirmware' does not exist"))
+
+    def test__get_image_info__file_name(self):
+        info = irmc_firmware.get_image_info(self.image, "bios")
+        self.assertEqual(self.sha256, info["sha256"])
+        self.assertEqual("R1.20.0", info["version"])
+        self.assertEqual("file_name", info["version_source"])
+
+    def test__get_image_info__manifest(self):
+        with open(self.image + ".json", "w") as manifest:
+            json.dump({"version": "R1.21.0", "sha256": self.sha256}, manifest)
+        info = irmc_firmware.get_image_info(self.image, "bios")
+        self.assertEqual("R1.21.0", info["version"])
+        self.assertEqual("manifest", info["version_source"])
+
+        info = irmc_firmware.get_image_info(self.image, "bios", version="R1.22.0")
+        self.assertEqual("R1.22.0", info["version"])
+
+    def test__get_image_info__manifest_mismatch(self):
+        with open(self.image + ".json", "w") as manifest:
+            json.dump({"version": "R1.21.0", "sha256": "0" * 64}, manifest)
+        with self.assertRaises(ValueError):
+            irmc_firmware.get_image_info(self.image, "bios")
+
+    @patch('module_utils.irmc_firmware.irmc_redfish_get_parallel')
+    def test__get_irmc_firmware_versions__all_is_well(self, mock_get):
+        sysdata = mock.Mock()
+        sysdata.json.return_value = {"Model": "PRIMERGY RX1330 M6S", "BiosVersion": "V5.0.0.11 R1.20.0 for D3279-B1x",
+                                     "PowerState": "Off"}
+        fwdata = mock.Mock()
+        fwdata.json.return_value = {"BMCFirmware": "9.09F", "BMCFirmwareRunning": "LowFWImage", "SDRRVersion": "3.12"}
+        mock_get.return_value = [(200, sysdata, "OK"), (200, fwdata, "OK")]
+        status, data, msg = irmc_firmware.get_irmc_firmware_versions(self.mod)
+        self.assertEqual(200, status)
+        self.assertEqual("PRIMERGY RX1330 M6S", data["system"]["model"])
+        self.assertEqual("V5.0.0.11 R1.20.0 for D3279-B1x", data["system"]["bios_version"])
+        self.assertEqual("9.09F", data["irmc"]["fw_version"])
+        self.assertIn("$select=", mock_get.call_args[0][1][0])
+
+    @patch('module_utils.irmc_firmware.irmc_redfish_get')
+    @patch('module_utils.irmc_firmware.irmc_redfish_get_parallel')
+    def test__get_irmc_firmware_versions__no_select(self, mock_get_parallel, mock_get):
+        sysdata = mock.Mock()
+        sysdata.json.return_value = {"Model": "PRIMERGY RX1330 M6S"}
+        fwdata = mock.Mock()
+        fwdata.json.return_value = {"BMCFirmware": "9.09F"}
+        mock_get_parallel.return_value = [(400, mock.Mock(), "not supported"), (200, fwdata, "OK")]
+        mock_get.return_value = (200, sysdata, "OK")
+        status, data, msg = irmc_firmware.get_irmc_firmware_versions(self.mod)
+        self.assertEqual(200, status)
+        self.assertEqual("PRIMERGY RX1330 M6S", data["system"]["model"])
+        mock_get.assert_called_once_with(self.mod, 'redfish/v1/Systems/0/')
+
+    @patch('module_utils.irmc_firmware.irmc_redfish_get_parallel')
+    def test__get_irmc_firmware_versions__bad_status(self, mock_get):
+        mock_get.return_value = [(200, mock.Mock(), "OK"), (404, mock.Mock(), "GET request was not successful")]
+        status, data, msg = irmc_firmware.get_irmc_firmware_versions(self.mod)
+        self.assertEqual(404, status)
+
+    @patch('module_utils.irmc_firmware.get_image_hash')
+    def test__get_image_info__cache(self, mock_hash):
+        mock_hash.return_value = self.sha256
+        irmc_firmware.get_image_info(self.image, "bios", cache_file=self.cache_file)
+        info = irmc_firmware.get_image_info(self.image, "bios", cache_file=self.cache_file)
+        self.assertEqual(1, mock_hash.call_count)
+        self.assertEqual(self.sha256, info["sha256"])
+
+        with open(self.image, "ab") as image:
+            image.write(b" changed")
+        irmc_firmware.get_image_info(self.image, "bios", cache_file=self.cache_file)
+        self.assertEqual(2, mock_hash.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
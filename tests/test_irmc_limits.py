@@ -0,0 +1,159 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import mock
+import requests
+from requests.adapters import HTTPAdapter
+
+from ansible.compat.tests import unittest
+from ansible.compat.tests.mock import patch
+
+from module_utils import irmc_limits
+
+
+def retry_history(*statuses):
+    return tuple(mock.Mock(status=status, redirect_location=None) for status in statuses)
+
+
+class BusyHandler(BaseHTTPRequestHandler):
+    # 503 for the first 'busy' requests, then 200
+    busy = 0
+
+    def answer(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.server.requests.append(self.command)
+        status = 503 if len(self.server.requests) <= self.server.busy else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_POST = answer
+
+    def log_message(self, *args):
+        pass
+
+
+class TestIrmcLimits(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.environ = {'IRMC_LIMITS_DIR': self.tmpdir}
+
+    # ending the test
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def limited_session(self, session, **environ):
+        self.environ.update(environ)
+        limits = irmc_limits.get_irmc_limits(self.environ)
+        return irmc_limits.IrmcLimitedSession(session, "irmc1", limits)
+
+    def test__get_irmc_limits(self):
+        self.assertIsNone(irmc_limits.get_irmc_limits(self.environ))
+        limits = irmc_limits.get_irmc_limits(dict(self.environ, IRMC_MAX_IN_FLIGHT='2'))
+        self.assertEqual(2, limits['max_in_flight'])
+        self.assertEqual(60, limits['breaker_cooldown'])
+
+    def test__irmc_retry__backoff(self):
+        retry = irmc_limits.IrmcRetry(total=5, backoff_factor=0.1, history=retry_history(503, 429, 503))
+        self.assertEqual(4.0, retry.get_backoff_time())
+        retry = irmc_limits.IrmcRetry(total=5, backoff_factor=0.1, history=retry_history(503) * 10)
+        self.assertEqual(irmc_limits.IrmcRetry.busy_backoff_max, retry.get_backoff_time())
+
+        response = mock.Mock()
+        response.headers = {'Retry-After': '3600'}
+        response.getheader.return_value = '3600'
+        retry = irmc_limits.IrmcRetry(total=5)
+        self.assertEqual(irmc_limits.IrmcRetry.irmc_retry_after_max, retry.get_retry_after(response))
+        # urllib3 >= 2.8 has its own 'retry_after_max' (6 hours by default), which must not lift the limit
+        retry = irmc_limits.IrmcRetryPolicy().get_retry().new()
+        retry.retry_after_max = 21600
+        self.assertEqual(60.0, retry.get_retry_after(response))
+
+    def test__irmc_retry_policy__backoff(self):
+        policy = irmc_limits.IrmcRetryPolicy(backoff_factor=0.1, backoff_max=0.5, jitter=0.5)
+        retry = policy.get_retry().new(history=retry_history(500, 500))
+        for i in range(10):
+            self.assertTrue(0.2 <= retry.get_backoff_time() <= 0.7)
+        # 429 and 503 use the backoff of the policy as well
+        retry = policy.get_retry().new(history=retry_history(503, 503, 503))
+        self.assertTrue(0.4 <= retry.get_backoff_time() <= 0.9)
+        retry = policy.get_retry().new(history=retry_history(503) * 5)
+        self.assertTrue(0.5 <= retry.get_backoff_time() <= 1.0)
+        self.assertTrue(policy.get_retry().is_retry('GET', 503))
+        self.assertFalse(policy.get_retry().is_retry('POST', 503))
+        self.assertFalse(policy.without_statuses().get_retry().is_retry('GET', 503))
+
+    def test__irmc_retry_policy__retries(self):
+        server = HTTPServer(('127.0.0.1', 0), BusyHandler)
+        server.requests = []
+        server.busy = 2
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        url = 'http://127.0.0.1:{0}/redfish/v1/'.format(server.server_address[1])
+        try:
+            policy = irmc_limits.IrmcRetryPolicy(backoff_max=0)
+            session = requests.Session()
+            session.mount('http://', HTTPAdapter(max_retries=policy.get_retry()))
+            # POST is not retried
+            self.assertEqual(503, session.post(url, data='{}').status_code)
+            self.assertEqual({'count': 0, 'reasons': {}}, policy.get_result())
+            self.assertEqual(200, session.get(url).status_code)
+            self.assertEqual({'count': 1, 'reasons': {'503': 1}}, policy.get_result())
+            self.assertEqual(['POST', 'GET', 'GET'], server.requests)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test__limited_session__max_in_flight(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def get(url, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return mock.Mock(status_code=200)
+
+        session = self.limited_session(mock.Mock(get=get), IRMC_MAX_IN_FLIGHT='2')
+        threads = [threading.Thread(target=session.get, args=("https://irmc1/redfish/v1/",)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, in_flight[1])
+
+    def test__limited_session__breaker(self):
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=503)
+        limited = self.limited_session(session, IRMC_BREAKER_THRESHOLD='2')
+        for i in range(2):
+            self.assertEqual(503, limited.get("https://irmc1/redfish/v1/").status_code)
+        with self.assertRaises(irmc_limits.IrmcLimitError):
+            limited.get("https://irmc1/redfish/v1/")
+        self.assertEqual(2, session.get.call_count)
+
+        # after the cooldown, a successful request closes the breaker again
+        session.get.return_value = mock.Mock(status_code=200)
+        with patch.object(irmc_limits.time, 'time', return_value=time.time() + 61):
+            limited.get("https://irmc1/redfish/v1/")
+        self.assertEqual(0, limited.check_breaker()['failures'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import json
+from contextlib import contextmanager
+
+import mock
+
+from ansible.compat.tests import unittest
+from ansible.compat.tests.mock import patch
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+from modules import irmc_raid
+
+try:
+    from ansible.module_utils.testing import patch_module_args
+except ImportError:
+    @contextmanager
+    def patch_module_args(args):
+        basic._ANSIBLE_ARGS = to_bytes(json.dumps({'ANSIBLE_MODULE_ARGS': args}))
+        try:
+            yield
+        finally:
+            basic._ANSIBLE_ARGS = None
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class TestIrmcRaid(unittest.TestCase):
+    # the module with the requests to iRMC replaced
+
+    # preparing the tests
+    def setUp(self):
+        irmc_raid.result.clear()
+        self.configuration = [{
+            'id': 'RAIDAdapter0', 'level': '0,1,5,6,10,50,60', 'unused_disks': [{'id': '2'}, {'id': '3'}, {'id': '4'}],
+            'logical_drives': [{'id': '0', 'disks': [{'id': '0'}, {'id': '1'}]}],
+        }]
+        system = mock.Mock(status_code=200)
+        system.json.return_value = {'PowerState': 'Off'}
+        self.patches = [
+            patch.object(irmc_raid, 'irmc_redfish_get', return_value=(200, system, "OK")),
+            patch.object(irmc_raid, 'get_raid_data', return_value={}),
+            patch.object(irmc_raid, 'get_raid_configuration', return_value=self.configuration),
+            patch.object(irmc_raid, 'apply_raid_configuration'),
+            patch.object(basic.AnsibleModule, 'exit_json', side_effect=self.module_exit('exit')),
+            patch.object(basic.AnsibleModule, 'fail_json', side_effect=self.module_exit('fail')),
+        ]
+        self.mocks = [patcher.start() for patcher in self.patches]
+        self.apply = self.mocks[3]
+
+    # ending the test
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+
+    def module_exit(self, name):
+        def module_exit(**kwargs):
+            self.exit = (name, kwargs)
+            raise ModuleExit()
+        return module_exit
+
+    def run_module(self, **args):
+        args = dict(dict(irmc_url="irmc1", irmc_username="admin", irmc_password="admin"), **args)
+        with patch_module_args(args), self.assertRaises(ModuleExit):
+            irmc_raid.main()
+        return self.exit
+
+    def test__operations__without_command(self):
+        result = self.run_module(operations=[
+            {'command': 'delete', 'adapter': '0', 'array': '-1'},
+            {'command': 'create', 'adapter': '0', 'level': '1', 'name': 'system'},
+            {'command': 'create', 'adapter': '0', 'level': '5', 'name': 'data'},
+        ])
+        self.assertEqual('exit', result[0])
+        body, command = self.apply.call_args[0][1:]
+        self.assertEqual('change', command)
+        lds = body['Server']['HWConfigurationIrmc']['Adapters']['RAIDAdapter'][0]['LogicalDrives']['LogicalDrive']
+        self.assertEqual(['Delete', 'Create', 'Create'], [ld['@Action'] for ld in lds])
+
+    def test__operations__free_disks(self):
+        # RAID 1 uses 2 of the 3 un-used disks, so there are not enough disks left for RAID 5
+        result = self.run_module(operations=[
+            {'command': 'create', 'adapter': '0', 'level': '1'},
+            {'command': 'create', 'adapter': '0', 'level': '5'},
+        ])
+        self.assertEqual(('fail', 41), (result[0], result[1]['status']))
+        self.assertEqual(0, self.apply.call_count)
+
+    def test__operations__unsupported_level(self):
+        self.configuration[0]['unused_disks'] = []
+        result = self.run_module(operations=[{'command': 'create', 'adapter': '0', 'level': '7'}])
+        self.assertEqual(('fail', 42), (result[0], result[1]['status']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+
+import mock
+
+from ansible.compat.tests import unittest
+from ansible.compat.tests.mock import patch
+
+# patched where irmc_rolling_update imports it from
+from ansible_collections.fujitsu.primergy.plugins.module_utils import irmc_firmware
+from module_utils import irmc_rolling_update
+
+
+def mock_response(data, headers=None):
+    response = mock.Mock()
+    response.json.return_value = data
+    response.headers = headers or {}
+    return response
+
+
+class TestIrmcRollingUpdate(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.tmpdir, "rollout.json")
+        self.systems = {
+            "irmc1": {"Model": "PRIMERGY RX1330 M6S", "PowerState": "Off",
+                      "BiosVersion": "V5.0.0.11 R1.0.0 for D4133"},
+            "irmc2": {"Model": "PRIMERGY RX1330 M6S", "PowerState": "Off",
+                      "BiosVersion": "V5.0.0.11 R1.1.0 for D4133"},
+            "irmc3": {"Model": "PRIMERGY RX2540 M7", "PowerState": "Off", "BiosVersion": "V5.0.0.11 R1.0.0 for D3988"},
+        }
+        self.task_state = {"irmc1": "Completed", "irmc3": "Completed"}
+        self.options = dict(
+            update_type="bios", update_source="tftp", server_name="tftp.local", file_name=None,
+            file_name_mapping={"PRIMERGY_RX1330_M6S": "D4133-A1x.R1.1.0.UPC",
+                               "PRIMERGY_RX2540_M7": "D3988-A1x.R1.2.0.UPC"},
+            irmc_flash_selector=None, irmc_boot_selector=None, skip_if_current=True, ignore_power_on=False,
+            wave_size=0, max_in_flight=2, max_failures=0, timeout=30, poll_interval=0,
+        )
+        self.connections = dict((name, irmc_rolling_update.IrmcHost(name, "admin", "admin"))
+                                for name in self.systems)
+        self.started = []
+
+        def firmware_versions(irmc):
+            system = self.systems[irmc.params['irmc_url']]
+            return 200, {"system": {"model": system["Model"], "power_state": system["PowerState"],
+                                    "bios_version": system["BiosVersion"]}, "irmc": {}}, "OK"
+
+        def redfish_get(irmc, uri):
+            name = irmc.params['irmc_url']
+            if uri == 'redfish/v1/TaskService/Tasks':
+                return 200, mock_response({"Members": []}), "OK"
+            if uri.startswith(irmc_firmware.update_url):
+                return 200, mock_response({"@odata.etag": "1"}), "OK"
+            return 200, mock_response({"TaskState": self.task_state[name],
+                                       "Oem": {"ts_fujitsu": {"StatusOEM": ""}}}), "OK"
+
+        def redfish_post(irmc, uri, body):
+            self.started.append(irmc.params['irmc_url'])
+            return 202, mock_response({}, {"Location": "/redfish/v1/TaskService/Tasks/1"}), "OK"
+
+        self.patches = [
+            patch.object(irmc_rolling_update, 'get_irmc_firmware_versions', side_effect=firmware_versions),
+            patch.object(irmc_firmware, 'irmc_redfish_get', side_effect=redfish_get),
+            patch.object(irmc_firmware, 'irmc_redfish_post', side_effect=redfish_post),
+            patch.object(irmc_firmware, 'irmc_redfish_patch', return_value=(200, mock_response({}), "OK")),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    # ending the test
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test__plan_waves(self):
+        hosts = {"a": {"model": "M1"}, "b": {"model": "M2"}, "c": {"model": "M1"}, "d": {"model": "M1"}}
+        self.assertEqual([["a", "c", "d"], ["b"]], irmc_rolling_update.plan_waves(hosts))
+        self.assertEqual([["a", "c"], ["d"], ["b"]], irmc_rolling_update.plan_waves(hosts, 2))
+
+    def test__rolling_update__all_is_well(self):
+        rollout = irmc_rolling_update.RollingUpdate(self.connections, self.options, self.state_file)
+        hosts = rollout.run()
+        self.assertEqual("finished", hosts["irmc1"]["state"])
+        self.assertEqual("current", hosts["irmc2"]["state"])
+        self.assertEqual("finished", hosts["irmc3"]["state"])
+        self.assertEqual([["irmc1"], ["irmc3"]], rollout.waves)
+        self.assertFalse(rollout.aborted)
+
+        # nothing left to do for a second run
+        self.started = []
+        hosts = irmc_rolling_update.RollingUpdate(self.connections, self.options, self.state_file).run()
+        self.assertEqual([], self.started)
+        self.assertEqual("finished", hosts["irmc1"]["state"])
+
+    def test__rolling_update__max_failures(self):
+        self.task_state["irmc1"] = "Exception"
+        rollout = irmc_rolling_update.RollingUpdate(self.connections, self.options, self.state_file)
+        hosts = rollout.run()
+        self.assertTrue(rollout.aborted)
+        self.assertEqual("failed", hosts["irmc1"]["state"])
+        self.assertEqual("not_started", hosts["irmc3"]["state"])
+
+        # the failed and the not started server are updated by the next run
+        self.task_state["irmc1"] = "Completed"
+        hosts = irmc_rolling_update.RollingUpdate(self.connections, self.options, self.state_file).run()
+        self.assertEqual("finished", hosts["irmc1"]["state"])
+        self.assertEqual("finished", hosts["irmc3"]["state"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import json
+import shutil
+import time
+
+import mock
+
+from ansible.compat.tests import unittest
+
+from module_utils import irmc, irmc_firmware, irmc_scci_utils
+from tests.simulator.irmc_simulator import IrmcSimulator
+
+
+@unittest.skipIf(shutil.which('openssl') is None, "'openssl' is required for the certificate of the simulator")
+class TestIrmcSimulator(unittest.TestCase):
+    # the transport helpers of module_utils against the local iRMC simulator
+
+    # preparing the tests
+    def setUp(self):
+        self.simulator = IrmcSimulator(task_duration=0.2, session_duration=0, reboot_time=0.5, retry_after=0,
+                                       eventlog_entries=10, seed=1).start()
+        self.module = self.irmc_module()
+
+    # ending the test
+    def tearDown(self):
+        self.simulator.stop()
+
+    def irmc_module(self, **params):
+        params = dict(dict(irmc_url=self.simulator.irmc_url, irmc_username="admin", irmc_password="admin",
+                           validate_certs=False), **params)
+        return mock.Mock(params=params, spec=['params', 'exit_json', 'fail_json'])
+
+    def test__firmware_versions(self):
+        status, data, msg = irmc_firmware.get_irmc_firmware_versions(self.module)
+        self.assertEqual(200, status)
+        self.assertEqual("PRIMERGY RX1330 M6S", data['system']['model'])
+        self.assertEqual("2.08P", data['irmc']['fw_version'])
+
+        status, data, msg = irmc.irmc_redfish_get(self.irmc_module(irmc_password="wrong"), "redfish/v1/Systems/0/")
+        self.assertEqual(401, status)
+
+    def test__patch__etag(self):
+        uri = "redfish/v1/Systems/0/Oem/ts_fujitsu/System/"
+        status, data, msg = irmc.irmc_redfish_get(self.module, uri)
+        etag = data.json()['@odata.etag']
+        status, data, msg = irmc.irmc_redfish_patch(self.module, uri, json.dumps({"AssetTag": "sim"}), etag)
+        self.assertEqual(200, status)
+        status, data, msg = irmc.irmc_redfish_patch(self.module, uri, json.dumps({"AssetTag": "old"}), etag)
+        self.assertEqual(412, status)
+        status, data, msg = irmc.irmc_redfish_get(self.module, uri)
+        self.assertEqual("sim", data.json()['AssetTag'])
+
+    def test__power_and_eventlog(self):
+        uri = "redfish/v1/Systems/0/Actions/Oem/FTSComputerSystem.Reset"
+        status, data, msg = irmc.irmc_redfish_post(self.module, uri, json.dumps({"FTSResetType": "PowerOff"}))
+        self.assertEqual(204, status)
+        status, data, msg = irmc.irmc_redfish_get(self.module, "redfish/v1/Systems/0/")
+        self.assertEqual("Off", data.json()['PowerState'])
+
+        uri = "redfish/v1/Managers/iRMC/LogServices/SystemEventLog/Entries?$top=5&$skip=10"
+        status, data, msg = irmc.irmc_redfish_get(self.module, uri)
+        self.assertEqual(12, data.json()['Members@odata.count'])
+        self.assertEqual(["2", "1"], [entry['Id'] for entry in data.json()['Members']])
+
+    def test__scci(self):
+        scci_map = [['server_name', 'server_name', 0x1A42, 0, None]]
+        body = irmc_scci_utils.scci_body_start + \
+            irmc_scci_utils.add_scci_command('SET', scci_map, 'server_name', 0, 'sim') + \
+            irmc_scci_utils.scci_body_end
+        status, data, msg = irmc_scci_utils.irmc_scci_post(self.module, body)
+        self.assertEqual(200, status)
+        body = irmc_scci_utils.scci_body_start + \
+            irmc_scci_utils.add_scci_command('GET', scci_map, 'server_name', 0, None) + \
+            irmc_scci_utils.scci_body_end
+        status, data, msg = irmc_scci_utils.irmc_scci_post(self.module, body)
+        self.assertEqual(('sim', 0, ''), irmc_scci_utils.get_scciresult(data.content, 0x1A42))
+
+    def test__profile_session(self):
+        uri = "rest/v1/Oem/eLCM/ProfileManagement/get?PARAM_PATH=Server/SystemConfig/BiosConfig/BiosBootOrder"
+        status, data, msg = irmc.irmc_redfish_post(self.module, uri, "")
+        self.assertEqual(202, status)
+        status, data, msg = irmc.waitForSessionToFinish(self.module, data.json()['Session']['Id'])
+        self.assertEqual("Session result: terminated regularly", msg)
+        status, data, msg = irmc.irmc_redfish_get(self.module, "rest/v1/Oem/eLCM/ProfileManagement/BiosBootOrder")
+        self.assertEqual(200, status)
+        self.assertIn("BiosBootOrder", data.json()['Server']['SystemConfig']['BiosConfig'])
+        status, data, msg = irmc.irmc_redfish_post(self.module, uri, "")
+        self.assertEqual(409, status)
+
+    def test__update_task__irmc_reboot(self):
+        uri = "redfish/v1/Managers/iRMC/Actions/FTSManager.FWTFTPUpdate"
+        status, data, msg = irmc.irmc_redfish_post(self.module, uri, "{}")
+        self.assertEqual(202, status)
+        task = data.headers['Location'].lstrip('/')
+        status, data, msg = irmc.irmc_redfish_get(self.module, task)
+        self.assertEqual("Running", data.json()['TaskState'])
+        time.sleep(0.2)
+        # the iRMC reboots after the update, then the task is gone
+        status, data, msg = irmc.irmc_redfish_get(irmc_firmware.IrmcTaskPoll(self.module), task)
+        self.assertEqual(503, status)
+        time.sleep(0.5)
+        status, data, msg = irmc.irmc_redfish_get(self.module, task)
+        self.assertEqual(404, status)
+
+    def test__busy__retry_policy(self):
+        self.simulator.busy_rate = 1.0
+        module = self.irmc_module(retry=dict(attempts=2, backoff_factor=0, backoff_max=0, jitter=0,
+                                             statuses=[503], methods=['GET']))
+        status, data, msg = irmc.irmc_redfish_get(module, "redfish/v1/Systems/0/")
+        self.assertEqual(503, status)
+        self.assertEqual({'count': 2, 'reasons': {'503': 2}}, module.irmc_retry_policy.get_result())
+        self.assertEqual(3, self.simulator.stats['busy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
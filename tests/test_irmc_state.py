@@ -0,0 +1,74 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from ansible.compat.tests import unittest
+
+from module_utils import irmc_state
+
+
+class TestIrmcState(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "subdir", "state.json")
+
+    # ending the test
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test__read_state__no_file(self):
+        self.assertIsNone(irmc_state.read_state(self.path, "irmc1"))
+        self.assertEqual({}, irmc_state.read_state(self.path, "irmc1", {}))
+
+    def test__update_state__all_is_well(self):
+        irmc_state.update_state(self.path, "irmc1", {"Id": 20})
+        irmc_state.update_state(self.path, "irmc2", {"Id": 5})
+        self.assertEqual({"Id": 20}, irmc_state.read_state(self.path, "irmc1"))
+        self.assertEqual({"Id": 5}, irmc_state.read_state(self.path, "irmc2"))
+        with open(self.path) as statefile:
+            self.assertEqual({"irmc1": {"Id": 20}, "irmc2": {"Id": 5}}, json.load(statefile))
+
+    def test__update_state__remove_key(self):
+        irmc_state.update_state(self.path, "irmc1", {"Id": 20})
+        irmc_state.update_state(self.path, "irmc1", None)
+        self.assertIsNone(irmc_state.read_state(self.path, "irmc1"))
+
+    def test__read_state__invalid_file(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as statefile:
+            statefile.write("no json")
+        self.assertIsNone(irmc_state.read_state(self.path, "irmc1"))
+        irmc_state.update_state(self.path, "irmc1", {"Id": 1})
+        self.assertEqual({"Id": 1}, irmc_state.read_state(self.path, "irmc1"))
+
+    def test__try_acquire_token__max_tokens(self):
+        self.assertEqual(0, irmc_state.try_acquire_token(self.path, "irmc1", max_tokens=2))
+        self.assertEqual(0, irmc_state.try_acquire_token(self.path, "irmc2", max_tokens=2))
+        self.assertTrue(irmc_state.try_acquire_token(self.path, "irmc3", max_tokens=2) > 0)
+        irmc_state.release_token(self.path, "irmc1")
+        self.assertEqual(0, irmc_state.try_acquire_token(self.path, "irmc3", max_tokens=2))
+
+    def test__try_acquire_token__stagger_and_lease(self):
+        self.assertEqual(0, irmc_state.try_acquire_token(self.path, "irmc1", stagger=30))
+        wait = irmc_state.try_acquire_token(self.path, "irmc2", stagger=30)
+        self.assertTrue(29 < wait <= 30)
+        # token of irmc1 has expired
+        self.assertEqual(0, irmc_state.try_acquire_token(self.path, "irmc2", max_tokens=1, lease=0))
+
+    def test__acquire_token__timeout(self):
+        self.assertEqual(0, irmc_state.try_acquire_token(self.path, "irmc1", max_tokens=1))
+        self.assertIsNone(irmc_state.acquire_token(self.path, "irmc2", max_tokens=1, timeout=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/python
+
+# Copyright 2018-2024 Fsas Technologies Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division)
+__metaclass__ = type
+
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+
+import mock
+
+from ansible.compat.tests import unittest
+
+from module_utils import irmc_tftp_server
+
+
+def tftp_request(port, opcode, filename, options=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(5)
+    packet = struct.pack('!H', opcode) + filename.encode() + b'\0octet\0'
+    for key, value in (options or {}).items():
+        packet += key.encode() + b'\0' + value.encode() + b'\0'
+    sock.sendto(packet, ('127.0.0.1', port))
+    return sock
+
+
+def tftp_get(port, filename, options=None):
+    sock = tftp_request(port, irmc_tftp_server.TFTP_RRQ, filename, options)
+    data = b''
+    blksize = int((options or {}).get('blksize', 512))
+    oack = {}
+    try:
+        while True:
+            packet, server = sock.recvfrom(65536)
+            opcode, number = struct.unpack('!HH', packet[:4])
+            if opcode == irmc_tftp_server.TFTP_ERROR:
+                return None, number, oack
+            if opcode == irmc_tftp_server.TFTP_OACK:
+                fields = packet[2:].split(b'\0')[:-1]
+                oack = dict((fields[i].decode(), fields[i + 1].decode()) for i in range(0, len(fields), 2))
+                sock.sendto(struct.pack('!HH', irmc_tftp_server.TFTP_ACK, 0), server)
+                continue
+            data += packet[4:]
+            sock.sendto(struct.pack('!HH', irmc_tftp_server.TFTP_ACK, number), server)
+            if len(packet) - 4 < blksize:
+                return data, None, oack
+    finally:
+        sock.close()
+
+
+class TestIrmcTftpServer(unittest.TestCase):
+
+    # preparing the tests
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmpdir, "bios"))
+        self.image = os.urandom(5000)
+        with open(os.path.join(self.tmpdir, "bios", "D3279-B1x.R1.20.0.UPC"), "wb") as image:
+            image.write(self.image)
+        self.stats = []
+        self.server = irmc_tftp_server.TftpServer(self.tmpdir, address='127.0.0.1', port=0, timeout=1, retries=1,
+                                                  on_stats=self.stats.append)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    # ending the test
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        shutil.rmtree(self.tmpdir)
+
+    def test__parse_tftp_request(self):
+        packet = struct.pack('!H', 1) + b'file.bin\0octet\0blksize\x001428\0'
+        self.assertEqual((1, 'file.bin', 'octet', {'blksize': '1428'}), irmc_tftp_server.parse_tftp_request(packet))
+        with self.assertRaises(ValueError):
+            irmc_tftp_server.parse_tftp_request(struct.pack('!H', 1) + b'file.bin')
+
+    def test__tftp_server__all_is_well(self):
+        data, error, oack = tftp_get(self.server.port, "bios/D3279-B1x.R1.20.0.UPC")
+        self.assertIsNone(error)
+        self.assertEqual(self.image, data)
+        self.assertEqual({}, oack)
+
+    def test__tftp_server__options(self):
+        data, error, oack = tftp_get(self.server.port, "/bios/D3279-B1x.R1.20.0.UPC",
+                                     {'blksize': '1000', 'tsize': '0'})
+        self.assertEqual(self.image, data)
+        self.assertEqual({'blksize': '1000', 'tsize': '5000'}, oack)
+        self.server.shutdown()
+        self.thread.join()
+        self.assertEqual(1, self.stats[-1]['completed'])
+        self.assertEqual(5000, self.stats[-1]['clients']['127.0.0.1']['bytes_sent'])
+
+    def test__tftp_server__not_found(self):
+        data, error, oack = tftp_get(self.server.port, "../etc/passwd")
+        self.assertEqual(irmc_tftp_server.TFTP_ERR_NOT_FOUND, error)
+        data, error, oack = tftp_get(self.server.port, "bios/missing.UPC")
+        self.assertEqual(irmc_tftp_server.TFTP_ERR_NOT_FOUND, error)
+
+    def test__tftp_server__read_only(self):
+        sock = tftp_request(self.server.port, irmc_tftp_server.TFTP_WRQ, "bios/new.UPC")
+        packet = sock.recv(65536)
+        sock.close()
+        self.assertEqual((irmc_tftp_server.TFTP_ERROR, irmc_tftp_server.TFTP_ERR_ACCESS),
+                         struct.unpack('!HH', packet[:4]))
+
+
+    def test__tftp_server__error_in_request(self):
+        get_image = self.server.get_image
+        with mock.patch.object(self.server, 'get_image', side_effect=OSError("Permission denied")):
+            data, error, oack = tftp_get(self.server.port, "bios/D3279-B1x.R1.20.0.UPC")
+        self.assertEqual(irmc_tftp_server.TFTP_ERR_UNDEFINED, error)
+        self.assertTrue(self.thread.is_alive())
+        self.server.get_image = get_image
+        data, error, oack = tftp_get(self.server.port, "bios/D3279-B1x.R1.20.0.UPC")
+        self.assertEqual(self.image, data)
+
+    def test__tftp_server__shutdown_finishes_transfers(self):
+        sock = tftp_request(self.server.port, irmc_tftp_server.TFTP_RRQ, "bios/D3279-B1x.R1.20.0.UPC")
+        packet, server = sock.recvfrom(65536)
+        self.server.shutdown()
+        data = packet[4:]
+        while len(packet) - 4 == 512:
+            sock.sendto(struct.pack('!HH', irmc_tftp_server.TFTP_ACK, struct.unpack('!H', packet[2:4])[0]), server)
+            packet = sock.recv(65536)
+            data += packet[4:]
+        sock.sendto(struct.pack('!HH', irmc_tftp_server.TFTP_ACK, struct.unpack('!H', packet[2:4])[0]), server)
+        sock.close()
+        self.thread.join()
+        self.assertEqual(self.image, data)
+        self.assertEqual((1, 0), (self.stats[-1]['completed'], self.stats[-1]['failed']))
+
+    def test__tftp_server__abort(self):
+        sock = tftp_request(self.server.port, irmc_tftp_server.TFTP_RRQ, "bios/D3279-B1x.R1.20.0.UPC")
+        sock.recv(65536)
+        sock.close()
+        self.server.shutdown()
+        self.server.abort()
+        self.thread.join()
+        self.assertEqual((0, 1), (self.stats[-1]['completed'], self.stats[-1]['failed']))
+
+
+if __name__ == '__main__':
+    unittest.main()
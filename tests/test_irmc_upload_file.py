@@ -11,8 +11,10 @@ try:               # check whether python knows about '__builtin__'
 except NameError:  # no, so it is python3, use 'builtins' instead
     __builtin__ = builtins
 
+import io
 import requests
 from requests.exceptions import Timeout
+from requests_toolbelt import MultipartEncoder
 import mock
 
 from ansible.compat.tests import unittest
@@ -101,6 +103,27 @@ class TestIrmcUploadFile(unittest.TestCase):
         self.assertEqual(self.mockdata.json.return_value, data.json.return_value)
         self.assertEqual("POST request was not successful (" + self.url + ").", msg)
 
+    def test__upload_monitor__stats(self):
+        encoder = MultipartEncoder(fields={'data': ('filename', io.BytesIO(b"x" * 1000), 'application/octet-stream')})
+        monitor = irmc_upload_file.UploadMonitor(encoder, block_size=100)
+        self.assertEqual(100, len(monitor.read(8192)))
+        while monitor.read(8192):
+            pass
+        stats = monitor.get_stats()
+        self.assertEqual(monitor.len, stats['bytes_total'])
+        self.assertEqual(monitor.len, stats['bytes_read'])
+        self.assertEqual(100, stats['block_size'])
+        self.assertIsNotNone(stats['response_time'])
+
+    @patch('module_utils.irmc_upload_file.time.time')
+    def test__upload_monitor__deadline_exceeded(self, mock_time):
+        mock_time.side_effect = [0, 5, 11]
+        encoder = MultipartEncoder(fields={'data': ('filename', io.BytesIO(b"x" * 1000), 'application/octet-stream')})
+        monitor = irmc_upload_file.UploadMonitor(encoder, block_size=100, deadline=10)
+        monitor.read()
+        with self.assertRaises(irmc_upload_file.UploadDeadlineExceeded):
+            monitor.read()
+
     # POST exception mock does not work here for unknown reason (2 try/except blocks?)
     # @patch.object(requests.Session, 'post')
     # @patch("__builtin__.open", mock.mock_open(read_data="data"))